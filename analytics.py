@@ -0,0 +1,206 @@
+import csv
+from datetime import datetime
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import bulk_io
+from main import HistoryEntry, Status
+
+# Flow metrics
+#
+# Status changes are read from the typed task history events into flat NumPy
+# arrays, one element per task or per transition, and every metric is
+# computed with array operations over them:
+#
+#   cycle time   first move to DOING -> first move to DONE
+#   lead time    task start time     -> first move to DONE
+#   throughput   tasks first moved to DONE, per week (weeks start on Monday)
+#   burndown     tasks started but not yet DONE at the end of each week
+#
+# Cycle and lead time are reported as percentiles per project or per
+# assignee. Python only loops once over the raw records to collect the
+# transitions; everything after that is vectorized. Histories not yet
+# migrated to typed events are parsed as they are read.
+
+STATUS_CODES = {status.name: code for code, status in enumerate(Status)}
+DOING, DONE = STATUS_CODES['DOING'], STATUS_CODES['DONE']
+PERCENTILES = (50, 85, 95)
+DAY = 86400
+WEEK = 7 * DAY
+CSV_COLUMNS = ['metric', 'group', 'week', 'count', 'p50', 'p85', 'p95', 'value']
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("Flow metrics need NumPy: pip install numpy")
+
+
+def _status_moves(history):
+    """Yield (epoch seconds, new status name) for the status changes of a raw history."""
+    for entry in history:
+        if 'kind' not in entry:
+            entry = HistoryEntry.from_legacy(entry).to_dict()
+        if entry['kind'] == 'update' and entry['field'] == 'status':
+            yield entry['ts'], entry['new']
+
+
+class FlowData:
+    """Status transitions of a set of tasks, as parallel arrays.
+
+    Per task: project code, start time, first DOING and first DONE time (NaN
+    when never reached). Per (task, assignee) pair: task index and name code.
+    """
+
+    def __init__(self, projects, names, task_project, start, doing, done, pair_task, pair_name):
+        self.projects = projects
+        self.names = names
+        self.task_project = task_project
+        self.start = start
+        self.doing = doing
+        self.done = done
+        self.pair_task = pair_task
+        self.pair_name = pair_name
+
+    def __len__(self):
+        return len(self.start)
+
+    def cycle_time(self):
+        cycle = self.done - self.doing
+        cycle[cycle < 0] = np.nan
+        return cycle / DAY
+
+    def lead_time(self):
+        lead = self.done - self.start
+        lead[lead < 0] = np.nan
+        return lead / DAY
+
+    def groups(self, by):
+        """Return (group codes per value, group names, value index) for per-project or per-assignee stats."""
+        if by == 'assignee':
+            return self.pair_name, self.names, self.pair_task
+        return self.task_project, self.projects, slice(None)
+
+
+def extract(projects=None, project_ids=None):
+    """Collect the flow data of the given project records (default: all of projects.json)."""
+    _require_numpy()
+    projects = bulk_io.filter_projects(bulk_io.iter_projects() if projects is None else projects, project_ids)
+    project_titles, names, name_codes = [], [], {}
+    task_project, start = [], []
+    pair_task, pair_name = [], []
+    move_task, move_time, move_to = [], [], []
+    for project in projects:
+        code = len(project_titles)
+        project_titles.append(project['title'])
+        for task in project['tasks']:
+            index = len(start)
+            task_project.append(code)
+            start.append(datetime.fromisoformat(task['start_time']).timestamp())
+            for name in task['assignees']:
+                pair_task.append(index)
+                pair_name.append(name_codes.setdefault(name, len(name_codes)))
+            for ts, status in _status_moves(task['history']):
+                if status in STATUS_CODES:
+                    move_task.append(index)
+                    move_time.append(ts)
+                    move_to.append(STATUS_CODES[status])
+    names = [None] * len(name_codes)
+    for name, code in name_codes.items():
+        names[code] = name
+
+    count = len(start)
+    move_task = np.array(move_task, dtype=np.int64)
+    move_time = np.array(move_time, dtype=np.float64)
+    move_to = np.array(move_to, dtype=np.int8)
+    first = {}
+    for status in (DOING, DONE):
+        times = np.full(count, np.inf)
+        mask = move_to == status
+        np.minimum.at(times, move_task[mask], move_time[mask])
+        times[np.isinf(times)] = np.nan
+        first[status] = times
+    return FlowData(project_titles, names, np.array(task_project, dtype=np.int64),
+                    np.array(start, dtype=np.float64), first[DOING], first[DONE],
+                    np.array(pair_task, dtype=np.int64), np.array(pair_name, dtype=np.int64))
+
+
+def group_percentiles(values, groups, names, percentiles=PERCENTILES):
+    """Return [(name, count, *percentiles)] of the finite values in each group."""
+    keep = np.isfinite(values)
+    values, groups = values[keep], groups[keep]
+    order = np.lexsort((values, groups))
+    values, groups = values[order], groups[order]
+    codes, first, counts = np.unique(groups, return_index=True, return_counts=True)
+    rows = []
+    for code, count, chunk in zip(codes, counts, np.split(values, first[1:])):
+        rows.append((names[code], int(count), *np.percentile(chunk, percentiles)))
+    return rows
+
+
+def time_percentiles(data, metric, by='project'):
+    values = data.cycle_time() if metric == 'cycle_time' else data.lead_time()
+    groups, names, index = data.groups(by)
+    return group_percentiles(values[index], groups, names)
+
+
+def _week(seconds):
+    # 1970-01-01 was a Thursday; shift so weeks start on Monday.
+    return np.floor((seconds / DAY + 3) / 7).astype(np.int64)
+
+
+def weekly_series(data, weeks=None):
+    """Return (week start dates, tasks done per week, tasks open at each week's end)."""
+    started = _week(data.start)
+    done = data.done[np.isfinite(data.done)]
+    done = _week(done)
+    if not len(started):
+        return np.array([], dtype='datetime64[D]'), np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    # A task can reach DONE before its start time if the start was edited later.
+    first = min(started.min(), done.min()) if len(done) else started.min()
+    last = max(started.max(), done.max() if len(done) else first)
+    length = last - first + 1
+    throughput = np.bincount(done - first, minlength=length)
+    burndown = np.cumsum(np.bincount(started - first, minlength=length)) - np.cumsum(throughput)
+    week_starts = (np.arange(first, last + 1) * 7 - 3).astype('datetime64[D]')
+    if weeks:
+        week_starts, throughput, burndown = week_starts[-weeks:], throughput[-weeks:], burndown[-weeks:]
+    return week_starts, throughput, burndown
+
+
+def report(data, by='project', weeks=12):
+    """Print the flow metrics as rich tables."""
+    from main import Table, console
+    for metric, title in (('cycle_time', "Cycle time (days)"), ('lead_time', "Lead time (days)")):
+        table = Table(title=f"{title} per {by}", show_lines=True)
+        table.add_column(by.capitalize(), style="magenta")
+        table.add_column("Tasks", style="cyan", justify="right")
+        for percentile in PERCENTILES:
+            table.add_column(f"p{percentile}", style="green", justify="right")
+        for name, count, *values in time_percentiles(data, metric, by):
+            table.add_row(name, str(count), *(f"{value:.1f}" for value in values))
+        console.print(table)
+
+    table = Table(title="Weekly throughput and burndown", show_lines=True)
+    table.add_column("Week of", style="cyan")
+    table.add_column("Done", style="green", justify="right")
+    table.add_column("Open", style="yellow", justify="right")
+    for week, done, still_open in zip(*weekly_series(data, weeks)):
+        table.add_row(str(week), str(done), str(still_open))
+    console.print(table)
+
+
+def write_csv(data, out, by='project', weeks=None):
+    """Write every metric as rows of one CSV: percentiles first, then the weekly series."""
+    writer = csv.DictWriter(out, fieldnames=CSV_COLUMNS)
+    writer.writeheader()
+    for metric in ('cycle_time', 'lead_time'):
+        for name, count, *values in time_percentiles(data, metric, by):
+            row = {'metric': f"{metric}_days", 'group': name, 'count': count}
+            row.update({f"p{p}": round(value, 3) for p, value in zip(PERCENTILES, values)})
+            writer.writerow(row)
+    for week, done, still_open in zip(*weekly_series(data, weeks)):
+        writer.writerow({'metric': 'throughput', 'group': 'all', 'week': str(week), 'value': int(done)})
+        writer.writerow({'metric': 'burndown', 'group': 'all', 'week': str(week), 'value': int(still_open)})
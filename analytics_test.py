@@ -0,0 +1,61 @@
+import io
+import csv
+import unittest
+from datetime import datetime, timedelta
+
+import analytics
+
+def task(title, start, moves, assignees=()):
+    history = [{'username': 'alice', 'change': f"Status changed from Status.{old} to Status.{new}",
+                'timestamp': (start + timedelta(days=day)).isoformat()} for day, old, new in moves]
+    history.append({'username': 'alice', 'change': "Task name changed to x", 'timestamp': start.isoformat()})
+    return {'id': title, 'title': title, 'start_time': start.isoformat(), 'assignees': list(assignees),
+            'history': history}
+
+@unittest.skipIf(analytics.np is None, "NumPy is not installed")
+class TestFlowMetrics(unittest.TestCase):
+
+    def setUp(self):
+        monday = datetime(2024, 1, 1, 9)
+        self.projects = [
+            {'id': 'p1', 'title': 'One', 'tasks': [
+                task('a', monday, [(1, 'TODO', 'DOING'), (3, 'DOING', 'DONE')], ['bob']),
+                task('b', monday, [(2, 'BACKLOG', 'DOING'), (9, 'DOING', 'DONE'), (10, 'DONE', 'DOING'),
+                                   (12, 'DOING', 'DONE')], ['bob', 'carol']),
+                task('c', monday + timedelta(days=7), [(1, 'TODO', 'DOING')]),
+            ]},
+            {'id': 'p2', 'title': 'Two', 'tasks': [task('d', monday, [(4, 'TODO', 'DONE')])]},
+        ]
+        self.data = analytics.extract(self.projects)
+
+    def test_1_cycle_and_lead_time(self):
+        cycle = dict((row[0], row[1:]) for row in analytics.time_percentiles(self.data, 'cycle_time'))
+        self.assertEqual(cycle['One'][0], 2, "Test 1: Unfinished task counted")
+        self.assertAlmostEqual(cycle['One'][1], 4.5, msg="Test 1: Median cycle time wrong")
+        self.assertNotIn('Two', cycle, "Test 1: Task that skipped DOING has a cycle time")
+        lead = dict((row[0], row[1:]) for row in analytics.time_percentiles(self.data, 'lead_time', by='assignee'))
+        self.assertEqual(lead['carol'], (1, 9.0, 9.0, 9.0), "Test 1: Lead time per assignee wrong")
+        self.assertEqual(lead['bob'][0], 2, "Test 1: Tasks per assignee wrong")
+
+    def test_2_weekly_series_and_csv(self):
+        weeks, done, still_open = analytics.weekly_series(self.data)
+        self.assertEqual([str(week) for week in weeks], ['2024-01-01', '2024-01-08'], "Test 2: Weeks not Monday-based")
+        self.assertEqual(done.tolist(), [2, 1], "Test 2: Throughput wrong")
+        self.assertEqual(still_open.tolist(), [1, 1], "Test 2: Burndown wrong")
+        out = io.StringIO()
+        analytics.write_csv(self.data, out)
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+        self.assertEqual([row['metric'] for row in rows[-4:]], ['throughput', 'burndown'] * 2, "Test 2: Series missing from CSV")
+
+    def test_3_done_before_start(self):
+        monday = datetime(2024, 1, 15, 9)
+        data = analytics.extract([{'id': 'p1', 'title': 'One', 'tasks': [
+            task('a', monday, [(-10, 'DOING', 'DONE')]),
+            task('b', monday, [(1, 'TODO', 'DOING')]),
+        ]}])
+        weeks, done, still_open = analytics.weekly_series(data)
+        self.assertEqual(str(weeks[0]), '2024-01-01', "Test 3: Series does not start at the earliest done week")
+        self.assertEqual(done.tolist(), [1, 0, 0], "Test 3: Throughput wrong")
+
+if __name__ == '__main__':
+    unittest.main()
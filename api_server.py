@@ -0,0 +1,396 @@
+import argparse
+import asyncio
+import json
+import re
+import uuid
+from datetime import datetime
+from http import HTTPStatus
+from urllib.parse import urlsplit, parse_qs, unquote
+
+import sessions
+from main import Project, Task, Priority, Status, identity_store, log_message
+from passwords import verify_password
+from repository import ProjectRepository
+
+# Local JSON API
+#
+# A small HTTP/1.1 server on asyncio streams, stdlib only. Every connection is
+# kept alive until the client closes it or goes idle, and all requests share a
+# single ProjectRepository, so projects.json is parsed once at startup.
+# Before each authenticated request the repository picks up the projects
+# that menu sessions, the CLI or bulk jobs saved meanwhile, and its saves
+# only replace the projects this server changed.
+#
+# Authenticate with POST /login, then send "Authorization: Bearer <token>".
+
+MAX_BODY = 1024 * 1024
+MAX_HEADERS = 100
+PUBLIC_PATHS = {'/login'}
+IDLE_TIMEOUT = 30
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _require(body, *fields):
+    missing = [field for field in fields if field not in body]
+    if missing:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"Missing field(s): {', '.join(missing)}")
+    return [body[field] for field in fields]
+
+
+def _enum(enum, value):
+    try:
+        return enum[str(value).upper()]
+    except KeyError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"Invalid {enum.__name__.lower()}: {value}")
+
+
+def _datetime(value):
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"Invalid datetime: {value}")
+
+
+class APIServer:
+    def __init__(self, repository):
+        self.repository = repository
+        self.write_lock = asyncio.Lock()
+        self.routes = []
+        for method, pattern, handler in [
+            ('POST', r'/login', self.login),
+            ('GET', r'/projects', self.list_projects),
+            ('POST', r'/projects', self.create_project),
+            ('GET', r'/projects/(?P<pid>[^/]+)', self.get_project),
+            ('DELETE', r'/projects/(?P<pid>[^/]+)', self.delete_project),
+            ('POST', r'/projects/(?P<pid>[^/]+)/members', self.add_member),
+            ('DELETE', r'/projects/(?P<pid>[^/]+)/members/(?P<username>[^/]+)', self.remove_member),
+            ('GET', r'/projects/(?P<pid>[^/]+)/tasks', self.list_tasks),
+            ('POST', r'/projects/(?P<pid>[^/]+)/tasks', self.create_task),
+            ('GET', r'/projects/(?P<pid>[^/]+)/tasks/(?P<tid>[^/]+)', self.get_task),
+            ('PATCH', r'/projects/(?P<pid>[^/]+)/tasks/(?P<tid>[^/]+)', self.update_task),
+            ('DELETE', r'/projects/(?P<pid>[^/]+)/tasks/(?P<tid>[^/]+)', self.delete_task),
+            ('POST', r'/projects/(?P<pid>[^/]+)/tasks/(?P<tid>[^/]+)/assignees', self.assign_user),
+            ('DELETE', r'/projects/(?P<pid>[^/]+)/tasks/(?P<tid>[^/]+)/assignees/(?P<username>[^/]+)', self.unassign_user),
+            ('POST', r'/projects/(?P<pid>[^/]+)/tasks/(?P<tid>[^/]+)/comments', self.add_comment),
+            ('POST', r'/users/(?P<username>[^/]+)/(?P<action>activate|deactivate)', self.set_user_active),
+        ]:
+            self.routes.append((method, re.compile(pattern + '$'), handler))
+
+    # Connection handling
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line:
+                    break
+                keep_alive = await self.handle_request(request_line, reader, writer)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle_request(self, request_line, reader, writer):
+        try:
+            method, target, version = request_line.decode('latin-1').split()
+        except ValueError:
+            self.respond(writer, HTTPStatus.BAD_REQUEST, {'error': 'Malformed request line'}, False)
+            return False
+
+        headers = {}
+        for count in range(MAX_HEADERS + 1):
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            if count == MAX_HEADERS:
+                self.respond(writer, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, {'error': 'Too many headers'}, False)
+                return False
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+
+        try:
+            length = int(headers.get('content-length', 0))
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            self.respond(writer, HTTPStatus.BAD_REQUEST, {'error': 'Invalid Content-Length'}, False)
+            return False
+        if length > MAX_BODY:
+            self.respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {'error': 'Request body too large'}, False)
+            return False
+        raw_body = await reader.readexactly(length) if length else b''
+
+        try:
+            body = json.loads(raw_body) if raw_body else {}
+            if not isinstance(body, dict):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "Request body must be a JSON object")
+            url = urlsplit(target)
+            status, payload = await self.dispatch(method, unquote(url.path), parse_qs(url.query), headers, body)
+        except HTTPError as e:
+            status, payload = e.status, {'error': e.message}
+        except json.JSONDecodeError:
+            status, payload = HTTPStatus.BAD_REQUEST, {'error': 'Invalid JSON body'}
+        except Exception as e:
+            log_message(f"API error on {method} {target}: {e}")
+            status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(e)}
+
+        self.respond(writer, status, payload, keep_alive)
+        return keep_alive
+
+    def respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode()
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + body)
+
+    async def dispatch(self, method, path, query, headers, body):
+        allowed = False
+        for route_method, pattern, handler in self.routes:
+            match = pattern.match(path)
+            if not match:
+                continue
+            if route_method != method:
+                allowed = True
+                continue
+            if path in PUBLIC_PATHS:
+                return await handler(body)
+            user = self.authenticate(headers)
+            # Under the write lock, so no save of ours is half done.
+            async with self.write_lock:
+                self.repository.refresh()
+            return await handler(user, body, query, **match.groupdict())
+        if allowed:
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} not allowed on {path}")
+        raise HTTPError(HTTPStatus.NOT_FOUND, f"No route for {path}")
+
+    # Helpers
+
+    def authenticate(self, headers):
+        scheme, _, token = headers.get('authorization', '').partition(' ')
+        payload = sessions.verify_token(token) if scheme.lower() == 'bearer' else None
+        if payload is None:
+            raise HTTPError(HTTPStatus.UNAUTHORIZED, "Missing or invalid session token")
+        record = identity_store().find(payload['username'])
+        if record is None or not record['active']:
+            raise HTTPError(HTTPStatus.FORBIDDEN, "Account is inactive. Contact admin.")
+        return payload
+
+    def project_for(self, user, pid, leader=False):
+        project = self.repository.get(pid)
+        if project is None or user['username'] not in project.members:
+            raise HTTPError(HTTPStatus.NOT_FOUND, "Project not found!")
+        if leader and project.leader != user['username']:
+            raise HTTPError(HTTPStatus.FORBIDDEN, "Only the project leader can do this")
+        return project
+
+    def task_for(self, project, tid):
+        task = project.get_task(tid)
+        if task is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, "Task not found!")
+        return task
+
+    async def persist(self, *project_ids):
+        # Handlers only mutate projects on the event loop, and to_dict copies
+        # what it shares, so a snapshot taken here holds no live state. The
+        # write (a merge into the current file) runs in a worker thread; the
+        # lock keeps writes in order.
+        self.repository.mark_dirty(*project_ids)
+        snapshot = self.repository.snapshot()
+        async with self.write_lock:
+            await asyncio.to_thread(self.repository.write, snapshot)
+
+    @staticmethod
+    def project_summary(project):
+        return {'id': project.id, 'title': project.title, 'leader': project.leader, 'members': project.members}
+
+    # Handlers
+
+    async def login(self, body):
+        username, password = _require(body, 'username', 'password')
+        user_data = identity_store().find(username)
+        valid = user_data is not None and await asyncio.to_thread(verify_password, password, user_data['password'])
+        if not valid:
+            log_message(f"Failed API login attempt for username: {username}")
+            raise HTTPError(HTTPStatus.UNAUTHORIZED, "Invalid username or password")
+        if not user_data['active']:
+            raise HTTPError(HTTPStatus.FORBIDDEN, "Account is inactive. Contact admin.")
+        token = sessions.issue_token(username, user_data['email'], user_data['role'])
+        log_message(f"User {username} logged in through the API with role: {user_data['role']}")
+        return HTTPStatus.OK, {'token': token, 'role': user_data['role']}
+
+    async def list_projects(self, user, body, query):
+        projects = self.repository.for_member(user['username'])
+        return HTTPStatus.OK, [self.project_summary(project) for project in projects]
+
+    async def create_project(self, user, body, query):
+        title, = _require(body, 'title')
+        project = Project(str(uuid.uuid4()), title, user['username'], [user['username']])
+        self.repository.add(project)
+        project.emit_created(user['username'])
+        await self.persist(project.id)
+        log_message(f"Project {project.id} created by user {user['username']}")
+        return HTTPStatus.CREATED, self.project_summary(project)
+
+    async def get_project(self, user, body, query, pid):
+        return HTTPStatus.OK, self.project_for(user, pid).to_dict()
+
+    async def delete_project(self, user, body, query, pid):
+        project = self.project_for(user, pid, leader=True)
+        self.repository.remove(project.id)
+        project.emit_deleted(user['username'])
+        await self.persist(project.id)
+        log_message(f"Project {project.id} deleted by user {project.leader}")
+        return HTTPStatus.OK, {'deleted': project.id}
+
+    async def add_member(self, user, body, query, pid):
+        project = self.project_for(user, pid, leader=True)
+        username, = _require(body, 'username')
+        if not project.insert_member(username, user['username']):
+            raise HTTPError(HTTPStatus.CONFLICT, "User already a member of the project!")
+        await self.persist(project.id)
+        return HTTPStatus.OK, self.project_summary(project)
+
+    async def remove_member(self, user, body, query, pid, username):
+        project = self.project_for(user, pid, leader=True)
+        if not project.drop_member(username, user['username']):
+            raise HTTPError(HTTPStatus.NOT_FOUND, "User not a member of the project!")
+        await self.persist(project.id)
+        return HTTPStatus.OK, self.project_summary(project)
+
+    async def list_tasks(self, user, body, query, pid):
+        project = self.project_for(user, pid)
+        tasks = project.tasks
+        if 'status' in query:
+            status = _enum(Status, query['status'][0])
+            tasks = [task for task in tasks if task.status == status]
+        return HTTPStatus.OK, [task.to_dict() for task in tasks]
+
+    async def create_task(self, user, body, query, pid):
+        project = self.project_for(user, pid, leader=True)
+        title, = _require(body, 'title')
+        task = Task(
+            title=title,
+            description=body.get('description', ''),
+            priority=_enum(Priority, body.get('priority', 'LOW')),
+            status=_enum(Status, body.get('status', 'BACKLOG'))
+        )
+        project.add_task(task, user['username'])
+        await self.persist(project.id)
+        log_message(f"Task {task.id} created by user {user['username']} in project {project.id}")
+        return HTTPStatus.CREATED, task.to_dict()
+
+    async def get_task(self, user, body, query, pid, tid):
+        return HTTPStatus.OK, self.task_for(self.project_for(user, pid), tid).to_dict()
+
+    async def update_task(self, user, body, query, pid, tid):
+        project = self.project_for(user, pid)
+        task = self.task_for(project, tid)
+        username = user['username']
+        if username != project.leader and username not in task.assignees:
+            raise HTTPError(HTTPStatus.FORBIDDEN, "You are not assigned to this task!")
+
+        # Validate everything before touching the task so a bad field
+        # doesn't leave a half-applied update behind.
+        changes = []
+        if 'title' in body:
+            changes.append((task.rename, body['title']))
+        if 'description' in body:
+            changes.append((task.change_description, body['description']))
+        if 'start_time' in body:
+            changes.append((task.change_start_time, _datetime(body['start_time'])))
+        if 'end_time' in body:
+            changes.append((task.change_end_time, _datetime(body['end_time'])))
+        if 'priority' in body:
+            changes.append((task.change_priority, _enum(Priority, body['priority'])))
+        if 'status' in body:
+            changes.append((task.change_status, _enum(Status, body['status'])))
+        for change, value in changes:
+            change(username, value)
+
+        await self.persist(project.id)
+        return HTTPStatus.OK, task.to_dict()
+
+    async def delete_task(self, user, body, query, pid, tid):
+        project = self.project_for(user, pid, leader=True)
+        self.task_for(project, tid)
+        project.remove_task(tid, user['username'])
+        await self.persist(project.id)
+        return HTTPStatus.OK, {'deleted': tid}
+
+    async def assign_user(self, user, body, query, pid, tid):
+        project = self.project_for(user, pid, leader=True)
+        task = self.task_for(project, tid)
+        username, = _require(body, 'username')
+        task.assign_user(user['username'], username)
+        await self.persist(project.id)
+        return HTTPStatus.OK, task.to_dict()
+
+    async def unassign_user(self, user, body, query, pid, tid, username):
+        project = self.project_for(user, pid, leader=True)
+        task = self.task_for(project, tid)
+        task.unassign_user(user['username'], username)
+        await self.persist(project.id)
+        return HTTPStatus.OK, task.to_dict()
+
+    async def add_comment(self, user, body, query, pid, tid):
+        project = self.project_for(user, pid)
+        task = self.task_for(project, tid)
+        content, = _require(body, 'content')
+        task.add_comment(user['username'], content)
+        await self.persist(project.id)
+        return HTTPStatus.CREATED, task.comments[-1].to_dict()
+
+    async def set_user_active(self, user, body, query, username, action):
+        if user['role'] != 'admin':
+            raise HTTPError(HTTPStatus.FORBIDDEN, "Admin role required")
+        record = identity_store().find(username)
+        if record is None or record['role'] == 'admin':
+            raise HTTPError(HTTPStatus.NOT_FOUND, "User not found!")
+        active = action == 'activate'
+        self.repository.update_user(username, active=active)
+        if not active:
+            sessions.revoke(username)
+        log_message(f"User {username} {action}d by admin")
+        return HTTPStatus.OK, {'username': username, 'active': active}
+
+
+async def serve(host, port, repository=None):
+    api = APIServer(repository or ProjectRepository().load())
+    server = await asyncio.start_server(api.handle_connection, host, port)
+    log_message(f"API server listening on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve projects and tasks over a local JSON API.")
+    parser.add_argument('--host', default='127.0.0.1', help='Address to bind')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on')
+    args = parser.parse_args()
+    print(f"Serving on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
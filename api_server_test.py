@@ -0,0 +1,123 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+import passwords
+from api_server import APIServer
+from main import Project, Status, User, identity_store, load_data, PROJECTS_FILE
+from repository import ProjectRepository
+
+class TestAPIServer(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.old_cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        passwords._config = None
+        passwords.save_config('scrypt', {'n': 2 ** 8, 'r': 8, 'p': 1})
+        identity_store().add(User('leader', 'leader@example.com', 'password').to_dict())
+        identity_store().add(User('member', 'member@example.com', 'password').to_dict())
+        self.repository = ProjectRepository().load()
+        self.server = await asyncio.start_server(APIServer(self.repository).handle_connection, '127.0.0.1', 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+        passwords._config = None
+        os.chdir(self.old_cwd)
+        self.tmp.cleanup()
+
+    async def request(self, conn, method, path, body=None, token=None):
+        reader, writer = conn
+        data = json.dumps(body).encode() if body is not None else b''
+        headers = f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(data)}\r\n"
+        if token:
+            headers += f"Authorization: Bearer {token}\r\n"
+        writer.write(headers.encode() + b"\r\n" + data)
+        return await self.response(conn)
+
+    async def response(self, conn):
+        reader, writer = conn
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line == b'\r\n':
+                break
+            name, _, value = line.decode().partition(':')
+            if name.lower() == 'content-length':
+                length = int(value)
+        return status, json.loads(await reader.readexactly(length))
+
+    async def test_1_project_and_task_flow_on_one_connection(self):
+        conn = await asyncio.open_connection('127.0.0.1', self.port)
+        status, body = await self.request(conn, 'POST', '/login', {'username': 'leader', 'password': 'password'})
+        self.assertEqual(status, 200, "Test 1: Login failed")
+        token = body['token']
+
+        status, project = await self.request(conn, 'POST', '/projects', {'title': 'API Project'}, token)
+        self.assertEqual(status, 201, "Test 1: Project not created")
+        pid = project['id']
+        await self.request(conn, 'POST', f'/projects/{pid}/members', {'username': 'member'}, token)
+        status, task = await self.request(conn, 'POST', f'/projects/{pid}/tasks', {'title': 'T1', 'priority': 'high'}, token)
+        self.assertEqual(task['priority'], 'HIGH', "Test 1: Task priority not parsed")
+        status, task = await self.request(conn, 'PATCH', f'/projects/{pid}/tasks/{task["id"]}', {'status': 'DOING'}, token)
+        self.assertEqual(task['status'], 'DOING', "Test 1: Task status not updated")
+        self.assertEqual(len(task['history']), 1, "Test 1: Status change not recorded in history")
+        conn[1].close()
+
+        saved = ProjectRepository().load().get(pid)
+        self.assertEqual(saved.members, ['leader', 'member'], "Test 1: Members not persisted")
+        self.assertEqual(saved.tasks[0].status.value, 'DOING', "Test 1: Task update not persisted")
+
+    async def test_2_requires_token_and_leader(self):
+        conn = await asyncio.open_connection('127.0.0.1', self.port)
+        status, _ = await self.request(conn, 'GET', '/projects')
+        self.assertEqual(status, 401, "Test 2: Request without token accepted")
+        _, leader = await self.request(conn, 'POST', '/login', {'username': 'leader', 'password': 'password'})
+        _, member = await self.request(conn, 'POST', '/login', {'username': 'member', 'password': 'password'})
+        _, project = await self.request(conn, 'POST', '/projects', {'title': 'P'}, leader['token'])
+        await self.request(conn, 'POST', f"/projects/{project['id']}/members", {'username': 'member'}, leader['token'])
+        status, _ = await self.request(conn, 'DELETE', f"/projects/{project['id']}", token=member['token'])
+        self.assertEqual(status, 403, "Test 2: Member allowed to delete project")
+        status, _ = await self.request(conn, 'POST', '/users/member/deactivate', token=leader['token'])
+        self.assertEqual(status, 403, "Test 2: Non-admin allowed to deactivate users")
+        conn[1].close()
+
+    async def test_3_malformed_headers_rejected(self):
+        for head, expected in [("Content-Length: abc\r\n", 400), ("Content-Length: -1\r\n", 400),
+                               ("X-Filler: x\r\n" * 101, 431)]:
+            conn = await asyncio.open_connection('127.0.0.1', self.port)
+            conn[1].write(f"POST /login HTTP/1.1\r\nHost: localhost\r\n{head}\r\n".encode())
+            status, _ = await self.response(conn)
+            self.assertEqual(status, expected, f"Test 3: Wrong status for {head[:20]!r}")
+            self.assertEqual(await conn[0].read(), b'', "Test 3: Connection left open")
+            conn[1].close()
+
+    async def test_4_picks_up_and_keeps_other_sessions_changes(self):
+        conn = await asyncio.open_connection('127.0.0.1', self.port)
+        _, leader = await self.request(conn, 'POST', '/login', {'username': 'leader', 'password': 'password'})
+        _, project = await self.request(conn, 'POST', '/projects', {'title': 'P'}, leader['token'])
+        pid = project['id']
+        _, task = await self.request(conn, 'POST', f'/projects/{pid}/tasks', {'title': 'T1'}, leader['token'])
+
+        other = Project.from_dict(load_data(PROJECTS_FILE)[0])
+        other.title = 'Renamed'
+        other.get_task(task['id']).status = Status.DONE
+        other._update_project()
+
+        status, seen = await self.request(conn, 'GET', f'/projects/{pid}', token=leader['token'])
+        self.assertEqual(seen['title'], 'Renamed', "Test 4: Other session's change not picked up")
+        await self.request(conn, 'POST', f'/projects/{pid}/members', {'username': 'member'}, leader['token'])
+        conn[1].close()
+
+        saved = ProjectRepository().load().get(pid)
+        self.assertEqual(saved.tasks[0].status, Status.DONE, "Test 4: Other session's change overwritten")
+        self.assertEqual(saved.members, ['leader', 'member'], "Test 4: Own change not saved")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analytics
+from datagen import USERS
+
+# Flow metrics benchmark
+#
+#   python benchmarks/analytics.py --tasks 1000000
+#
+# Generates project records whose tasks walk TODO -> DOING -> DONE (as typed
+# history events), then times extracting the transitions and computing every
+# metric.
+
+
+def projects(tasks, per_project=10000):
+    base = datetime(2024, 1, 1)
+    for p in range(0, tasks, per_project):
+        records = []
+        for i in range(p, min(p + per_project, tasks)):
+            start = base + timedelta(hours=i % 5000)
+            moves = [('TODO', 'DOING', 1 + i % 3), ('DOING', 'DONE', 3 + i % 11)]
+            records.append({
+                'id': str(i), 'title': f'Task {i}', 'start_time': start.isoformat(),
+                'assignees': [USERS[i % len(USERS)]],
+                'history': [{'kind': 'update', 'field': 'status', 'old': old, 'new': new, 'actor': 'alice',
+                             'ts': (start + timedelta(days=day)).timestamp()} for old, new, day in moves]
+            })
+        yield {'id': f'p{p}', 'title': f'Project {p // per_project}', 'tasks': records}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time flow metrics over generated task histories.")
+    parser.add_argument('--tasks', type=int, default=1000000, help='Number of tasks')
+    args = parser.parse_args(argv)
+
+    records = list(projects(args.tasks))
+    start = time.perf_counter()
+    data = analytics.extract(records)
+    extracted = time.perf_counter() - start
+    for metric in ('cycle_time', 'lead_time'):
+        for by in ('project', 'assignee'):
+            analytics.time_percentiles(data, metric, by)
+    analytics.weekly_series(data)
+    total = time.perf_counter() - start
+    print(f"{args.tasks} tasks: extract {extracted:.2f} s, metrics {total - extracted:.2f} s, total {total:.2f} s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from columnar import TaskColumns
+from datagen import USERS, task_record
+from main import Project
+
+# Columnar scan benchmark
+#
+#   python benchmarks/columnar.py --projects 100 --tasks 1000
+#
+# Counts tasks by status per leader two ways: walking Project.tasks of the
+# loaded objects, and scanning the arrays of a TaskColumns table.
+
+
+def walk(projects):
+    result = {}
+    for project in projects:
+        counts = result.setdefault(project.leader, Counter())
+        for task in project.tasks:
+            counts[task.status] += 1
+    return result
+
+
+def best_of(runs, fn):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare object walks with columnar scans.")
+    parser.add_argument('--projects', type=int, default=100, help='Number of projects')
+    parser.add_argument('--tasks', type=int, default=1000, help='Tasks per project')
+    parser.add_argument('--runs', type=int, default=5, help='Number of runs')
+    args = parser.parse_args(argv)
+
+    records = [{'id': f'p{p}', 'title': f'Project {p}', 'leader': USERS[p % len(USERS)], 'members': USERS,
+                'tasks': [task_record(p * args.tasks + i) for i in range(args.tasks)]} for p in range(args.projects)]
+    with tempfile.TemporaryDirectory() as tmp:
+        file = os.path.join(tmp, 'projects.json')
+        with open(file, 'w') as f:
+            json.dump(records, f)
+        start = time.perf_counter()
+        columns = TaskColumns(file).build()
+        build = time.perf_counter() - start
+    projects = [Project.from_dict(record) for record in records]
+    walk(projects)
+
+    total = args.projects * args.tasks
+    print(f"{total} tasks, columnar build {build * 1000:.0f} ms")
+    print(f"object walk   {best_of(args.runs, lambda: walk(projects)) * 1000:8.1f} ms")
+    print(f"columnar scan {best_of(args.runs, columns.count_by_status_per_leader) * 1000:8.1f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
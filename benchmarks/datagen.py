@@ -0,0 +1,156 @@
+import argparse
+import json
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import Priority, Status
+
+# Synthetic datasets
+#
+#   python benchmarks/datagen.py --users 200 --projects 50 --tasks 400 --out data/
+#
+# Writes users.json and projects.json in the layout the app reads. Sizes
+# follow what real boards look like rather than being uniform:
+#
+#   - project membership: a few users are in most projects, most in a few;
+#   - history and comments per task: heavy-tailed (Pareto), so most tasks
+#     have a handful of entries and a few have hundreds;
+#   - description and comment lengths: log-normal.
+#
+# Generation is seeded, so a given set of arguments always produces the same
+# dataset. task_record() and project_record() build simpler, uniform records
+# for the benchmarks that scale a single project.
+
+USERS = ['alice', 'bob', 'carol', 'dave', 'erin', 'frank', 'grace', 'heidi']
+PASSWORD = 'password'
+START = datetime(2024, 1, 1)
+WORDS = ('fix', 'update', 'review', 'deploy', 'design', 'page', 'api', 'test', 'login', 'report', 'board',
+         'cache', 'export', 'import', 'mobile', 'search', 'index', 'release', 'docs', 'build')
+
+
+def task_record(index, history=4, comments=2):
+    start = START + timedelta(minutes=index)
+    user = USERS[index % len(USERS)]
+    other = USERS[(index + 3) % len(USERS)]
+    return {
+        'id': f'{index:08x}-0000-4000-8000-000000000000',
+        'title': f'Task {index}',
+        'description': f'Description of task {index}',
+        'start_time': start.isoformat(),
+        'end_time': (start + timedelta(days=2)).isoformat(),
+        'assignees': [user, other],
+        'priority': list(Priority)[index % 4].value,
+        'status': list(Status)[index % 5].value,
+        'history': [{'kind': 'update', 'field': 'status', 'old': 'TODO', 'new': 'DOING', 'actor': user,
+                     'ts': (start + timedelta(hours=n)).timestamp()} for n in range(history)],
+        'comments': [{'username': other, 'content': f'Comment {n}',
+                      'timestamp': (start + timedelta(hours=n)).isoformat()} for n in range(comments)]
+    }
+
+
+def project_record(tasks):
+    return {'id': 'bench', 'title': 'Benchmark', 'leader': USERS[0], 'members': list(USERS),
+            'tasks': [task_record(i) for i in range(tasks)]}
+
+
+class Generator:
+    """Builds a seeded dataset of users and projects with skewed sizes."""
+
+    def __init__(self, users, seed=0, max_entries=500):
+        self.rng = random.Random(seed)
+        self.usernames = [f'user{i:05d}' for i in range(users)]
+        self.max_entries = max_entries
+
+    def _heavy_tail(self, alpha=1.5):
+        return min(int(self.rng.paretovariate(alpha)) - 1, self.max_entries)
+
+    def _text(self, median_words):
+        words = max(1, int(self.rng.lognormvariate(0, 0.8) * median_words))
+        return ' '.join(self.rng.choice(WORDS) for _ in range(words))
+
+    def _user(self):
+        # Squaring a uniform variate favours the first users: a few are in
+        # most projects and on most tasks.
+        return self.usernames[int(self.rng.random() ** 2 * len(self.usernames))]
+
+    def users(self, password_hash):
+        return [{'username': name, 'email': f'{name}@example.com', 'password': password_hash,
+                 'role': 'user', 'active': True} for name in self.usernames]
+
+    def task(self, members, index):
+        rng = self.rng
+        start = START + timedelta(hours=rng.randrange(24 * 365))
+        ts = start.timestamp()
+        statuses = list(Status)
+        status = rng.choice(statuses)
+        history, comments = [], []
+        for _ in range(self._heavy_tail()):
+            ts += rng.expovariate(1 / 7200)
+            old, new = rng.sample(statuses, 2)
+            history.append({'kind': 'update', 'field': 'status', 'old': old.value, 'new': new.value,
+                            'actor': rng.choice(members), 'ts': ts})
+        for _ in range(self._heavy_tail(1.8)):
+            ts += rng.expovariate(1 / 7200)
+            comments.append({'username': rng.choice(members), 'content': self._text(12),
+                             'timestamp': datetime.fromtimestamp(ts).isoformat()})
+        return {
+            'id': f'{index:08x}-{rng.getrandbits(16):04x}-4000-8000-{rng.getrandbits(48):012x}',
+            'title': self._text(4).capitalize(),
+            'description': self._text(25),
+            'start_time': start.isoformat(),
+            'end_time': (start + timedelta(days=rng.randint(1, 60))).isoformat(),
+            'assignees': rng.sample(members, min(len(members), rng.randint(0, 3))),
+            'priority': rng.choice(list(Priority)).value,
+            'status': status.value,
+            'history': history,
+            'comments': comments,
+        }
+
+    def project(self, index, tasks):
+        members = sorted({self._user() for _ in range(self.rng.randint(2, 20))})
+        return {
+            'id': f'project-{index:05d}',
+            'title': self._text(3).title(),
+            'leader': members[0],
+            'members': members,
+            'tasks': [self.task(members, index * tasks + i) for i in range(tasks)],
+        }
+
+    def projects(self, count, tasks):
+        return [self.project(index, tasks) for index in range(count)]
+
+
+def generate(users, projects, tasks, password_hash, seed=0):
+    """Return (user records, project records) for the given scale."""
+    generator = Generator(users, seed)
+    return generator.users(password_hash), generator.projects(projects, tasks)
+
+
+def write(directory, users, projects):
+    os.makedirs(directory, exist_ok=True)
+    for name, records in (('users.json', users), ('projects.json', projects)):
+        with open(os.path.join(directory, name), 'w') as f:
+            json.dump(records, f, indent=4)
+
+
+def main(argv=None):
+    from passwords import hash_password
+    parser = argparse.ArgumentParser(description="Generate a synthetic users.json and projects.json.")
+    parser.add_argument('--users', type=int, default=200, help='Number of users')
+    parser.add_argument('--projects', type=int, default=50, help='Number of projects')
+    parser.add_argument('--tasks', type=int, default=400, help='Tasks per project')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--out', default='.', help='Output directory')
+    args = parser.parse_args(argv)
+    users, projects = generate(args.users, args.projects, args.tasks, hash_password(PASSWORD), args.seed)
+    write(args.out, users, projects)
+    print(f"{len(users)} users, {len(projects)} projects, {len(projects) * args.tasks} tasks written to {args.out}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,58 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datagen import project_record
+from main import Project
+
+# Load benchmark
+#
+#   python benchmarks/load.py --tasks 100000 --runs 5
+#
+# Times Project.from_dict on a large project record, the cost every menu,
+# the CLI and the API server pay to load projects.json, at three depths:
+#
+#   load      Project.from_dict alone (what listing projects needs)
+#   tasks     building the Task objects (the board: titles and statuses)
+#   decoded   reading every field of every task (dates, history, comments)
+
+STAGES = ['load', 'tasks', 'decoded']
+
+
+def _decode(task):
+    return task.start_time, task.end_time, task.history, task.comments
+
+
+def measure(tasks, runs):
+    """Return {stage: per-run times in seconds}, each stage including the previous ones."""
+    data = json.loads(json.dumps(project_record(tasks)))
+    times = {stage: [] for stage in STAGES}
+    for _ in range(runs):
+        start = time.perf_counter()
+        project = Project.from_dict(data)
+        times['load'].append(time.perf_counter() - start)
+        project.tasks
+        times['tasks'].append(time.perf_counter() - start)
+        for task in project.tasks:
+            _decode(task)
+        times['decoded'].append(time.perf_counter() - start)
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time Project.from_dict on a large project.")
+    parser.add_argument('--tasks', type=int, default=100000, help='Number of tasks')
+    parser.add_argument('--runs', type=int, default=5, help='Number of runs')
+    args = parser.parse_args(argv)
+    for stage, times in measure(args.tasks, args.runs).items():
+        best = min(times)
+        print(f"{args.tasks} tasks, {stage:<8} best {best * 1000:7.1f} ms, {best / args.tasks * 1e6:.2f} us per task")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
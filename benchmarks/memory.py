@@ -0,0 +1,57 @@
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datagen import project_record
+from main import Project
+
+# In-memory footprint benchmark
+#
+#   python benchmarks/memory.py --tasks 100000
+#
+# Builds a project the way it is stored in projects.json (a handful of users
+# shared across assignees, history and comments), loads it from JSON text and
+# measures with tracemalloc how many bytes the in-memory model keeps per task.
+
+
+def measure(tasks, decode=True):
+    """Return bytes per task kept alive after loading a project from JSON text.
+
+    The parsed records are dropped once the model is built, so whatever the
+    model still references of them (lists, dicts, strings) is counted. With
+    decode, every field of every task is read first; otherwise only the
+    Task objects are built and the rest stays in the raw records.
+    """
+    text = json.dumps(project_record(tasks))
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    data = json.loads(text)
+    project = Project.from_dict(data)
+    for task in project.tasks:
+        if decode:
+            task.start_time, task.end_time, task.history, task.comments
+    del data
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(project.tasks) == tasks
+    return (after - before) / tasks
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure bytes per task of the in-memory model.")
+    parser.add_argument('--tasks', type=int, default=100000, help='Number of tasks')
+    parser.add_argument('--lazy', action='store_true', help='Leave dates, history and comments undecoded')
+    args = parser.parse_args(argv)
+    print(f"{args.tasks} tasks: {measure(args.tasks, not args.lazy):,.0f} bytes per task")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Cold-start benchmark
+#
+#   python benchmarks/startup.py
+#   python benchmarks/startup.py --runs 20 --budget-ms 80
+#
+# Measures, in fresh interpreters:
+#   - import: wall clock of `import main` and `import manager`, with the
+#     slowest modules from `python -X importtime`;
+#   - first prompt: from launching `python main.py` until the first
+#     "Enter choice:" prompt is printed;
+#   - scripted: a full `python manager.py --help` run.
+# Exits non-zero when the median of any measurement is over its budget, so
+# it can run in CI to catch an eager heavy import creeping back in.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGETS_MS = {
+    'import main': 60,
+    'import manager': 70,
+    'first prompt': 250,
+    'manager --help': 120,
+}
+
+
+def _env():
+    env = dict(os.environ)
+    # Time normal starts, which load modules from cached bytecode.
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    env['PYTHONPATH'] = ROOT
+    return env
+
+
+def time_command(argv, cwd):
+    start = time.perf_counter()
+    subprocess.run(argv, cwd=cwd, env=_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def time_first_prompt(cwd):
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, 'main.py')], cwd=cwd, env=_env(),
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    output = b''
+    while b'Enter choice:' not in output:
+        data = os.read(process.stdout.fileno(), 4096)
+        if not data:
+            break
+        output += data
+    elapsed = (time.perf_counter() - start) * 1000
+    process.kill()
+    process.wait()
+    return elapsed
+
+
+def import_breakdown(module, top=10):
+    """Return the `top` slowest imports of `module` as (cumulative_us, name)."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, env=_env(), capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        rows.append((int(cumulative), name.rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def run(runs):
+    with tempfile.TemporaryDirectory() as cwd:
+        measurements = {
+            'import main': lambda: time_command([sys.executable, '-c', 'import main'], cwd),
+            'import manager': lambda: time_command([sys.executable, '-c', 'import manager'], cwd),
+            'first prompt': lambda: time_first_prompt(cwd),
+            'manager --help': lambda: time_command([sys.executable, os.path.join(ROOT, 'manager.py'), '--help'], cwd),
+        }
+        for measure in measurements.values():
+            measure()  # warm the bytecode cache
+        return {name: [measure() for _ in range(runs)] for name, measure in measurements.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure interpreter start-up and import cost.")
+    parser.add_argument('--runs', type=int, default=10, help='Runs per measurement')
+    parser.add_argument('--budget-ms', type=float, help='Override every budget with one value')
+    parser.add_argument('--top', type=int, default=10, help='Slowest imports to list')
+    args = parser.parse_args(argv)
+
+    results = run(args.runs)
+    over = []
+    print(f"{'measurement':<16} {'median':>9} {'min':>9} {'budget':>9}")
+    for name, samples in results.items():
+        median = statistics.median(samples)
+        budget = args.budget_ms or BUDGETS_MS[name]
+        flag = '' if median <= budget else '  OVER'
+        if flag:
+            over.append(name)
+        print(f"{name:<16} {median:>7.1f}ms {min(samples):>7.1f}ms {budget:>7.0f}ms{flag}")
+
+    print("\nSlowest imports under main (cumulative):")
+    for cumulative, name in import_breakdown('main', args.top):
+        print(f"{cumulative / 1000:>8.1f}ms {name}")
+    return 1 if over else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,187 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime
+from itertools import cycle
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datagen import PASSWORD, generate, write
+from main import PROJECTS_FILE, Project, Status, User, board_table, load_data, print_cached, save_data
+from passwords import hash_password
+
+# End-to-end benchmark suite
+#
+#   python benchmarks/suite.py --scales small,medium --out results.json
+#   python benchmarks/suite.py --out new.json --compare results.json
+#
+# For each scale, generates a dataset with datagen.py in a scratch directory
+# and times the operations a session goes through, as the menus run them:
+#
+#   load_data              parse projects.json
+#   save_data              write projects.json
+#   Project.from_dict      build every project and its Task objects
+#   User.login             the login prompt, including password verification
+#   Project.list_projects  load and list the user's projects
+#   _update_project        change one task's status and save its project
+#   task_table             render the task board of the user's largest project
+#
+# Results are written as JSON (per operation: min, median and p95 in ms).
+# With --compare, medians are checked against an earlier results file and the
+# run fails if any operation got slower by more than --threshold.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCALES = {
+    # users, projects, tasks per project
+    'small': (50, 10, 100),
+    'medium': (500, 50, 400),
+    'large': (2000, 100, 1000),
+}
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        'runs': len(ordered),
+        'min_ms': ordered[0] * 1000,
+        'median_ms': ordered[len(ordered) // 2] * 1000,
+        'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+    }
+
+
+def time_runs(fn, runs, setup=None):
+    samples = []
+    for _ in range(runs):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+@contextmanager
+def quiet(answers):
+    """Silence console output and answer input() prompts with the given function."""
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull), \
+            patch('builtins.input', side_effect=answers), patch('main.getpass', return_value=PASSWORD):
+        yield
+
+
+def run_scale(name, runs, seed):
+    users, projects, tasks = SCALES[name]
+    user_records, project_records = generate(users, projects, tasks, hash_password(PASSWORD), seed)
+    results = {}
+    old_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        write(tmp, user_records, project_records)
+        os.chdir(tmp)
+        try:
+            size = os.path.getsize(PROJECTS_FILE)
+            username = user_records[0]['username']
+            user = User.from_dict(user_records[0])
+            records = load_data(PROJECTS_FILE)
+
+            results['load_data'] = time_runs(lambda: load_data(PROJECTS_FILE), runs)
+            results['save_data'] = time_runs(lambda: save_data(records, PROJECTS_FILE), runs)
+            results['Project.from_dict'] = time_runs(
+                lambda: [Project.from_dict(record).tasks for record in records], runs)
+            with quiet(lambda prompt: username):
+                results['User.login'] = time_runs(User.login, runs)
+            with quiet(lambda prompt: ''):
+                results['Project.list_projects'] = time_runs(lambda: Project.list_projects(user), runs)
+
+            mine = [record for record in records if username in record['members']]
+            project = Project.from_dict(max(mine, key=lambda record: len(record['tasks'])))
+            statuses = cycle(Status)
+
+            def update():
+                project.tasks[0].change_status(username, next(statuses))
+                project._update_project()
+
+            with quiet(lambda prompt: ''):
+                results['_update_project'] = time_runs(update, runs)
+                results['task_table'] = time_runs(lambda: print_cached(project, 'board', board_table),
+                                                  runs, setup=project.touch)
+        finally:
+            os.chdir(old_cwd)
+    return {'scale': {'users': users, 'projects': projects, 'tasks_per_project': tasks, 'projects_json_bytes': size},
+            'operations': results}
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Print median changes against a baseline; return the (scale, operation) pairs that regressed."""
+    regressions = []
+    print(f"{'scale':<8} {'operation':<22} {'before':>10} {'after':>10} {'change':>8}")
+    for scale, current in results['results'].items():
+        previous = baseline['results'].get(scale)
+        if previous is None:
+            continue
+        for operation, stats in current['operations'].items():
+            before = previous['operations'].get(operation)
+            if before is None:
+                continue
+            ratio = stats['median_ms'] / before['median_ms'] if before['median_ms'] else 1.0
+            flag = ''
+            if ratio > 1 + threshold:
+                flag = '  SLOWER'
+                regressions.append((scale, operation))
+            print(f"{scale:<8} {operation:<22} {before['median_ms']:>8.1f}ms {stats['median_ms']:>8.1f}ms "
+                  f"{(ratio - 1) * 100:>+7.0f}%{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time end-to-end operations on generated datasets.")
+    parser.add_argument('--scales', default='small,medium', help=f"Comma-separated, from {', '.join(SCALES)}")
+    parser.add_argument('--runs', type=int, default=5, help='Runs per operation')
+    parser.add_argument('--seed', type=int, default=0, help='Dataset seed')
+    parser.add_argument('--out', help='Write the results to this JSON file')
+    parser.add_argument('--compare', help='Earlier results file to compare medians against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed slowdown before failing (0.2 = 20%%)')
+    args = parser.parse_args(argv)
+
+    scales = [scale.strip() for scale in args.scales.split(',') if scale.strip()]
+    unknown = [scale for scale in scales if scale not in SCALES]
+    if unknown:
+        parser.error(f"unknown scale(s): {', '.join(unknown)}")
+
+    results = {
+        'meta': {'time': datetime.now().isoformat(), 'commit': _commit(), 'python': platform.python_version(),
+                 'platform': platform.platform(), 'runs': args.runs, 'seed': args.seed},
+        'results': {},
+    }
+    for scale in scales:
+        results['results'][scale] = run_scale(scale, args.runs, args.seed)
+        print(f"{scale}:")
+        for operation, stats in results['results'][scale]['operations'].items():
+            print(f"  {operation:<22} median {stats['median_ms']:>9.1f} ms  p95 {stats['p95_ms']:>9.1f} ms")
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=4)
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
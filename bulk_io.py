@@ -0,0 +1,415 @@
+import csv
+import json
+import os
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from itertools import islice
+
+import changefeed
+import main
+from main import HistoryEntry, Priority, Status, load_data, log_message, projects_locked
+
+# Bulk import
+#
+# Rows are streamed from the input file in chunks and validated into task
+# records by a process pool, with only a bounded number of chunks in flight.
+# Each validated chunk is committed with a single append to a per-project
+# journal next to projects.json. Once the input is exhausted, the journal is
+# merged into projects.json in one streaming rewrite, so the cost of the
+# import stays linear in the number of rows instead of rewriting the whole
+# file for every chunk.
+
+TASKS_PLACEHOLDER = '\x00tasks\x00'
+
+
+def detect_format(path):
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+
+def read_rows(path, fmt):
+    """Yield (line_number, row) pairs without reading the whole file."""
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        if fmt == 'csv':
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_number, line in enumerate(f, start=1):
+                if line.strip():
+                    yield line_number, line
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _parse_text(row, field):
+    value = row.get(field) or ''
+    if not isinstance(value, str):
+        raise ValueError(f"Task {field} must be a string")
+    return value
+
+
+def local_time(moment):
+    """Return a datetime as the naive local time task times are kept in."""
+    if moment is None or moment.tzinfo is None:
+        return moment
+    return moment.astimezone().replace(tzinfo=None)
+
+
+def _parse_datetime(row, field, default):
+    value = row.get(field)
+    if not value:
+        return default
+    if not isinstance(value, str):
+        raise ValueError(f"Task {field} must be an ISO date string")
+    return local_time(datetime.fromisoformat(value))
+
+
+def _parse_enum(enum, value, default):
+    name = (value or default).strip().upper()
+    if name not in enum.__members__:
+        raise ValueError(f"Invalid {enum.__name__.lower()}: {value}")
+    return enum[name].value
+
+
+def _parse_assignees(value):
+    if not value:
+        return []
+    if isinstance(value, list):
+        if not all(isinstance(name, str) for name in value):
+            raise ValueError("Task assignees must be a list of strings")
+        return list(value)
+    if not isinstance(value, str):
+        raise ValueError("Task assignees must be a list of strings")
+    return [name.strip() for name in value.split(';') if name.strip()]
+
+
+def build_task(row):
+    """Validate one input row and return it as a Task.to_dict() record."""
+    if isinstance(row, str):
+        row = json.loads(row)
+    title = _parse_text(row, 'title').strip()
+    if not title:
+        raise ValueError("Task title is required")
+    priority = _parse_enum(Priority, row.get('priority'), 'LOW')
+    status = _parse_enum(Status, row.get('status'), 'BACKLOG')
+    start_time = _parse_datetime(row, 'start_time', datetime.now())
+    end_time = _parse_datetime(row, 'end_time', start_time + timedelta(hours=24))
+    if end_time < start_time:
+        raise ValueError("End time is before start time")
+    return {
+        'id': str(uuid.uuid4()),
+        'title': title,
+        'description': _parse_text(row, 'description'),
+        'start_time': start_time.isoformat(),
+        'end_time': end_time.isoformat(),
+        'assignees': _parse_assignees(row.get('assignees')),
+        'priority': priority,
+        'status': status,
+        'history': [],
+        'comments': []
+    }
+
+
+def build_tasks(chunk):
+    """Worker entry point: turn a chunk of (line, row) pairs into (records, errors)."""
+    records, errors = [], []
+    for line_number, row in chunk:
+        try:
+            records.append(build_task(row))
+        except (KeyError, ValueError, TypeError, AttributeError) as e:
+            errors.append((line_number, f"{type(e).__name__}: {e}"))
+    return records, errors
+
+
+def bounded_map(pool, fn, iterable, window):
+    """Like pool.map, but keeps at most `window` tasks in flight to bound memory."""
+    pending = deque()
+    for item in iterable:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def journal_path(project_id, projects_file=None):
+    return f"{projects_file or main.PROJECTS_FILE}.import-{project_id}.jsonl"
+
+
+def _indent(text, prefix):
+    return '\n'.join(prefix + line for line in text.split('\n'))
+
+
+def write_projects(projects, file, extra_tasks=None):
+    """Write projects in save_data's layout, streaming extra task records into one project.
+
+    extra_tasks maps a project id to an iterable of task records appended
+    after that project's existing tasks, without building the full list.
+    """
+    extra_tasks = extra_tasks or {}
+    tmp_file = f"{file}.tmp"
+    with open(tmp_file, 'w') as f:
+        f.write('[')
+        for index, project in enumerate(projects):
+            f.write(',\n' if index else '\n')
+            header = dict(project, tasks=TASKS_PLACEHOLDER)
+            head, tail = _indent(json.dumps(header, indent=4), '    ').split(json.dumps(TASKS_PLACEHOLDER))
+            f.write(head)
+            count = 0
+            for tasks in (project['tasks'], extra_tasks.get(project['id'], ())):
+                for task in tasks:
+                    f.write(',\n' if count else '[\n')
+                    f.write(_indent(json.dumps(task, indent=4), '            '))
+                    count += 1
+            f.write('\n        ]' if count else '[]')
+            f.write(tail)
+        f.write('\n]' if projects else ']')
+    os.replace(tmp_file, file)
+
+
+def _journal_records(path):
+    with open(path, 'r') as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def commit_journal(project_id, username):
+    """Merge a project's import journal into projects.json and remove the journal."""
+    import snapshots
+    path = journal_path(project_id)
+    with projects_locked():
+        projects = load_data(main.PROJECTS_FILE)
+        if not any(project['id'] == project_id for project in projects):
+            raise ValueError(f"Project {project_id} not found")
+        write_projects(projects, main.PROJECTS_FILE, {project_id: _journal_records(path)})
+        os.remove(path)
+        event = changefeed.append('project.reload', username, project_id, data={'reason': 'import'})
+        snapshots.take(event, next(p for p in iter_projects() if p['id'] == project_id))
+    log_message(f"Imported tasks committed to project {project_id} by {username}")
+
+
+def migrate_history(username, file=None):
+    """Rewrite free-text history entries as typed events; return how many tasks changed.
+
+    Entries already in the typed form are left as they are; entries whose
+    timestamp can't be read are dropped. Every project that changed gets a
+    project.reload event so open sessions pick it up.
+    """
+    import snapshots
+    file = file or main.PROJECTS_FILE
+    with projects_locked(file):
+        projects = load_data(file)
+        changed_projects, changed_tasks, dropped = [], 0, 0
+        for project in projects:
+            changed = False
+            for task in project['tasks']:
+                if all('kind' in entry for entry in task['history']):
+                    continue
+                history = []
+                for entry in task['history']:
+                    try:
+                        history.append(HistoryEntry.from_dict(entry).to_dict())
+                    except ValueError:
+                        dropped += 1
+                task['history'] = history
+                changed_tasks += 1
+                changed = True
+            if changed:
+                changed_projects.append(project)
+        if changed_projects:
+            write_projects(projects, file)
+            for project in changed_projects:
+                event = changefeed.append('project.reload', username, project['id'], data={'reason': 'migrate-history'})
+                snapshots.take(event, project)
+            log_message(f"History of {changed_tasks} task(s) migrated to typed events by {username}"
+                        + (f", {dropped} unreadable entry(ies) dropped" if dropped else ""))
+    return changed_tasks
+
+
+def import_tasks(path, project_id, username, fmt=None, chunk_size=5000, workers=None, resume=False, on_chunk=None):
+    """Import tasks from a CSV/JSONL file into a project.
+
+    Returns (imported, errors) where errors is a list of (line, message).
+    """
+    journal = journal_path(project_id)
+    if not any(project['id'] == project_id for project in load_data(main.PROJECTS_FILE)):
+        raise ValueError(f"Project {project_id} not found")
+    if os.path.exists(journal) and not resume:
+        raise ValueError(f"An interrupted import for project {project_id} exists; rerun with resume to commit it first")
+
+    imported, errors = 0, []
+    if not resume:
+        fmt = fmt or detect_format(path)
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool, open(journal, 'a') as out:
+            chunks = chunked(read_rows(path, fmt), chunk_size)
+            for records, chunk_errors in bounded_map(pool, build_tasks, chunks, window=workers * 2):
+                if records:
+                    out.write(''.join(json.dumps(record) + '\n' for record in records))
+                    out.flush()
+                    os.fsync(out.fileno())
+                imported += len(records)
+                errors.extend(chunk_errors)
+                log_message(f"Import into project {project_id}: {len(records)} task(s) committed, {len(chunk_errors)} rejected")
+                if on_chunk:
+                    on_chunk(imported, len(errors))
+    elif os.path.exists(journal):
+        with open(journal, 'r') as f:
+            imported = sum(1 for _ in f)
+
+    if os.path.exists(journal):
+        commit_journal(project_id, username)
+    return imported, errors
+
+
+# Bulk export
+#
+# projects.json is read one project at a time with an incremental decoder, and
+# every project is flattened into project, task, history and comment records by
+# a chain of generators, so exporting never holds more than one project.
+
+EXPORT_COLUMNS = ['type', 'project_id', 'task_id', 'title', 'description', 'leader', 'members', 'status',
+                  'priority', 'start_time', 'end_time', 'assignees', 'username', 'timestamp', 'text']
+READ_SIZE = 1024 * 1024
+
+
+def iter_projects(file=None, read_size=READ_SIZE):
+    """Yield the projects of projects.json one at a time without loading the whole file."""
+    file = file or main.PROJECTS_FILE
+    if not os.path.exists(file):
+        return
+    decoder = json.JSONDecoder()
+    with open(file, 'r') as f:
+        buffer, pos, eof = '', 0, False
+
+        def fill(size):
+            nonlocal buffer, pos, eof
+            data = f.read(size)
+            eof = not data
+            buffer = buffer[pos:] + data
+            pos = 0
+
+        def skip(chars):
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in chars:
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    return
+                fill(read_size)
+
+        skip(' \t\r\n')
+        if buffer[pos:pos + 1] != '[':
+            raise ValueError(f"{file} is not a JSON array")
+        pos += 1
+        size = read_size
+        while True:
+            skip(' \t\r\n,')
+            if eof and pos >= len(buffer):
+                raise ValueError(f"Unexpected end of {file}")
+            if buffer[pos] == ']':
+                return
+            try:
+                project, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # The project continues past the buffer; read more, growing
+                # the read size so very large projects don't go quadratic.
+                fill(size)
+                size *= 2
+                continue
+            pos, size = end, read_size
+            yield project
+
+
+def _in_range(timestamp, since, until):
+    if since is None and until is None:
+        return True
+    moment = datetime.fromisoformat(timestamp)
+    return (since is None or moment >= since) and (until is None or moment < until)
+
+
+def filter_projects(projects, project_ids=None):
+    for project in projects:
+        if not project_ids or project['id'] in project_ids:
+            yield project
+
+
+def flatten_project(project, statuses=None, since=None, until=None):
+    """Yield export records for one project and its matching tasks.
+
+    Tasks are filtered by status and start time; the history and comment
+    entries of the tasks kept, by their own timestamp. Entries of a task
+    that was filtered out are never exported.
+    """
+    yield {
+        'type': 'project', 'project_id': project['id'], 'title': project['title'],
+        'leader': project['leader'], 'members': project['members']
+    }
+    for task in project['tasks']:
+        if statuses and task['status'] not in statuses:
+            continue
+        if not _in_range(task['start_time'], since, until):
+            continue
+        yield {
+            'type': 'task', 'project_id': project['id'], 'task_id': task['id'], 'title': task['title'],
+            'description': task['description'], 'status': task['status'], 'priority': task['priority'],
+            'start_time': task['start_time'], 'end_time': task['end_time'], 'assignees': task['assignees']
+        }
+        history = map(HistoryEntry.from_dict, task['history'])
+        for kind, entries, text in (('history', history, 'change'), ('comment', task['comments'], 'content')):
+            for entry in entries:
+                if _in_range(entry['timestamp'], since, until):
+                    yield {
+                        'type': kind, 'project_id': project['id'], 'task_id': task['id'],
+                        'username': entry['username'], 'timestamp': entry['timestamp'], 'text': entry[text]
+                    }
+
+
+def export_records(file=None, project_ids=None, statuses=None, since=None, until=None):
+    since, until = local_time(since), local_time(until)
+    for project in filter_projects(iter_projects(file), project_ids):
+        yield from flatten_project(project, statuses, since, until)
+
+
+def write_jsonl(records, out):
+    count = 0
+    for record in records:
+        out.write(json.dumps(record) + '\n')
+        count += 1
+    return count
+
+
+def write_csv(records, out):
+    writer = csv.DictWriter(out, fieldnames=EXPORT_COLUMNS, extrasaction='ignore')
+    writer.writeheader()
+    count = 0
+    for record in records:
+        for key in ('members', 'assignees'):
+            if key in record:
+                record[key] = ';'.join(record[key])
+        writer.writerow(record)
+        count += 1
+    return count
+
+
+EXPORT_WRITERS = {
+    'jsonl': write_jsonl,
+    'csv': write_csv,
+}
+
+
+def export(out, fmt='jsonl', file=None, project_ids=None, statuses=None, since=None, until=None):
+    """Stream matching records to `out` and return how many were written."""
+    records = export_records(file, project_ids, statuses, since, until)
+    return EXPORT_WRITERS[fmt](records, out)
@@ -0,0 +1,152 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import bulk_io
+import main
+from datetime import datetime, timedelta, timezone
+
+from main import Project, Task, Status, load_data, save_data, PROJECTS_FILE
+
+class TestImportTasks(unittest.TestCase):
+
+    def setUp(self):
+        self.old_cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        save_data([Project('p1', 'Project', 'leader', ['leader'], [Task(title='Existing')]).to_dict()], PROJECTS_FILE)
+
+    def tearDown(self):
+        os.chdir(self.old_cwd)
+        self.tmp.cleanup()
+
+    def test_1_write_projects_matches_save_data(self):
+        projects = load_data(PROJECTS_FILE)
+        bulk_io.write_projects(projects, 'copy.json')
+        with open(PROJECTS_FILE) as a, open('copy.json') as b:
+            self.assertEqual(a.read(), b.read(), "Test 1: Streaming writer changed the file layout")
+
+    def test_2_import_csv(self):
+        with open('tasks.csv', 'w') as f:
+            f.write("title,priority,status,start_time,assignees\n")
+            f.write("First,high,TODO,2026-01-01T09:00:00,alice;bob\n")
+            f.write(",LOW,TODO,,\n")
+            f.write("Third,URGENT,TODO,,\n")
+            f.write("Fourth,,,,\n")
+        imported, errors = bulk_io.import_tasks('tasks.csv', 'p1', 'tester', chunk_size=2, workers=2)
+        self.assertEqual(imported, 2, "Test 2: Wrong number of tasks imported")
+        self.assertEqual([line for line, _ in errors], [3, 4], "Test 2: Invalid rows not reported")
+        tasks = load_data(PROJECTS_FILE)[0]['tasks']
+        self.assertEqual([t['title'] for t in tasks], ['Existing', 'First', 'Fourth'], "Test 2: Tasks not committed in order")
+        self.assertEqual(tasks[1]['assignees'], ['alice', 'bob'], "Test 2: Assignees not parsed")
+        self.assertEqual(tasks[2]['status'], 'BACKLOG', "Test 2: Default status not applied")
+        self.assertFalse(os.path.exists(bulk_io.journal_path('p1')), "Test 2: Journal not removed after commit")
+
+    def test_3_resume_interrupted_import(self):
+        with open(bulk_io.journal_path('p1'), 'w') as f:
+            f.write(json.dumps(bulk_io.build_task({'title': 'Journaled'})) + '\n')
+        with self.assertRaises(ValueError):
+            bulk_io.import_tasks('missing.jsonl', 'p1', 'tester')
+        imported, _ = bulk_io.import_tasks(None, 'p1', 'tester', resume=True)
+        self.assertEqual(imported, 1, "Test 3: Journal not committed on resume")
+        self.assertEqual(load_data(PROJECTS_FILE)[0]['tasks'][-1]['title'], 'Journaled', "Test 3: Journaled task missing")
+
+    def test_4_rows_validated(self):
+        for row in ({'title': 5}, {'title': 'T', 'description': ['x']}, {'title': 'T', 'assignees': ['a', 1]},
+                    {'title': 'T', 'assignees': 7}, {'title': 'T', 'start_time': 20260101}):
+            with self.assertRaises(ValueError, msg=f"Test 4: Invalid row accepted: {row}"):
+                bulk_io.build_task(row)
+        task = bulk_io.build_task({'title': 'T', 'start_time': '2026-01-01T09:00:00+00:00',
+                                   'end_time': '2026-01-01T10:00:00Z'})
+        start = datetime.fromisoformat(task['start_time'])
+        self.assertIsNone(start.tzinfo, "Test 4: Aware start time kept its zone")
+        self.assertEqual(start, datetime(2026, 1, 1, 9, tzinfo=timezone.utc).astimezone().replace(tzinfo=None),
+                         "Test 4: Aware start time not converted to local time")
+        self.assertEqual(datetime.fromisoformat(task['end_time']) - start, timedelta(hours=1), "Test 4: End time wrong")
+
+    def test_5_journal_committed_under_lock(self):
+        with open(bulk_io.journal_path('p1'), 'w') as f:
+            f.write(json.dumps(bulk_io.build_task({'title': 'Journaled'})) + '\n')
+        lock = os.path.abspath(f"{PROJECTS_FILE}.lock")
+        locked = []
+        write = bulk_io.write_projects
+        with patch('bulk_io.write_projects', side_effect=lambda *args: locked.append(lock in main._held_locks.paths) or write(*args)):
+            bulk_io.commit_journal('p1', 'tester')
+        self.assertEqual(locked, [True], "Test 5: projects.json rewritten outside its lock")
+
+class TestExport(unittest.TestCase):
+
+    def setUp(self):
+        self.old_cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        done = Task(title='Done task', status=Status.DONE)
+        done.add_comment('leader', 'shipped')
+        projects = [Project('p1', 'One', 'leader', ['leader'], [Task(title='Open task'), done]),
+                    Project('p2', 'Two', 'leader', ['leader'], [Task(title='Other')])]
+        save_data([project.to_dict() for project in projects], PROJECTS_FILE)
+
+    def tearDown(self):
+        os.chdir(self.old_cwd)
+        self.tmp.cleanup()
+
+    def test_1_iter_projects_with_small_reads(self):
+        projects = list(bulk_io.iter_projects(read_size=7))
+        self.assertEqual(projects, load_data(PROJECTS_FILE), "Test 1: Streaming reader changed the projects")
+
+    def test_2_export_filters(self):
+        out = io.StringIO()
+        count = bulk_io.export(out, 'jsonl', project_ids={'p1'}, statuses={'DONE'})
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(count, len(records), "Test 2: Export count does not match output")
+        self.assertEqual([r['type'] for r in records], ['project', 'task', 'history', 'comment'], "Test 2: Wrong records exported")
+        self.assertEqual(records[3]['text'], 'shipped', "Test 2: Comment text not exported")
+
+    def test_3_export_csv_date_filter(self):
+        out = io.StringIO()
+        bulk_io.export(out, 'csv', since=datetime(2999, 1, 1))
+        rows = out.getvalue().splitlines()
+        self.assertEqual(len(rows), 3, "Test 3: Date filter should leave only the header and project rows")
+        out = io.StringIO()
+        bulk_io.export(out, 'csv', since=datetime(2999, 1, 1, tzinfo=timezone.utc), until=datetime(3000, 1, 1, tzinfo=timezone.utc))
+        self.assertEqual(len(out.getvalue().splitlines()), 3, "Test 3: Date filter with a UTC offset not applied")
+
+    def test_4_migrate_history(self):
+        projects = load_data(PROJECTS_FILE)
+        task = projects[0]['tasks'][1]
+        task['history'] = [{'username': 'leader', 'change': 'Status changed from Status.TODO to Status.DONE',
+                            'timestamp': '2024-01-01T09:00:00'}]
+        save_data(projects, PROJECTS_FILE)
+        self.assertEqual(bulk_io.migrate_history('tester'), 1, "Test 4: Wrong number of tasks migrated")
+        entry = load_data(PROJECTS_FILE)[0]['tasks'][1]['history'][0]
+        self.assertEqual((entry['kind'], entry['field'], entry['new']), ('update', 'status', 'DONE'), "Test 4: Entry not migrated")
+        self.assertEqual(bulk_io.migrate_history('tester'), 0, "Test 4: Migrated entries migrated again")
+
+    def test_5_migrate_history_with_malformed_times(self):
+        projects = load_data(PROJECTS_FILE)
+        projects[0]['tasks'][0]['history'] = [
+            {'username': 'leader', 'change': 'Task start time changed to next monday', 'timestamp': '2024-01-01T09:00:00'},
+            {'username': 'leader', 'change': 'Task renamed', 'timestamp': 'yesterday'}]
+        save_data(projects, PROJECTS_FILE)
+        self.assertEqual(bulk_io.migrate_history('tester'), 1, "Test 5: Malformed entries aborted the migration")
+        history = load_data(PROJECTS_FILE)[0]['tasks'][0]['history']
+        self.assertEqual([(entry['kind'], entry['new']) for entry in history],
+                         [('note', 'Task start time changed to next monday')], "Test 5: Malformed entries not handled")
+
+    def test_6_entries_of_filtered_out_tasks_not_exported(self):
+        projects = load_data(PROJECTS_FILE)
+        projects[0]['tasks'][1]['start_time'] = '2020-01-01T09:00:00'
+        save_data(projects, PROJECTS_FILE)
+        out = io.StringIO()
+        bulk_io.export(out, 'jsonl', project_ids={'p1'}, since=datetime(2021, 1, 1))
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        exported = {r['task_id'] for r in records if r['type'] == 'task'}
+        self.assertEqual(len(exported), 1, "Test 6: Task date filter not applied")
+        self.assertTrue(all(r['task_id'] in exported for r in records if r['type'] in ('history', 'comment')),
+                        "Test 6: Entries exported for a task that was not")
+
+if __name__ == '__main__':
+    unittest.main()
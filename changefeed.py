@@ -0,0 +1,182 @@
+import bisect
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Change feed
+#
+# Every mutation of a project or task is appended to changes.jsonl as one
+# sequenced event:
+#
+#   {"seq": 42, "ts": 1760000000.0, "op": "task.update", "actor": "alice",
+#    "project_id": "...", "task_id": "...", "session": "...", "data": {...}}
+#
+# Events carry the delta (old and new values, the history entry written), not
+# the whole record, so they can be applied or reversed without rereading
+# projects.json. Appends are serialized across processes with an advisory
+# file lock where the platform has one, and fsynced before returning.
+#
+# Every INDEX_INTERVAL events the byte offset is recorded in changes.idx, so
+# a consumer resuming from a cursor seeks close to it and only reads the
+# events it has not seen yet.
+
+CHANGES_FILE = 'changes.jsonl'
+INDEX_FILE = 'changes.idx'
+INDEX_INTERVAL = 256
+SESSION_ID = uuid.uuid4().hex[:12]
+
+_lock = threading.Lock()
+_local = threading.local()
+_tail = {'key': None, 'seq': 0}
+
+
+@contextmanager
+def file_lock(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    try:
+        yield
+    finally:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _last_seq(f, size):
+    """Read the sequence number of the last event, caching it by path and size."""
+    if _tail['key'] == (os.path.abspath(CHANGES_FILE), size):
+        return _tail['seq']
+    if size == 0:
+        return 0
+    block = 4096
+    while True:
+        start = max(size - block, 0)
+        f.seek(start)
+        lines = f.read(size - start).rstrip(b'\n').split(b'\n')
+        if len(lines) > 1 or start == 0:
+            return json.loads(lines[-1])['seq']
+        block *= 2
+
+
+def _write(events):
+    with _lock, open(CHANGES_FILE, 'ab+') as f, file_lock(f):
+        size = f.seek(0, os.SEEK_END)
+        seq = _last_seq(f, size)
+        offset = size
+        index_entries = []
+        chunks = []
+        for event in events:
+            seq += 1
+            event['seq'] = seq
+            line = (json.dumps(event) + '\n').encode()
+            if seq % INDEX_INTERVAL == 0:
+                index_entries.append(f"{seq} {offset}\n")
+            chunks.append(line)
+            offset += len(line)
+        f.write(b''.join(chunks))
+        f.flush()
+        os.fsync(f.fileno())
+        _tail['key'], _tail['seq'] = (os.path.abspath(CHANGES_FILE), offset), seq
+        if index_entries:
+            with open(INDEX_FILE, 'a') as index:
+                index.write(''.join(index_entries))
+    return seq
+
+
+def append(op, actor, project_id, task_id=None, data=None):
+    """Record one change. Inside batch() the event is buffered until the batch ends."""
+    event = {
+        'seq': None,
+        'ts': time.time(),
+        'op': op,
+        'actor': actor,
+        'project_id': project_id,
+        'task_id': task_id,
+        'session': SESSION_ID,
+        'data': data or {}
+    }
+    buffer = getattr(_local, 'buffer', None)
+    if buffer is not None:
+        buffer.append(event)
+        return event
+    _write([event])
+    return event
+
+
+@contextmanager
+def batch():
+    """Buffer the events appended in this thread and write them with one fsync.
+
+    If the block raises, the buffered events are dropped instead.
+    """
+    if getattr(_local, 'buffer', None) is not None:
+        yield
+        return
+    _local.buffer = []
+    try:
+        yield
+    except BaseException:
+        _local.buffer = None
+        raise
+    events, _local.buffer = _local.buffer, None
+    if events:
+        _write(events)
+
+
+def _seek_offset(cursor):
+    if not os.path.exists(INDEX_FILE):
+        return 0
+    seqs, offsets = [], []
+    with open(INDEX_FILE, 'r') as f:
+        for line in f:
+            seq, offset = line.split()
+            seqs.append(int(seq))
+            offsets.append(int(offset))
+    position = bisect.bisect_right(seqs, cursor + 1) - 1
+    return offsets[position] if position >= 0 else 0
+
+
+def read(cursor=0, limit=1000, project_id=None):
+    """Return (events, next_cursor) for events after `cursor`, at most `limit` of them.
+
+    When filtering by project, next_cursor still advances past the events of
+    other projects that were skipped.
+    """
+    events = []
+    if not os.path.exists(CHANGES_FILE):
+        return events, cursor
+    with open(CHANGES_FILE, 'rb') as f:
+        f.seek(_seek_offset(cursor))
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            event = json.loads(line)
+            if event['seq'] <= cursor:
+                continue
+            cursor = event['seq']
+            if project_id is None or event['project_id'] == project_id:
+                events.append(event)
+                if len(events) >= limit:
+                    break
+    return events, cursor
+
+
+def last_seq():
+    if not os.path.exists(CHANGES_FILE):
+        return 0
+    with open(CHANGES_FILE, 'rb') as f:
+        return _last_seq(f, f.seek(0, os.SEEK_END))
+
+
+def purge():
+    for file in [CHANGES_FILE, INDEX_FILE]:
+        if os.path.exists(file):
+            os.remove(file)
+    _tail['key'], _tail['seq'] = None, 0
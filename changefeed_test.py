@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import changefeed
+from main import Project, Task, Status
+
+class TestChangeFeed(unittest.TestCase):
+
+    def setUp(self):
+        self.old_cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+
+    def tearDown(self):
+        changefeed.purge()
+        os.chdir(self.old_cwd)
+        self.tmp.cleanup()
+
+    def test_1_sequenced_and_resumable(self):
+        with patch('changefeed.INDEX_INTERVAL', 4):
+            for i in range(10):
+                changefeed.append('task.update', 'alice', 'p1' if i % 2 else 'p2', f't{i}')
+        self.assertEqual(changefeed.last_seq(), 10, "Test 1: Sequence numbers not contiguous")
+        events, cursor = changefeed.read(0, limit=3)
+        self.assertEqual([e['seq'] for e in events], [1, 2, 3], "Test 1: First batch wrong")
+        events, cursor = changefeed.read(cursor, limit=100)
+        self.assertEqual([e['seq'] for e in events], list(range(4, 11)), "Test 1: Resumed batch wrong")
+        events, _ = changefeed.read(5, project_id='p1')
+        self.assertEqual([e['task_id'] for e in events], ['t5', 't7', 't9'], "Test 1: Project filter wrong")
+
+    def test_2_sequence_survives_other_writers(self):
+        changefeed.append('project.create', 'alice', 'p1')
+        changefeed._tail['key'] = None
+        with open(changefeed.CHANGES_FILE, 'a') as f:
+            f.write('{"seq": 7, "op": "task.update"}\n')
+        event = changefeed.append('project.delete', 'alice', 'p1')
+        self.assertEqual(event['seq'], 8, "Test 2: Sequence not continued from the file tail")
+
+    def test_3_task_and_project_mutations_emit(self):
+        project = Project('p1', 'Project', 'leader', ['leader'])
+        task = Task(title='T')
+        project.add_task(task, 'leader')
+        task.change_status('leader', Status.DOING)
+        task.assign_user('leader', 'bob')
+        task.add_comment('bob', 'hi')
+        project.insert_member('bob', 'leader')
+        project.remove_task(task.id, 'leader')
+        events, _ = changefeed.read(0)
+        self.assertEqual([e['op'] for e in events],
+                         ['task.create', 'task.update', 'task.assign', 'task.comment', 'project.add_member', 'task.delete'],
+                         "Test 3: Wrong events emitted")
+        self.assertEqual((events[1]['data']['old'], events[1]['data']['new']), ('BACKLOG', 'DOING'), "Test 3: Status delta wrong")
+        self.assertEqual(events[1]['data']['history'], task.history[0], "Test 3: History entry not carried")
+
+    def test_4_batch_writes_once(self):
+        with patch('changefeed.os.fsync') as mock_fsync:
+            with changefeed.batch():
+                for i in range(5):
+                    changefeed.append('task.update', 'alice', 'p1', f't{i}')
+        self.assertEqual(mock_fsync.call_count, 1, "Test 4: Batch should be written with one fsync")
+        self.assertEqual(changefeed.last_seq(), 5, "Test 4: Batched events missing")
+        with self.assertRaises(RuntimeError), changefeed.batch():
+            changefeed.append('task.update', 'alice', 'p1', 't0')
+            raise RuntimeError("failed")
+        self.assertEqual(changefeed.last_seq(), 5, "Test 4: Events of a failed batch written")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,324 @@
+import argparse
+import shlex
+import sys
+import uuid
+from datetime import datetime
+from getpass import getpass
+
+import changefeed
+import output
+import sessions
+from main import User, Project, Task, Priority, Status, TASK_SORT_KEYS, identity_store, log_message, log_batch, projects_locked
+from passwords import verify_password
+from repository import ProjectRepository
+
+# Scripted commands for main.py
+#
+#   python main.py --user alice create-project --title "Website"
+#   python main.py --user alice batch commands.txt
+#
+# A batch file holds one command per line (blank lines and '#' comments are
+# skipped). Every command runs in one process against one loaded repository
+# and projects.json is written once at the end; if any line fails nothing is
+# saved. $PROJECT and $TASK expand to the last project and task created.
+#
+# The listing commands (list-projects, list-tasks, view-task, board) only
+# read; --format plain/tsv/json writes their rows without rich, for piping:
+#
+#   python main.py --user alice --format tsv list-tasks --project $ID | sort
+#
+# view-task and board take --as-of to show a past state, rebuilt from
+# snapshots and the change feed (see snapshots.py).
+
+
+class CLIError(Exception):
+    pass
+
+
+def authenticate(username):
+    user = User.resume(username)
+    if user is not None:
+        return user
+    user_data = identity_store().find(username)
+    if user_data is None or not verify_password(getpass(f"Password for {username}: "), user_data['password']):
+        log_message(f"Failed login attempt for username: {username}")
+        raise CLIError("Invalid username or password!")
+    if not user_data['active']:
+        raise CLIError("Account is inactive. Contact admin.")
+    sessions.issue_token(username, user_data['email'], user_data['role'])
+    log_message(f"User {username} logged in successfully with role: {user_data['role']}")
+    return User.from_dict(user_data)
+
+
+def _enum(enum, value):
+    try:
+        return enum[value.upper()]
+    except KeyError:
+        raise CLIError(f"Invalid {enum.__name__.lower()}: {value}")
+
+
+class Session:
+    """State shared by the commands of one invocation."""
+
+    def __init__(self, user, repository, fmt='table'):
+        self.user = user
+        self.repository = repository
+        self.format = fmt
+        self.changed = False
+        self.last = {'PROJECT': None, 'TASK': None}
+
+    def run(self, args):
+        if not getattr(args, 'read_only', False):
+            self.changed = True
+        result = args.handler(self, args)
+        if result is not None:
+            print(result)
+
+    def project(self, project_id, leader=False, as_of=None):
+        project = self.repository.get(project_id)
+        if project is None or self.user.username not in project.members:
+            raise CLIError(f"Project {project_id} not found!")
+        if leader and project.leader != self.user.username:
+            raise CLIError("Only the project leader can do this!")
+        if as_of is not None:
+            try:
+                project = project.as_of(as_of)
+            except LookupError as e:
+                raise CLIError(str(e))
+            if project is None:
+                raise CLIError(f"Project {project_id} did not exist at {as_of}!")
+        return project
+
+    def task(self, project, task_id, editor=False):
+        task = project.get_task(task_id)
+        if task is None:
+            raise CLIError(f"Task {task_id} not found!")
+        if editor and self.user.username != project.leader and self.user.username not in task.assignees:
+            raise CLIError("You are not assigned to this task!")
+        return task
+
+    def expand(self, argv):
+        for name, value in self.last.items():
+            argv = [arg.replace(f"${name}", value) if value else arg for arg in argv]
+        return argv
+
+
+# Commands
+
+def create_project(session, args):
+    username = session.user.username
+    project = Project(str(uuid.uuid4()), args.title, username, [username])
+    session.repository.add(project)
+    project.emit_created(username)
+    session.last['PROJECT'] = project.id
+    log_message(f"Project {project.id} created by user {username}")
+    return project.id
+
+
+def add_member(session, args):
+    with session.repository.locked(args.project):
+        project = session.project(args.project, leader=True)
+        if not project.insert_member(args.username, session.user.username):
+            raise CLIError("User already a member of the project!")
+    return f"User {args.username} added to project {project.id}"
+
+
+def create_task(session, args):
+    with session.repository.locked(args.project):
+        project = session.project(args.project, leader=True)
+        task = Task(
+            title=args.title,
+            description=args.description,
+            priority=_enum(Priority, args.priority),
+            status=_enum(Status, args.status)
+        )
+        project.add_task(task, session.user.username)
+    session.last['TASK'] = task.id
+    log_message(f"Task {task.id} created by user {session.user.username} in project {project.id}")
+    return task.id
+
+
+def set_status(session, args):
+    with session.repository.locked(args.project):
+        project = session.project(args.project)
+        task = session.task(project, args.task, editor=True)
+        task.change_status(session.user.username, _enum(Status, args.status))
+    return f"Task {task.id} status set to {task.status.value}"
+
+
+def comment(session, args):
+    with session.repository.locked(args.project):
+        project = session.project(args.project)
+        task = session.task(project, args.task, editor=True)
+        task.add_comment(session.user.username, args.text)
+    return f"Comment added to task {task.id}"
+
+
+# Listings
+
+TASK_COLUMNS = ['id', 'title', 'description', 'priority', 'status', 'start_time', 'end_time', 'assignees']
+
+
+def _task_record(task, columns=TASK_COLUMNS):
+    return {column: getattr(task, column) for column in columns}
+
+
+def list_projects(session, args):
+    with output.rows(session.format, ['id', 'title', 'leader', 'members'], title="Projects") as write:
+        for project in session.repository.for_member(session.user.username):
+            write({'id': project.id, 'title': project.title, 'leader': project.leader, 'members': project.members})
+
+
+def list_tasks(session, args):
+    project = session.project(args.project)
+    tasks = project.tasks
+    if args.status:
+        status = _enum(Status, args.status)
+        tasks = [task for task in tasks if task.status == status]
+    if args.sort:
+        tasks = sorted(tasks, key=TASK_SORT_KEYS[args.sort])
+    with output.rows(session.format, TASK_COLUMNS, title="Tasks") as write:
+        for task in tasks:
+            write(_task_record(task))
+
+
+def view_task(session, args):
+    project = session.project(args.project, as_of=args.as_of)
+    task = session.task(project, args.task)
+    columns = TASK_COLUMNS + ['history', 'comments']
+    with output.rows(session.format, columns, title="Task Details") as write:
+        write(_task_record(task, columns))
+
+
+def board(session, args):
+    project = session.project(args.project, as_of=args.as_of)
+    with output.rows(session.format, ['status', 'index', 'title', 'id'], title="Tasks") as write:
+        for status in Status:
+            index = 0
+            for task in project.tasks:
+                if task.status == status:
+                    index += 1
+                    write({'status': status, 'index': index, 'title': task.title, 'id': task.id})
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='main.py', description="Run Trellomize commands without the menus.")
+    parser.add_argument('--user', required=True, help='Username to act as (resumes a cached session if one exists)')
+    parser.add_argument('--format', choices=output.FORMATS, default='table', help='Output format of listings')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    add_commands(subparsers)
+
+    batch_parser = subparsers.add_parser('batch', help='Run a file of commands with a single final save')
+    batch_parser.add_argument('file', help="Command file, or '-' for stdin")
+    return parser
+
+
+def add_commands(subparsers):
+    create_project_parser = subparsers.add_parser('create-project')
+    create_project_parser.add_argument('--title', required=True, help='Project title')
+    create_project_parser.set_defaults(handler=create_project)
+
+    add_member_parser = subparsers.add_parser('add-member')
+    add_member_parser.add_argument('--project', required=True, help='Project ID')
+    add_member_parser.add_argument('--username', required=True, help='Username to add')
+    add_member_parser.set_defaults(handler=add_member)
+
+    create_task_parser = subparsers.add_parser('create-task')
+    create_task_parser.add_argument('--project', required=True, help='Project ID')
+    create_task_parser.add_argument('--title', required=True, help='Task title')
+    create_task_parser.add_argument('--description', default='', help='Task description')
+    create_task_parser.add_argument('--priority', default='LOW', help='CRITICAL/HIGH/MEDIUM/LOW')
+    create_task_parser.add_argument('--status', default='BACKLOG', help='BACKLOG/TODO/DOING/DONE/ARCHIVED')
+    create_task_parser.set_defaults(handler=create_task)
+
+    set_status_parser = subparsers.add_parser('set-status')
+    set_status_parser.add_argument('--project', required=True, help='Project ID')
+    set_status_parser.add_argument('--task', required=True, help='Task ID')
+    set_status_parser.add_argument('--status', required=True, help='BACKLOG/TODO/DOING/DONE/ARCHIVED')
+    set_status_parser.set_defaults(handler=set_status)
+
+    comment_parser = subparsers.add_parser('comment')
+    comment_parser.add_argument('--project', required=True, help='Project ID')
+    comment_parser.add_argument('--task', required=True, help='Task ID')
+    comment_parser.add_argument('--text', required=True, help='Comment text')
+    comment_parser.set_defaults(handler=comment)
+
+    list_projects_parser = subparsers.add_parser('list-projects')
+    list_projects_parser.set_defaults(handler=list_projects, read_only=True)
+
+    list_tasks_parser = subparsers.add_parser('list-tasks')
+    list_tasks_parser.add_argument('--project', required=True, help='Project ID')
+    list_tasks_parser.add_argument('--status', help='Only tasks with this status')
+    list_tasks_parser.add_argument('--sort', choices=sorted(TASK_SORT_KEYS), help='Sort order')
+    list_tasks_parser.set_defaults(handler=list_tasks, read_only=True)
+
+    view_task_parser = subparsers.add_parser('view-task')
+    view_task_parser.add_argument('--project', required=True, help='Project ID')
+    view_task_parser.add_argument('--task', required=True, help='Task ID')
+    view_task_parser.add_argument('--as-of', type=datetime.fromisoformat, help='Show the task as it was at this ISO date/time')
+    view_task_parser.set_defaults(handler=view_task, read_only=True)
+
+    board_parser = subparsers.add_parser('board')
+    board_parser.add_argument('--project', required=True, help='Project ID')
+    board_parser.add_argument('--as-of', type=datetime.fromisoformat, help='Show the board as it was at this ISO date/time')
+    board_parser.set_defaults(handler=board, read_only=True)
+
+
+class BatchArgumentParser(argparse.ArgumentParser):
+    """Raise instead of exiting, so a bad line aborts the batch with its line number."""
+
+    def error(self, message):
+        raise CLIError(message)
+
+
+def build_batch_parser():
+    parser = BatchArgumentParser(prog='batch', add_help=False)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    add_commands(subparsers)
+    return parser
+
+
+def run_batch(session, lines):
+    parser = build_batch_parser()
+    count = 0
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        try:
+            args = parser.parse_args(session.expand(shlex.split(line)))
+            session.run(args)
+        except (CLIError, ValueError) as e:
+            raise CLIError(f"line {line_number}: {e}")
+        count += 1
+    return count
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        user = authenticate(args.user)
+        # projects.json stays locked from load to save, so no other writer
+        # can slip a change in between that the save would overwrite; other
+        # writers wait for the command (or the whole batch) to finish.
+        # Events and log lines are published only once the save succeeded;
+        # a failure anywhere discards them along with the changes.
+        with projects_locked(), log_batch(), changefeed.batch():
+            repository = ProjectRepository().load()
+            session = Session(user, repository, args.format)
+            if args.command == 'batch':
+                if args.file == '-':
+                    count = run_batch(session, sys.stdin)
+                else:
+                    with open(args.file, 'r') as f:
+                        count = run_batch(session, f)
+                log_message(f"Batch of {count} command(s) run by {user.username}")
+            else:
+                session.run(args)
+            if session.changed:
+                repository.save()
+    except (CLIError, OSError) as e:
+        log_message(f"Command {args.command} by {args.user} failed, nothing saved: {e}")
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
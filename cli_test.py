@@ -0,0 +1,130 @@
+import fcntl
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+import changefeed
+import cli
+import passwords
+from main import User, identity_store, load_data, save_data, PROJECTS_FILE, LOG_FILE
+
+class TestCLI(unittest.TestCase):
+
+    def setUp(self):
+        self.old_cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        passwords._config = None
+        passwords.save_config('scrypt', {'n': 2 ** 8, 'r': 8, 'p': 1})
+        identity_store().add(User('leader', 'leader@example.com', 'password').to_dict())
+
+    def tearDown(self):
+        passwords._config = None
+        os.chdir(self.old_cwd)
+        self.tmp.cleanup()
+
+    @patch('cli.getpass', return_value='password')
+    def test_1_single_command_then_resumed_session(self, mock_getpass):
+        with patch('sys.stdout', new_callable=io.StringIO) as out:
+            self.assertEqual(cli.main(['--user', 'leader', 'create-project', '--title', 'Scripted']), 0,
+                             "Test 1: create-project failed")
+            project_id = out.getvalue().strip()
+            self.assertEqual(cli.main(['--user', 'leader', 'create-task', '--project', project_id, '--title', 'T']), 0,
+                             "Test 1: create-task failed")
+        self.assertEqual(mock_getpass.call_count, 1, "Test 1: Second command did not resume the session")
+        self.assertEqual(load_data(PROJECTS_FILE)[0]['tasks'][0]['title'], 'T', "Test 1: Task not saved")
+
+    @patch('cli.getpass', return_value='password')
+    def test_2_batch_saves_once(self, mock_getpass):
+        with open('commands.txt', 'w') as f:
+            f.write("# setup\n")
+            f.write("create-project --title 'Batch project'\n")
+            f.write("add-member --project $PROJECT --username member\n")
+            f.write("create-task --project $PROJECT --title 'First task' --priority high\n")
+            f.write("set-status --project $PROJECT --task $TASK --status DONE\n")
+            f.write("comment --project $PROJECT --task $TASK --text 'all done'\n")
+        with patch('repository.save_data', wraps=save_data) as mock_save, patch('sys.stdout', new_callable=io.StringIO):
+            self.assertEqual(cli.main(['--user', 'leader', 'batch', 'commands.txt']), 0, "Test 2: Batch failed")
+        self.assertEqual(mock_save.call_count, 1, "Test 2: Batch should write projects once")
+        project = load_data(PROJECTS_FILE)[0]
+        self.assertEqual(project['members'], ['leader', 'member'], "Test 2: Member not added")
+        self.assertEqual(project['tasks'][0]['status'], 'DONE', "Test 2: Status not set")
+        self.assertEqual(project['tasks'][0]['comments'][0]['content'], 'all done', "Test 2: Comment not added")
+
+    @patch('cli.getpass', return_value='password')
+    def test_3_failed_batch_saves_nothing(self, mock_getpass):
+        with open('commands.txt', 'w') as f:
+            f.write("create-project --title 'Batch project'\n")
+            f.write("create-task --project $PROJECT --title 'Phantom'\n")
+            f.write("set-status --project $PROJECT --task missing --status DONE\n")
+        with patch('sys.stdout', new_callable=io.StringIO), patch('sys.stderr', new_callable=io.StringIO) as err:
+            self.assertEqual(cli.main(['--user', 'leader', 'batch', 'commands.txt']), 1, "Test 3: Failing batch succeeded")
+        self.assertIn('line 3', err.getvalue(), "Test 3: Failing line not reported")
+        self.assertFalse(os.path.exists(PROJECTS_FILE), "Test 3: Failed batch was saved")
+        self.assertEqual(changefeed.last_seq(), 0, "Test 3: Events of a failed batch published")
+        with open(LOG_FILE) as f:
+            self.assertNotIn('created', f.read(), "Test 3: Log lines of a failed batch written")
+
+    @patch('cli.getpass', return_value='password')
+    def test_4_listings_in_machine_formats(self, mock_getpass):
+        with open('commands.txt', 'w') as f:
+            f.write("create-project --title 'Listed'\n")
+            f.write("create-task --project $PROJECT --title 'Low' --priority low\n")
+            f.write("create-task --project $PROJECT --title 'Urgent' --priority critical --status DOING\n")
+        with patch('sys.stdout', new_callable=io.StringIO) as out:
+            cli.main(['--user', 'leader', 'batch', 'commands.txt'])
+            project_id = out.getvalue().split()[0]
+        with patch('sys.stdout', new_callable=io.StringIO) as out, patch('repository.save_data') as mock_save:
+            cli.main(['--user', 'leader', '--format', 'tsv', 'list-tasks', '--project', project_id, '--sort', 'priority'])
+            lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0].split('\t'), cli.TASK_COLUMNS, "Test 4: TSV header wrong")
+        self.assertEqual([line.split('\t')[1] for line in lines[1:]], ['Urgent', 'Low'], "Test 4: Rows not sorted")
+        mock_save.assert_not_called()
+        with patch('sys.stdout', new_callable=io.StringIO) as out:
+            cli.main(['--user', 'leader', '--format', 'json', 'board', '--project', project_id])
+        board = json.loads(out.getvalue())
+        self.assertEqual([(row['status'], row['title']) for row in board], [('BACKLOG', 'Low'), ('DOING', 'Urgent')],
+                         "Test 4: Board rows wrong")
+
+    @patch('cli.getpass', return_value='password')
+    def test_5_board_as_of(self, mock_getpass):
+        with open('commands.txt', 'w') as f:
+            f.write("create-project --title 'Past'\n")
+            f.write("create-task --project $PROJECT --title 'T' --status TODO\n")
+        with patch('sys.stdout', new_callable=io.StringIO) as out:
+            cli.main(['--user', 'leader', 'batch', 'commands.txt'])
+            project_id, task_id = out.getvalue().split()[:2]
+        before = datetime.now()
+        time.sleep(0.01)
+        with patch('sys.stdout', new_callable=io.StringIO):
+            cli.main(['--user', 'leader', 'set-status', '--project', project_id, '--task', task_id, '--status', 'DONE'])
+        for as_of, status in ((before.isoformat(), 'TODO'), (datetime.now().isoformat(), 'DONE')):
+            with patch('sys.stdout', new_callable=io.StringIO) as out:
+                cli.main(['--user', 'leader', '--format', 'json', 'board', '--project', project_id, '--as-of', as_of])
+            self.assertEqual(json.loads(out.getvalue())[0]['status'], status, "Test 5: Wrong past board")
+
+    @patch('cli.getpass', return_value='password')
+    def test_6_batch_holds_projects_lock_until_saved(self, mock_getpass):
+        held = []
+
+        def lines():
+            with open(f"{PROJECTS_FILE}.lock", 'a') as f:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    held.append(False)
+                except BlockingIOError:
+                    held.append(True)
+            yield "create-project --title 'Batch project'\n"
+
+        with patch('sys.stdin', lines()), patch('sys.stdout', new_callable=io.StringIO):
+            self.assertEqual(cli.main(['--user', 'leader', 'batch', '-']), 0, "Test 6: Batch failed")
+        self.assertEqual(held, [True], "Test 6: projects.json not locked during the batch")
+        self.assertEqual(len(load_data(PROJECTS_FILE)), 1, "Test 6: Batch not saved")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,280 @@
+import copy
+from array import array
+from collections import Counter
+from datetime import datetime
+from itertools import compress
+
+import bulk_io
+import changefeed
+import main
+from main import Priority, Status, file_stamp
+
+# Columnar task table
+#
+# A read-only copy of every task in projects.json laid out for scans: one
+# array per field, one element per task row.
+#
+#   project         project code; project_leader maps it to a leader name code
+#   status          Status code (index into STATUSES)
+#   priority        Priority code (index into PRIORITIES)
+#   start, end      epoch seconds
+#   title_offset    UTF-8 byte offset and length into the title pool
+#   title_length
+#   assignee_start  slice of assignee_codes holding the row's assignee name codes
+#   assignee_count
+#   live            0 once the row has been superseded or deleted
+#
+# Names and project ids are dictionary-encoded. The table is built once from
+# the file, then kept current by refresh(), which applies the change feed
+# since the last build. Rows are never edited in place: a changed task gets a
+# new row and the old one is marked dead, and dead rows are dropped by an
+# in-memory compaction once they make up half the table.
+
+STATUSES = list(Status)
+PRIORITIES = list(Priority)
+STATUS_CODES = {status.value: code for code, status in enumerate(STATUSES)}
+PRIORITY_CODES = {priority.value: code for code, priority in enumerate(PRIORITIES)}
+ROW_FIELDS = ('title', 'status', 'priority', 'start_time', 'end_time')
+
+
+def _epoch(value):
+    return datetime.fromisoformat(value).timestamp()
+
+
+class Dictionary:
+    """Gives each distinct value a small integer code."""
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class StringPool:
+    """Append-only UTF-8 buffer; strings are addressed by (offset, length)."""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def add(self, text):
+        encoded = text.encode()
+        offset = len(self.data)
+        self.data += encoded
+        return offset, len(encoded)
+
+    def get(self, offset, length):
+        return self.data[offset:offset + length].decode()
+
+
+class TaskColumns:
+    """Columnar view of all tasks, for reporting across projects."""
+
+    def __init__(self, file=None):
+        self.file = file or main.PROJECTS_FILE
+        self._reset()
+
+    def _reset(self):
+        self.names = Dictionary()
+        self.projects = Dictionary()
+        self.project_leader = array('i')
+        self.titles = StringPool()
+        self.project = array('I')
+        self.status = array('b')
+        self.priority = array('b')
+        self.start = array('d')
+        self.end = array('d')
+        self.title_offset = array('Q')
+        self.title_length = array('I')
+        self.assignee_start = array('Q')
+        self.assignee_count = array('H')
+        self.assignee_codes = array('I')
+        self.live = array('b')
+        self.rows = {}
+        self.dead = 0
+        self.cursor = 0
+        self.stamp = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    # Loading
+
+    def build(self):
+        """(Re)build the table from projects.json, streaming one project at a time."""
+        self._reset()
+        self.cursor = changefeed.last_seq()
+        self.stamp = file_stamp(self.file)
+        for project in bulk_io.iter_projects(self.file):
+            self._add_project(project)
+        return self
+
+    def _add_project(self, project):
+        code = self.projects.encode(project['id'])
+        leader = self.names.encode(project['leader'])
+        if code == len(self.project_leader):
+            self.project_leader.append(leader)
+        else:
+            self.project_leader[code] = leader
+        for task in project['tasks']:
+            self._add_task(code, task)
+
+    def _add_task(self, project, task):
+        self._kill(task['id'])
+        offset, length = self.titles.add(task['title'])
+        self._append(task['id'], project, STATUS_CODES[task['status']], PRIORITY_CODES[task['priority']],
+                     _epoch(task['start_time']), _epoch(task['end_time']), offset, length,
+                     [self.names.encode(name) for name in task['assignees']])
+
+    def _append(self, task_id, project, status, priority, start, end, title_offset, title_length, assignees):
+        self.rows[task_id] = len(self.live)
+        self.project.append(project)
+        self.status.append(status)
+        self.priority.append(priority)
+        self.start.append(start)
+        self.end.append(end)
+        self.title_offset.append(title_offset)
+        self.title_length.append(title_length)
+        self.assignee_start.append(len(self.assignee_codes))
+        self.assignee_count.append(len(assignees))
+        self.assignee_codes.extend(assignees)
+        self.live.append(1)
+
+    def _kill(self, task_id):
+        row = self.rows.pop(task_id, None)
+        if row is not None:
+            self.live[row] = 0
+            self.dead += 1
+        return row
+
+    def _assignees(self, row):
+        start = self.assignee_start[row]
+        return self.assignee_codes[start:start + self.assignee_count[row]].tolist()
+
+    def _replace(self, task_id, field=None, value=None, assignees=None):
+        """Supersede a task's row with a copy that has one field changed."""
+        row = self._kill(task_id)
+        if row is None:
+            return
+        values = {
+            'status': self.status[row], 'priority': self.priority[row], 'start_time': self.start[row],
+            'end_time': self.end[row], 'title': (self.title_offset[row], self.title_length[row])
+        }
+        if field == 'title':
+            value = self.titles.add(value)
+        elif field == 'status':
+            value = STATUS_CODES[value]
+        elif field == 'priority':
+            value = PRIORITY_CODES[value]
+        elif field in ('start_time', 'end_time'):
+            value = _epoch(value)
+        if field is not None:
+            values[field] = value
+        self._append(task_id, self.project[row], values['status'], values['priority'], values['start_time'],
+                     values['end_time'], *values['title'], assignees if assignees is not None else self._assignees(row))
+
+    def _kill_project(self, project_id):
+        code = self.projects.codes.get(project_id)
+        if code is None:
+            return
+        for task_id, row in list(self.rows.items()):
+            if self.project[row] == code:
+                self._kill(task_id)
+
+    # Incremental refresh
+
+    def refresh(self):
+        """Apply the change feed since the last build or refresh and return how many events were applied.
+
+        Applying an event is idempotent, so events that were already in the
+        file when the table was built do no harm. If projects.json changed
+        without any new feed events (a writer that doesn't emit them), the
+        table is rebuilt instead.
+        """
+        if file_stamp(self.file) != self.stamp and changefeed.last_seq() == self.cursor:
+            self.build()
+            return 0
+        applied = 0
+        while True:
+            events, self.cursor = changefeed.read(self.cursor, 1000)
+            for event in events:
+                self._apply(event)
+            applied += len(events)
+            if len(events) < 1000:
+                break
+        self.stamp = file_stamp(self.file)
+        if self.dead and self.dead * 2 >= len(self.live):
+            self.compact()
+        return applied
+
+    def _apply(self, event):
+        op, data, task_id = event['op'], event['data'], event['task_id']
+        if op == 'project.create':
+            self._kill_project(event['project_id'])
+            self._add_project(data['project'])
+        elif op == 'project.delete':
+            self._kill_project(event['project_id'])
+        elif op == 'project.reload':
+            self._kill_project(event['project_id'])
+            for project in bulk_io.iter_projects(self.file):
+                if project['id'] == event['project_id']:
+                    self._add_project(project)
+        elif op == 'task.create' and event['project_id'] in self.projects.codes:
+            self._add_task(self.projects.codes[event['project_id']], data['task'])
+        elif op == 'task.delete':
+            self._kill(task_id)
+        elif op == 'task.update' and data['field'] in ROW_FIELDS:
+            self._replace(task_id, data['field'], data['new'])
+        elif op in ('task.assign', 'task.unassign') and task_id in self.rows:
+            assignees = self._assignees(self.rows[task_id])
+            code = self.names.encode(data['assignee'])
+            if op == 'task.assign' and code not in assignees:
+                assignees.append(code)
+            elif op == 'task.unassign' and code in assignees:
+                assignees.remove(code)
+            self._replace(task_id, assignees=assignees)
+
+    def compact(self):
+        """Drop dead rows, rewriting the arrays and the title pool."""
+        old = copy.copy(self)
+        self.titles = StringPool()
+        for name in ('project', 'status', 'priority', 'start', 'end', 'title_offset', 'title_length',
+                     'assignee_start', 'assignee_count', 'assignee_codes', 'live'):
+            setattr(self, name, array(getattr(old, name).typecode))
+        self.rows = {}
+        self.dead = 0
+        for task_id, row in sorted(old.rows.items(), key=lambda item: item[1]):
+            offset, length = self.titles.add(old.title(row))
+            self._append(task_id, old.project[row], old.status[row], old.priority[row], old.start[row],
+                         old.end[row], offset, length, old._assignees(row))
+
+    # Queries
+
+    def title(self, row):
+        return self.titles.get(self.title_offset[row], self.title_length[row])
+
+    def count_by_status_per_leader(self):
+        """Return {leader: {Status: count}} over all live tasks."""
+        leaders = map(self.project_leader.__getitem__, self.project)
+        counts = Counter(compress(zip(leaders, self.status), self.live))
+        result = {}
+        for (leader, status), count in counts.items():
+            result.setdefault(self.names.values[leader], {})[STATUSES[status]] = count
+        return result
+
+    def count_by_status_per_assignee(self):
+        """Return {assignee: {Status: count}} over all live tasks."""
+        counts = Counter()
+        codes = self.assignee_codes
+        for start, count, status in compress(zip(self.assignee_start, self.assignee_count, self.status), self.live):
+            for code in codes[start:start + count]:
+                counts[code, status] += 1
+        result = {}
+        for (assignee, status), count in counts.items():
+            result.setdefault(self.names.values[assignee], {})[STATUSES[status]] = count
+        return result
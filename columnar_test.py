@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+from collections import Counter
+
+import changefeed
+import passwords
+from columnar import TaskColumns
+from main import Project, Task, Status, save_data, PROJECTS_FILE
+
+class TestTaskColumns(unittest.TestCase):
+
+    def setUp(self):
+        self.old_cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        passwords._config = None
+        self.projects = [
+            Project('p1', 'One', 'alice', ['alice', 'bob'],
+                    [Task(title=f'A{i}', status=list(Status)[i % 3], assignees=['bob']) for i in range(6)]),
+            Project('p2', 'Two', 'carol', ['carol'], [Task(title='C0', status=Status.DONE)]),
+        ]
+        save_data([project.to_dict() for project in self.projects], PROJECTS_FILE)
+
+    def tearDown(self):
+        changefeed.purge()
+        passwords._config = None
+        os.chdir(self.old_cwd)
+        self.tmp.cleanup()
+
+    def _expected(self):
+        result = {}
+        for project in self.projects:
+            counts = Counter(task.status for task in project.tasks)
+            if counts:
+                result.setdefault(project.leader, Counter()).update(counts)
+        return {leader: dict(counts) for leader, counts in result.items()}
+
+    def test_1_build_matches_objects(self):
+        columns = TaskColumns().build()
+        self.assertEqual(len(columns), 7, "Test 1: Wrong number of rows")
+        self.assertEqual(columns.count_by_status_per_leader(), self._expected(), "Test 1: Counts per leader wrong")
+        self.assertEqual(columns.count_by_status_per_assignee(),
+                         {'bob': {Status.BACKLOG: 2, Status.TODO: 2, Status.DOING: 2}}, "Test 1: Counts per assignee wrong")
+        self.assertEqual(columns.title(columns.rows[self.projects[1].tasks[0].id]), 'C0', "Test 1: Title not pooled")
+
+    def test_2_refresh_applies_feed(self):
+        columns = TaskColumns().build()
+        one, two = self.projects
+        for task in one.tasks[:4]:
+            task.change_status('alice', Status.DONE)
+        one.tasks[0].rename('alice', 'Renamed')
+        one.tasks[1].unassign_user('alice', 'bob')
+        one.add_task(Task(title='New', assignees=['dave']), 'alice')
+        two.remove_task(two.tasks[0].id, 'carol')
+
+        self.assertEqual(columns.refresh(), 8, "Test 2: Events not applied")
+        self.assertEqual(columns.count_by_status_per_leader(), self._expected(), "Test 2: Counts not refreshed")
+        self.assertEqual(columns.count_by_status_per_assignee()['bob'][Status.DONE], 3, "Test 2: Unassign not applied")
+        self.assertEqual(columns.dead, 0, "Test 2: Dead rows not compacted")
+        self.assertEqual(columns.title(columns.rows[one.tasks[0].id]), 'Renamed', "Test 2: Title lost in compaction")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,276 @@
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+from datetime import datetime
+from time import perf_counter_ns
+
+# Hot-path instrumentation
+#
+# Times storage (load_data, save_data, Project._update_project),
+# serialization (to_dict/from_dict of projects and tasks), log_message and
+# table rendering, recording per operation a latency histogram and, where it
+# means something, a byte count (file sizes read and written, log bytes).
+#
+# Switching it on replaces those functions with timing wrappers, in the app
+# module and in every module that imported them by name; switching it off
+# puts the originals back, so when off it costs nothing at all.
+#
+# Histograms are HDR-style: a value in nanoseconds falls in a bucket keyed by
+# its power of two and its top SUB_BITS bits, so every recorded latency is
+# kept to within 1/2**(SUB_BITS - 1) of its value whatever its magnitude,
+# in a few hundred buckets at most. Counts are merged into stats.json when
+# instrumentation is switched off, when the stats are viewed and at exit;
+# stats.json also remembers whether it is on, for the next start.
+
+STATS_FILE = 'stats.json'
+SUB_BITS = 7
+PERCENTILES = (50, 90, 99)
+
+
+class Histogram:
+    """Log-linear latency histogram with a byte counter."""
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+        self.bytes = 0
+
+    @staticmethod
+    def bucket(value):
+        shift = max(value.bit_length() - SUB_BITS, 0)
+        return (shift << SUB_BITS) | (value >> shift)
+
+    @staticmethod
+    def value(bucket):
+        """Midpoint of the values a bucket holds."""
+        shift, top = bucket >> SUB_BITS, bucket & ((1 << SUB_BITS) - 1)
+        return (top << shift) + ((1 << shift) >> 1)
+
+    def record(self, value, size=None):
+        key = self.bucket(value)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if size:
+            self.bytes += size
+
+    def merge(self, other):
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        self.max = max(self.max, other.max)
+        self.bytes += other.bytes
+
+    def percentile(self, percent):
+        if not self.count:
+            return 0
+        rank = max(1, -(-self.count * percent // 100))
+        seen = 0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen >= rank:
+                return min(max(self.value(key), self.min), self.max)
+        return self.max
+
+    def to_dict(self):
+        return {'count': self.count, 'total_ns': self.total, 'min_ns': self.min, 'max_ns': self.max,
+                'bytes': self.bytes, 'buckets': {str(key): count for key, count in sorted(self.buckets.items())}}
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls()
+        histogram.buckets = {int(key): count for key, count in data['buckets'].items()}
+        histogram.count, histogram.total = data['count'], data['total_ns']
+        histogram.min, histogram.max, histogram.bytes = data['min_ns'], data['max_ns'], data['bytes']
+        return histogram
+
+
+def _file_size(position):
+    def size(args, result):
+        try:
+            return os.path.getsize(args[position])
+        except (OSError, IndexError, TypeError):
+            return None
+    return size
+
+
+def _message_size(args, result):
+    return len(args[0].encode()) + 1 if args else None
+
+
+# (owner in the app module, attribute, operation name, byte counter)
+TARGETS = [
+    (None, 'load_data', 'load_data', _file_size(0)),
+    (None, 'save_data', 'save_data', _file_size(1)),
+    (None, 'log_message', 'log_message', _message_size),
+    ('Project', '_update_project', 'Project._update_project', None),
+    ('Project', 'to_dict', 'Project.to_dict', None),
+    ('Project', 'from_dict', 'Project.from_dict', None),
+    ('Task', 'to_dict', 'Task.to_dict', None),
+    ('Task', 'from_dict', 'Task.from_dict', None),
+    (None, 'page_table', 'render.page_table', None),
+    (None, 'board_table', 'render.board_table', None),
+    (None, 'print_cached', 'render.print_cached', None),
+]
+
+_lock = threading.Lock()
+_histograms = {}
+_installed = []
+_atexit = []
+
+
+def record(operation, elapsed, size=None):
+    with _lock:
+        histogram = _histograms.get(operation)
+        if histogram is None:
+            histogram = _histograms[operation] = Histogram()
+        histogram.record(elapsed, size)
+
+
+def _timed(operation, fn, size):
+    @functools.wraps(fn)
+    def timed(*args, **kwargs):
+        start = perf_counter_ns()
+        result = fn(*args, **kwargs)
+        elapsed = perf_counter_ns() - start
+        record(operation, elapsed, size(args, result) if size is not None else None)
+        return result
+    timed.__wrapped__ = fn
+    return timed
+
+
+def _aliases(original, replacement):
+    """Point every loaded module attribute bound to `original` at `replacement`."""
+    for module in list(sys.modules.values()):
+        namespace = getattr(module, '__dict__', None)
+        if not namespace:
+            continue
+        for name, value in list(namespace.items()):
+            if value is original:
+                setattr(module, name, replacement)
+
+
+def _app():
+    return sys.modules.get('main') or sys.modules['__main__']
+
+
+def enabled():
+    return bool(_installed)
+
+
+def enable(app=None):
+    """Wrap the hot paths of the app module (default: main) with timing."""
+    if _installed:
+        return
+    app = app or _app()
+    for owner, attribute, operation, size in TARGETS:
+        target = getattr(app, owner) if owner else app
+        original = target.__dict__[attribute] if owner else getattr(app, attribute)
+        if isinstance(original, classmethod):
+            wrapped = classmethod(_timed(operation, original.__func__, size))
+        else:
+            wrapped = _timed(operation, original, size)
+        if owner:
+            setattr(target, attribute, wrapped)
+        else:
+            _aliases(original, wrapped)
+        _installed.append((target, attribute, original, wrapped))
+    if not _atexit:
+        atexit.register(flush)
+        _atexit.append(True)
+    set_enabled(True)
+
+
+def disable():
+    """Restore the original functions and merge what was recorded into stats.json."""
+    while _installed:
+        target, attribute, original, wrapped = _installed.pop()
+        if isinstance(target, type):
+            setattr(target, attribute, original)
+        else:
+            _aliases(wrapped, original)
+    flush(enabled=False)
+
+
+def start_if_enabled(app=None):
+    """Switch instrumentation on at start-up if it was left on."""
+    if os.path.exists(STATS_FILE) and load().get('enabled'):
+        enable(app)
+
+
+def load():
+    if not os.path.exists(STATS_FILE):
+        return {'enabled': False, 'since': None, 'operations': {}}
+    with open(STATS_FILE, 'r') as f:
+        return json.load(f)
+
+
+def _write(stats):
+    tmp_file = f"{STATS_FILE}.tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(stats, f, indent=4)
+    os.replace(tmp_file, STATS_FILE)
+
+
+def set_enabled(on):
+    """Record in stats.json whether instrumentation is on, as start_if_enabled() reads it."""
+    stats = load()
+    stats['enabled'] = on
+    stats['since'] = stats.get('since') or datetime.now().isoformat()
+    _write(stats)
+
+
+def flush(enabled=None):
+    """Merge this process's histograms into stats.json and start over."""
+    with _lock:
+        pending = dict(_histograms)
+        _histograms.clear()
+    if not pending and enabled is None:
+        return
+    stats = load()
+    if enabled is not None:
+        stats['enabled'] = enabled
+    stats['since'] = stats.get('since') or datetime.now().isoformat()
+    for operation, histogram in pending.items():
+        saved = stats['operations'].get(operation)
+        if saved is not None:
+            histogram.merge(Histogram.from_dict(saved))
+        stats['operations'][operation] = histogram.to_dict()
+    _write(stats)
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+    _write({'enabled': enabled(), 'since': datetime.now().isoformat(), 'operations': {}})
+
+
+def summary():
+    """Return [(operation, count, mean_ms, p50_ms, p90_ms, p99_ms, max_ms, bytes)] from stats.json."""
+    flush()
+    rows = []
+    for operation, data in sorted(load()['operations'].items()):
+        histogram = Histogram.from_dict(data)
+        rows.append((operation, histogram.count, histogram.total / histogram.count / 1e6,
+                     *(histogram.percentile(p) / 1e6 for p in PERCENTILES), histogram.max / 1e6, histogram.bytes))
+    return rows
+
+
+def format_bytes(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
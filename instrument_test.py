@@ -0,0 +1,61 @@
+import os
+import random
+import tempfile
+import unittest
+
+import instrument
+import main
+from instrument import Histogram
+from main import Project, Task, load_data, save_data, PROJECTS_FILE
+
+class TestInstrument(unittest.TestCase):
+
+    def setUp(self):
+        self.old_cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+
+    def tearDown(self):
+        instrument.disable()
+        os.chdir(self.old_cwd)
+        self.tmp.cleanup()
+
+    def test_1_histogram_percentiles_within_precision(self):
+        rng = random.Random(1)
+        values = sorted(int(rng.lognormvariate(10, 2)) + 1 for _ in range(5000))
+        histogram = Histogram()
+        for value in values:
+            histogram.record(value)
+        histogram = Histogram.from_dict(histogram.to_dict())
+        for percent in (50, 90, 99, 100):
+            exact = values[-(-len(values) * percent // 100) - 1]
+            self.assertAlmostEqual(histogram.percentile(percent) / exact, 1, delta=2 / 2 ** instrument.SUB_BITS,
+                                   msg=f"Test 1: p{percent} outside histogram precision")
+
+    def test_2_switched_on_and_off_at_runtime(self):
+        originals = (main.load_data, main.Project.to_dict, main.Project.__dict__['from_dict'])
+        instrument.enable(main)
+        self.assertIsNot(main.load_data, originals[0], "Test 2: load_data not wrapped")
+        self.assertIs(load_data, main.load_data, "Test 2: Imported name not wrapped")
+        save_data([Project('p1', 'Project', 'leader', ['leader'], [Task(title='T1')]).to_dict()], PROJECTS_FILE)
+        project = main.Project.from_dict(main.load_data(PROJECTS_FILE)[0])
+        project.tasks[0].to_dict()
+        main.log_message("hello")
+        instrument.disable()
+        self.assertEqual((main.load_data, main.Project.to_dict, main.Project.__dict__['from_dict']), originals,
+                         "Test 2: Originals not restored")
+
+        operations = instrument.load()['operations']
+        for operation in ('load_data', 'Project.from_dict', 'Task.from_dict', 'Task.to_dict', 'log_message'):
+            self.assertGreaterEqual(operations[operation]['count'], 1, f"Test 2: {operation} not timed")
+        self.assertEqual(operations['load_data']['bytes'], os.path.getsize(PROJECTS_FILE), "Test 2: Bytes read not counted")
+        self.assertEqual(operations['log_message']['bytes'], len("hello\n"), "Test 2: Bytes logged not counted")
+        self.assertFalse(instrument.load()['enabled'], "Test 2: Disabled state not saved")
+
+        main.load_data(PROJECTS_FILE)
+        self.assertEqual(instrument.load()['operations']['load_data']['count'], 1, "Test 2: Timed while off")
+        instrument.reset()
+        self.assertEqual(instrument.summary(), [], "Test 2: Statistics not reset")
+
+if __name__ == '__main__':
+    unittest.main()
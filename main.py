@@ -1,13 +1,21 @@
+import gc
+import glob
+import hashlib
 import json
 import os
+import sys
 import uuid
 import re
-import hashlib
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime , timedelta
 from enum import Enum
-from rich.console import Console
-from rich.table import Table
 from getpass import getpass
+from passwords import hash_password, verify_password, needs_rehash
+import sessions
+import changefeed
+import instrument
 
 
 
@@ -16,13 +24,58 @@ ADMIN_FILE = 'admin.json'
 USERS_FILE = 'users.json'
 PROJECTS_FILE = 'projects.json'
 LOG_FILE = 'log.log'
-console = Console()
+
+# rich is only imported the first time something is printed, so scripted
+# commands that never render a table don't pay for it at startup.
+class LazyConsole:
+    """Stands in for a rich Console, creating it on first use."""
+
+    def __init__(self):
+        self._console = None
+
+    def __getattr__(self, name):
+        if self._console is None:
+            from rich.console import Console
+            self._console = Console()
+        return getattr(self._console, name)
+
+def Table(*args, **kwargs):
+    from rich.table import Table
+    return Table(*args, **kwargs)
+
+console = LazyConsole()
 
 # Utility Functions
+_log_state = threading.local()
+
 def log_message(message):
+    buffer = getattr(_log_state, 'buffer', None)
+    if buffer is not None:
+        buffer.append(message)
+        return
     with open(LOG_FILE, 'a') as f:
         f.write(f"{message}\n")
 
+@contextmanager
+def log_batch():
+    """Buffer log_message calls made in this thread and write them in one flush.
+
+    If the block raises, the buffered messages are dropped instead.
+    """
+    if getattr(_log_state, 'buffer', None) is not None:
+        yield
+        return
+    _log_state.buffer = []
+    try:
+        yield
+    except BaseException:
+        _log_state.buffer = None
+        raise
+    messages, _log_state.buffer = _log_state.buffer, None
+    if messages:
+        with open(LOG_FILE, 'a') as f:
+            f.write("".join(f"{message}\n" for message in messages))
+
 def load_data(file):
     if os.path.exists(file):
         with open(file, 'r') as f:
@@ -33,8 +86,51 @@ def save_data(data, file):
     with open(file, 'w') as f:
         json.dump(data, f, indent=4)
 
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
+_held_locks = threading.local()
+
+@contextmanager
+def projects_locked(file=None):
+    """Hold an exclusive lock on a projects file across processes, re-entrant per thread.
+
+    Taken by writers around their read-modify-write of projects.json and by
+    the first snapshot cut, which reads the whole file.
+    """
+    path = os.path.abspath(f"{file or PROJECTS_FILE}.lock")
+    held = getattr(_held_locks, 'paths', None)
+    if held is None:
+        held = _held_locks.paths = set()
+    if path in held:
+        yield
+        return
+    with open(path, 'a') as f, changefeed.file_lock(f):
+        held.add(path)
+        try:
+            yield
+        finally:
+            held.discard(path)
+
+@contextmanager
+def gc_paused():
+    """Suspend the cyclic garbage collector while building many acyclic objects.
+
+    Loading allocates objects faster than they die, which otherwise triggers
+    repeated full collections that rescan everything loaded so far.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+def file_stamp(file):
+    path = os.path.abspath(file)
+    try:
+        st = os.stat(path)
+        return (path, st.st_mtime_ns, st.st_size)
+    except FileNotFoundError:
+        return (path, None, None)
 
 def is_valid_email(email):
     email_regex = re.compile(r"(^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$)")
@@ -54,12 +150,156 @@ class Status(Enum):
     DONE = "DONE"
     ARCHIVED = "ARCHIVED"
 
+# Paging
+#
+# Long listings are shown a page at a time. Only the rows of the visible page
+# are turned into a Table; column widths come from an evenly spaced sample of
+# all rows, so they stay put between pages and rendering a page costs the same
+# whatever the size of the listing.
+PAGE_SIZE = 20
+WIDTH_SAMPLE = 200
+MAX_COLUMN_WIDTH = 40
+
+PRIORITY_ORDER = {priority: index for index, priority in enumerate(Priority)}
+STATUS_ORDER = {status: index for index, status in enumerate(Status)}
+TASK_SORT_KEYS = {
+    'priority': lambda task: PRIORITY_ORDER[task.priority],
+    'status': lambda task: STATUS_ORDER[task.status],
+    'end_time': lambda task: task.end_time,
+}
+
+def sample_widths(columns, items, row, sample=WIDTH_SAMPLE):
+    widths = [len(name) for name, _ in columns]
+    step = max(len(items) // sample, 1)
+    for index in range(0, len(items), step):
+        for i, cell in enumerate(row(index, items[index])):
+            widths[i] = min(max(widths[i], len(cell)), MAX_COLUMN_WIDTH)
+    return widths
+
+def page_table(title, columns, items, row, page=0, page_size=PAGE_SIZE, widths=None):
+    """Build a Table holding only the rows of one page."""
+    widths = widths or sample_widths(columns, items, row)
+    table = Table(title=title, show_lines=True)
+    for (name, style), width in zip(columns, widths):
+        table.add_column(name, style=style, width=width, overflow="ellipsis", no_wrap=True)
+    start = page * page_size
+    for index in range(start, min(start + page_size, len(items))):
+        table.add_row(*row(index, items[index]))
+    return table
+
+def page_through(title, columns, items, row, sort_keys=None, page_size=PAGE_SIZE):
+    """Show items page by page until the user is done, and return them in display order.
+
+    Navigation: n/p for next/previous page, 'size N' to change the page
+    size and, when sort_keys are given, 'sort FIELD' to reorder.
+    """
+    items = list(items)
+    widths = sample_widths(columns, items, row)
+    page = 0
+    while True:
+        pages = max((len(items) + page_size - 1) // page_size, 1)
+        page = min(page, pages - 1)
+        console.print(page_table(title, columns, items, row, page, page_size, widths))
+        if pages == 1 and not sort_keys:
+            return items
+        commands = "n: next, p: previous, size N"
+        if sort_keys:
+            commands += f", sort {'/'.join(sort_keys)}"
+        command = input(f"Page {page + 1}/{pages} ({commands}, Enter: done): ").strip().lower().split()
+        if not command:
+            return items
+        if command[0] == 'n' and page < pages - 1:
+            page += 1
+        elif command[0] == 'p' and page > 0:
+            page -= 1
+        elif command[0] == 'size' and len(command) == 2 and command[1].isdigit() and int(command[1]) > 0:
+            page_size = int(command[1])
+        elif command[0] == 'sort' and sort_keys and len(command) == 2 and command[1] in sort_keys:
+            items.sort(key=sort_keys[command[1]])
+            page = 0
+        else:
+            console.print("Invalid command!", style="bold red")
+
+# Identity store
+class IdentityStore:
+    """One username/email index over users.json and admin.json.
+
+    Records keep their 'role' column and are written back to the file they
+    came from, so both files stay readable by older tools.
+    """
+
+    def __init__(self):
+        self.tables = {USERS_FILE: [], ADMIN_FILE: []}
+        self.by_username = {}
+        self.by_email = {}
+        self.files = {}
+        self.stamp = None
+        self.lock = threading.RLock()
+
+    @staticmethod
+    def _file_stamp():
+        return (file_stamp(USERS_FILE), file_stamp(ADMIN_FILE))
+
+    def load(self):
+        self.__init__()
+        for file, default_role in ((USERS_FILE, 'user'), (ADMIN_FILE, 'admin')):
+            table = load_data(file)
+            self.tables[file] = table
+            for record in table:
+                record.setdefault('role', default_role)
+                self._index(record, file)
+        self.stamp = self._file_stamp()
+        return self
+
+    def _index(self, record, file):
+        self.by_username[record['username']] = record
+        if record.get('email'):
+            self.by_email[record['email']] = record
+        self.files[record['username']] = file
+
+    def _save(self, file):
+        save_data(self.tables[file], file)
+        self.stamp = self._file_stamp()
+
+    def find(self, username):
+        return self.by_username.get(username)
+
+    def find_by_email(self, email):
+        return self.by_email.get(email)
+
+    def add(self, record):
+        file = ADMIN_FILE if record['role'] == 'admin' else USERS_FILE
+        with self.lock:
+            self.tables[file].append(record)
+            self._index(record, file)
+            self._save(file)
+
+    def update(self, username, **fields):
+        with self.lock:
+            record = self.by_username[username]
+            record.update(fields)
+            self._save(self.files[username])
+            return record
+
+_identity_store = None
+_identity_store_lock = threading.Lock()
+
+def identity_store():
+    """Return the cached identity store, reloading it only if either file changed on disk."""
+    global _identity_store
+    with _identity_store_lock:
+        if _identity_store is None or _identity_store.stamp != IdentityStore._file_stamp():
+            _identity_store = IdentityStore().load()
+        return _identity_store
+
 # Classes
 class User:
-    def __init__(self, username, email, password, role='user', active=True):
+    __slots__ = ('username', 'email', 'password', 'role', 'active')
+
+    def __init__(self, username, email, password, role='user', active=True, hashed=False):
         self.username = username
         self.email = email
-        self.password = hash_password(password)
+        self.password = password if hashed else hash_password(password)
         self.role = role
         self.active = active
 
@@ -75,17 +315,16 @@ class User:
     @classmethod
     def from_dict(cls, data):
         return cls(
-            username=data['username'],
+            username=sys.intern(data['username']),
             email=data['email'],
             password=data['password'],
             role=data['role'],
-            active=data['active']
+            active=data['active'],
+            hashed=True
         )
 
     @classmethod
     def register(cls):
-        users = load_data(USERS_FILE)
-        
         while True:
             email = input("Email: ")
             if not is_valid_email(email):
@@ -95,16 +334,16 @@ class User:
             username = input("Username: ")
             password = getpass("Password: ")
 
-            if any(user['email'] == email for user in users):
+            store = identity_store()
+            if store.find_by_email(email):
                 console.print("Email already exists!", style="bold red")
                 continue
-            if any(user['username'] == username for user in users):
+            if store.find(username):
                 console.print("Username already exists!", style="bold red")
                 continue
 
             user = cls(username, email, password)
-            users.append(user.to_dict())
-            save_data(users, USERS_FILE)
+            store.add(user.to_dict())
             log_message(f"User registered with username: {username}")
             console.print(f"User {username} registered successfully!", style="bold green")
             break
@@ -112,22 +351,17 @@ class User:
     @classmethod
     def login(cls):
         while True:
-            users = load_data(USERS_FILE)
-            admins = load_data(ADMIN_FILE)
             username = input("Username: ")
 
-            all_users = users + admins
-
-            user_data = next((user for user in all_users if user['username'] == username), None)
+            user_data = identity_store().find(username)
             if user_data is None:
                 console.print("Username not found!", style="bold red")
                 log_message(f"Failed login attempt with non-existent username: {username}")
                 continue
 
             password = getpass("Password: ")
-            hashed_password = hash_password(password)
 
-            if user_data['password'] != hashed_password:
+            if not verify_password(password, user_data['password']):
                 console.print("Incorrect password!", style="bold red")
                 log_message(f"Failed login attempt for username: {username} with incorrect password")
                 continue
@@ -137,56 +371,75 @@ class User:
                 log_message(f"Failed login attempt for inactive user: {username}")
                 return None
 
+            if needs_rehash(user_data['password']):
+                identity_store().update(username, password=hash_password(password))
+                log_message(f"Password hash upgraded for user: {username}")
+
             user = cls.from_dict(user_data)
+            sessions.issue_token(user.username, user.email, user.role)
             console.print(f"Welcome {username}! (role: {user.role})", style="bold green")
             log_message(f"User {username} logged in successfully with role: {user.role}")
             return user
 
+    @classmethod
+    def resume(cls, username=None, token=None):
+        """Rebuild a logged-in user from a cached session token, without touching the user tables."""
+        payload = sessions.resume(username, token)
+        if payload is None:
+            return None
+        user_cls = Admin if payload['role'] == 'admin' else cls
+        user = user_cls(payload['username'], payload['email'], None, role=payload['role'], hashed=True)
+        log_message(f"User {user.username} resumed a session with role: {user.role}")
+        return user
+
+    def logout(self):
+        sessions.revoke(self.username)
+        log_message(f"User {self.username} logged out")
+
 class Admin(User):
-    def __init__(self, username, email, password, role='admin', active=True):
-        super().__init__(username, email, password, role, active)
+    __slots__ = ()
+
+    def __init__(self, username, email, password, role='admin', active=True, hashed=False):
+        super().__init__(username, email, password, role, active, hashed)
 
     @classmethod
     def register_admin(cls):
-        admins = load_data(ADMIN_FILE)
-        
         while True:
             username = input("Admin Username: ")
             password = getpass("Admin Password: ")
 
-            if any(admin['username'] == username for admin in admins):
-                console.print("Admin username already exists!", style="bold red")
+            store = identity_store()
+            if store.find(username):
+                console.print("Username already exists!", style="bold red")
                 continue
 
             new_admin = cls(username, '', password)
-            admins.append(new_admin.to_dict())
-            save_data(admins, ADMIN_FILE)
+            store.add(new_admin.to_dict())
             log_message(f"Admin registered with username: {username}")
             console.print(f"Admin {username} registered successfully!", style="bold green")
             break
 
     @classmethod
     def deactivate_user(cls, username):
-        users = load_data(USERS_FILE)
-        for user in users:
-            if user['username'] == username:
-                user['active'] = False
-                save_data(users, USERS_FILE)
-                log_message(f"User {username} deactivated by admin")
-                console.print(f"User {username} deactivated successfully!", style="bold green")
-                return
+        store = identity_store()
+        user = store.find(username)
+        if user is not None and user['role'] != 'admin':
+            store.update(username, active=False)
+            sessions.revoke(username)
+            log_message(f"User {username} deactivated by admin")
+            console.print(f"User {username} deactivated successfully!", style="bold green")
+            return
         console.print("User not found!", style="bold red")
 
     @classmethod
     def activate_user(cls, username):
-        users = load_data(USERS_FILE)
-        for user in users:
-            if user['username'] == username:
-                user['active'] = True
-                save_data(users, USERS_FILE)
-                log_message(f"User {username} activated by admin")
-                console.print(f"User {username} activated successfully!", style="bold green")
-                return
+        store = identity_store()
+        user = store.find(username)
+        if user is not None and user['role'] != 'admin':
+            store.update(username, active=True)
+            log_message(f"User {username} activated by admin")
+            console.print(f"User {username} activated successfully!", style="bold green")
+            return
         console.print("User not found!", style="bold red")
 
     @classmethod
@@ -196,11 +449,225 @@ class Admin(User):
             for file in [USERS_FILE, PROJECTS_FILE, LOG_FILE]:
                 if os.path.exists(file):
                     os.remove(file)
+            remove_undo_files()
+            sessions.revoke_all()
+            changefeed.purge()
+            import snapshots
+            snapshots.purge()
             console.print("All data purged!", style="bold green")
         else:
             console.print("Purge cancelled.", style="bold red")
 
+# History and comment entries
+#
+# A project can hold millions of these, so they are slotted records rather
+# than dicts. They still read like the dicts they are stored as
+# (entry['username']) and compare equal to them.
+class Record:
+    __slots__ = ()
+    # Read-only properties that can also be looked up like keys.
+    derived = ()
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __getitem__(self, key):
+        if key not in self.__slots__ and key not in self.derived:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self.__slots__ or key in self.derived else default
+
+    def keys(self):
+        return self.__slots__
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            other = other.to_dict()
+        return isinstance(other, dict) and self.to_dict() == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+# History entries are typed events: what kind of change, which field, the
+# old and new values, who made it and when (epoch seconds). The text shown to
+# users is rendered from them. Entries written before this format held only
+# that text; they are parsed into events when loaded.
+HISTORY_TEXT = {
+    ('update', 'title'): "Task name changed to {new}",
+    ('update', 'description'): "Task description changed to {new}",
+    ('update', 'start_time'): "Task start time changed to {new_time}",
+    ('update', 'end_time'): "Task end time changed to {new_time}",
+    ('update', 'status'): "Status changed from Status.{old} to Status.{new}",
+    ('update', 'priority'): "Priority changed from Priority.{old} to Priority.{new}",
+    ('assign', 'assignees'): "User {new} assigned to task",
+    ('unassign', 'assignees'): "User {old} unassigned from task",
+    ('comment', None): "Comment added: {new}",
+    ('note', None): "{new}",
+}
+LEGACY_HISTORY = [
+    (re.compile(r"Task name changed to (?P<new>.*)", re.S), 'update', 'title'),
+    (re.compile(r"Task description changed to (?P<new>.*)", re.S), 'update', 'description'),
+    (re.compile(r"Task start time changed to (?P<new>.*)"), 'update', 'start_time'),
+    (re.compile(r"Task end time changed to (?P<new>.*)"), 'update', 'end_time'),
+    (re.compile(r"Status changed from Status\.(?P<old>\w+) to Status\.(?P<new>\w+)"), 'update', 'status'),
+    (re.compile(r"Priority changed from Priority\.(?P<old>\w+) to Priority\.(?P<new>\w+)"), 'update', 'priority'),
+    (re.compile(r"User (?P<new>.*) assigned to task"), 'assign', 'assignees'),
+    (re.compile(r"User (?P<old>.*) unassigned from task"), 'unassign', 'assignees'),
+    (re.compile(r"Comment added: (?P<new>.*)", re.S), 'comment', None),
+]
+
+class HistoryEntry(Record):
+    __slots__ = ('kind', 'field', 'old', 'new', 'actor', 'ts')
+    derived = ('username', 'change', 'timestamp')
+
+    def __init__(self, kind, field, old, new, actor, ts):
+        self.kind = kind
+        self.field = field
+        self.old = old
+        self.new = new
+        self.actor = actor
+        self.ts = ts
+
+    @classmethod
+    def from_dict(cls, data):
+        if 'kind' not in data:
+            return cls.from_legacy(data)
+        return cls(data['kind'], data['field'], data['old'], data['new'], sys.intern(data['actor']), data['ts'])
+
+    @classmethod
+    def from_legacy(cls, data):
+        """Parse an entry of the old {'username', 'change', 'timestamp'} form."""
+        kind, field, old, new = 'note', None, None, data['change']
+        for pattern, pattern_kind, pattern_field in LEGACY_HISTORY:
+            match = pattern.fullmatch(data['change'])
+            if match:
+                kind, field = pattern_kind, pattern_field
+                old, new = match.groupdict().get('old'), match.groupdict().get('new')
+                if field in ('start_time', 'end_time'):
+                    try:
+                        new = datetime.fromisoformat(new).isoformat()
+                    except ValueError:
+                        # An unreadable time: keep the entry as plain text.
+                        kind, field, old, new = 'note', None, None, data['change']
+                break
+        ts = datetime.fromisoformat(data['timestamp']).timestamp()
+        return cls(kind, field, old, new, sys.intern(data['username']), ts)
+
+    @property
+    def username(self):
+        return self.actor
+
+    @property
+    def timestamp(self):
+        return datetime.fromtimestamp(self.ts).isoformat()
+
+    @property
+    def change(self):
+        text = HISTORY_TEXT.get((self.kind, self.field), "{new}")
+        new_time = datetime.fromisoformat(self.new) if self.field in ('start_time', 'end_time') else None
+        return text.format(old=self.old, new=self.new, new_time=new_time)
+
+class Comment(Record):
+    __slots__ = ('username', 'content', 'timestamp')
+
+    def __init__(self, username, content, timestamp):
+        self.username = username
+        self.content = content
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(sys.intern(data['username']), data['content'], data['timestamp'])
+
+# Marks a LazyField whose value is still only in the task's raw record.
+UNDECODED = object()
+
+class LazyField:
+    """A Task attribute decoded from the task's raw record on first access.
+
+    The value lives in the slot named '_<name>', which holds UNDECODED until
+    the field is first read. Until then to_dict() hands back the raw value
+    without decoding it at all.
+    """
+
+    def __init__(self, decode, encode):
+        self.decode = decode
+        self.encode = encode
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.slot = owner.__dict__['_' + name]
+
+    def __get__(self, task, owner=None):
+        if task is None:
+            return self
+        value = self.slot.__get__(task, owner)
+        if value is UNDECODED:
+            value = self.decode(task._raw[self.name])
+            self.slot.__set__(task, value)
+            task._release_raw()
+        return value
+
+    def __set__(self, task, value):
+        self.slot.__set__(task, value)
+
+    def dump(self, task):
+        value = self.slot.__get__(task, Task)
+        if value is UNDECODED:
+            return task._raw[self.name]
+        return self.encode(value)
+
+def _isoformat(value):
+    return value.isoformat()
+
+def _record_dicts(records):
+    return [record.to_dict() for record in records]
+
+# Task field values as they appear in change events (the old/new of a
+# task.update), and the Task method that changes each field.
+TASK_UPDATES = {
+    'title': 'rename',
+    'description': 'change_description',
+    'start_time': 'change_start_time',
+    'end_time': 'change_end_time',
+    'status': 'change_status',
+    'priority': 'change_priority',
+}
+
+def field_value(field, text):
+    """Convert a task field value from its change event form to the attribute's type."""
+    if field == 'status':
+        return Status[text]
+    if field == 'priority':
+        return Priority[text]
+    if field in ('start_time', 'end_time'):
+        return datetime.fromisoformat(text)
+    return text
+
+def field_text(task, field):
+    """Return a task field's value in its change event form."""
+    value = getattr(task, field)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
 class Task:
+    __slots__ = ('id', 'title', 'description', '_start_time', '_end_time', 'assignees', 'priority', 'status',
+                 '_history', '_comments', 'project_id', '_raw')
+
+    # Loaded tasks keep their record in _raw; these fields are only decoded
+    # from it when something reads them.
+    start_time = LazyField(datetime.fromisoformat, _isoformat)
+    end_time = LazyField(datetime.fromisoformat, _isoformat)
+    history = LazyField(lambda entries: [HistoryEntry.from_dict(entry) for entry in entries], _record_dicts)
+    comments = LazyField(lambda comments: [Comment.from_dict(comment) for comment in comments], _record_dicts)
+
     def __init__(self, title="", description="", assignees=None, priority=Priority.LOW, status=Status.BACKLOG):
         self.id = str(uuid.uuid4())
         self.title = title
@@ -212,104 +679,172 @@ class Task:
         self.status = status
         self.history = []
         self.comments = []
+        self.project_id = None
+        self._raw = None
+
+    def _release_raw(self):
+        # Once every lazy field is decoded the raw record is no longer needed.
+        if UNDECODED not in (self._start_time, self._end_time, self._history, self._comments):
+            self._raw = None
 
     def to_dict(self):
         return {
             'id': self.id,
             'title': self.title,
             'description': self.description,
-            'start_time': self.start_time.isoformat(),
-            'end_time': self.end_time.isoformat(),
-            'assignees': self.assignees,
+            'start_time': Task.start_time.dump(self),
+            'end_time': Task.end_time.dump(self),
+            'assignees': list(self.assignees),
             'priority': self.priority.value,
             'status': self.status.value,
-            'history': self.history,
-            'comments': self.comments
+            'history': Task.history.dump(self),
+            'comments': Task.comments.dump(self)
         }
 
     @classmethod
-    def from_dict(cls, data):
-        task = cls(
-            title=data['title'],
-            description=data['description'],
-            assignees=data['assignees'],
-            priority=Priority[data['priority']],
-            status=Status[data['status']]
-        )
+    def from_dict(cls, data, project_id=None):
+        # Loading bypasses __init__, which would generate an id and read the
+        # clock only for both to be overwritten.
+        task = cls.__new__(cls)
         task.id = data['id']
-        task.start_time = datetime.fromisoformat(data['start_time'])
-        task.end_time = datetime.fromisoformat(data['end_time'])
-        task.history = data['history']
-        task.comments = data['comments']
+        task.title = data['title']
+        task.description = data['description']
+        task.assignees = [sys.intern(name) for name in data['assignees']]
+        task.priority = Priority[data['priority']]
+        task.status = Status[data['status']]
+        task._start_time = task._end_time = task._history = task._comments = UNDECODED
+        task._raw = data
+        task.project_id = project_id
         return task
 
     def add_comment(self, username, content):
-        comment = {
-            'username': username,
-            'content': content,
-            'timestamp': datetime.now().isoformat()
-        }
+        comment = Comment(username, content, datetime.now().isoformat())
         self.comments.append(comment)
         log_message(f"{username} added a comment to {self.title}: {content}")
-        self._log_history(username, f"Comment added: {content}")
+        entry = self._log_history(username, 'comment', None, None, content)
+        self._emit('task.comment', username, comment=comment, history=entry)
+
+    def rename(self, username, new_name):
+        old_name = self.title
+        self.title = new_name
+        log_message(f"Task name of {self.id} changed to {new_name} by {username}")
+        self._emit_update(username, 'title', old_name, new_name)
+
+    def change_description(self, username, new_description):
+        old_description = self.description
+        self.description = new_description
+        log_message(f"Task description of {self.id} changed to {new_description} by {username}")
+        self._emit_update(username, 'description', old_description, new_description)
+
+    def change_start_time(self, username, new_start_time):
+        old_start_time = self.start_time
+        self.start_time = new_start_time
+        log_message(f"Task start time of {self.id} changed to {new_start_time} by {username}")
+        self._emit_update(username, 'start_time', old_start_time.isoformat(), new_start_time.isoformat())
+
+    def change_end_time(self, username, new_end_time):
+        old_end_time = self.end_time
+        self.end_time = new_end_time
+        log_message(f"Task end time of {self.id} changed to {new_end_time} by {username}")
+        self._emit_update(username, 'end_time', old_end_time.isoformat(), new_end_time.isoformat())
 
     def change_status(self, username, new_status):
         old_status = self.status
         self.status = new_status
         log_message(f"{username} changed status of {self.title} from {old_status} to {new_status}")
-        self._log_history(username, f"Status changed from {old_status} to {new_status}")
+        self._emit_update(username, 'status', old_status.value, new_status.value)
 
     def change_priority(self, username, new_priority):
         old_priority = self.priority
         self.priority = new_priority
         log_message(f"{username} changed priority of {self.title} from {old_priority} to {new_priority}")
-        self._log_history(username, f"Priority changed from {old_priority} to {new_priority}")
+        self._emit_update(username, 'priority', old_priority.value, new_priority.value)
 
     def assign_user(self, username, assignee):
         if assignee not in self.assignees:
             self.assignees.append(assignee)
             log_message(f"{username} assigned {assignee} to {self.title}")
-            self._log_history(username, f"User {assignee} assigned to task")
+            entry = self._log_history(username, 'assign', 'assignees', None, assignee)
+            self._emit('task.assign', username, assignee=assignee, history=entry)
 
     def unassign_user(self, username, assignee):
         if assignee in self.assignees:
             self.assignees.remove(assignee)
             log_message(f"{username} unassigned {assignee} from {self.title}")
-            self._log_history(username, f"User {assignee} unassigned from task")
+            entry = self._log_history(username, 'unassign', 'assignees', assignee, None)
+            self._emit('task.unassign', username, assignee=assignee, history=entry)
+
+    def _log_history(self, username, kind, field, old, new):
+        entry = HistoryEntry(kind, field, old, new, username, time.time())
+        self.history.append(entry)
+        return entry
+
+    def _emit(self, op, username, **data):
+        # Tasks not attached to a project are not part of the dataset yet.
+        if self.project_id is not None:
+            data = {key: value.to_dict() if isinstance(value, Record) else value for key, value in data.items()}
+            changefeed.append(op, username, self.project_id, self.id, data)
 
-    def _log_history(self, username, change):
-        self.history.append({
-            'username': username,
-            'change': change,
-            'timestamp': datetime.now().isoformat()
-        })
+    def _emit_update(self, username, field, old, new):
+        entry = self._log_history(username, 'update', field, old, new)
+        self._emit('task.update', username, field=field, old=old, new=new, history=entry)
 
 class Project:
+    __slots__ = ('id', 'title', 'leader', 'members', '_tasks', '_task_records', 'loaded_at', 'watcher', 'undo',
+                 'version', 'render_cache')
+
     def __init__(self, id, title, leader, members=None, tasks=None):
         self.id = id
         self.title = title
         self.leader = leader
         self.members = members if members is not None else []
         self.tasks = tasks if tasks is not None else []
+        for task in self.tasks:
+            task.project_id = id
+        self.loaded_at = None
+        self.watcher = None
+        self.undo = None
+        # Bumped by every change made through this object; keys render_cache.
+        self.version = 0
+        self.render_cache = {}
+
+    def touch(self):
+        self.version += 1
+
+    @property
+    def tasks(self):
+        # A loaded project only builds its Task objects when they are first
+        # needed; listing projects never does.
+        if self._tasks is None:
+            with gc_paused():
+                self._tasks = [Task.from_dict(task, self.id) for task in self._task_records]
+            self._task_records = None
+        return self._tasks
+
+    @tasks.setter
+    def tasks(self, tasks):
+        self._tasks = tasks
+        self._task_records = None
 
     def to_dict(self):
         return {
             'id': self.id,
             'title': self.title,
             'leader': self.leader,
-            'members': self.members,
-            'tasks': [task.to_dict() for task in self.tasks]
+            'members': list(self.members),
+            'tasks': list(self._task_records) if self._tasks is None else [task.to_dict() for task in self._tasks]
         }
 
     @classmethod
     def from_dict(cls, data):
-        return cls(
+        project = cls(
             id=data['id'],
             title=data['title'],
-            leader=data['leader'],
-            members=data['members'],
-            tasks=[Task.from_dict(task) for task in data['tasks']]
+            leader=sys.intern(data['leader']),
+            members=[sys.intern(name) for name in data['members']]
         )
+        project._tasks, project._task_records = None, data['tasks']
+        return project
 
     @classmethod
     def create_project(cls, user):
@@ -318,61 +853,82 @@ class Project:
         project = cls(project_id, title, user.username)
         project.members.append(user.username)
 
-        projects = load_data(PROJECTS_FILE)
-        projects.append(project.to_dict())
-        save_data(projects, PROJECTS_FILE)
+        with projects_locked():
+            projects = load_data(PROJECTS_FILE)
+            projects.append(project.to_dict())
+            save_data(projects, PROJECTS_FILE)
+        project.emit_created(user.username)
         log_message(f"Project {project_id} created by user {user.username}")
         console.print(f"Project {project_id} created successfully!", style="bold green")
 
     @classmethod
     def list_projects(cls, user):
+        loaded_at = changefeed.last_seq()
         projects = load_data(PROJECTS_FILE)
         user_projects = [cls.from_dict(proj) for proj in projects if user.username in proj['members']]
+        for project in user_projects:
+            project.loaded_at = loaded_at
 
         if not user_projects:
             console.print("No projects found!", style="bold red")
             return None
 
-        table = Table(title="Projects", show_lines=True)
-        table.add_column("Index", style="yellow")
-        table.add_column("Title", style="magenta")
-        table.add_column("ID", style="green")
-        table.add_column("Role", style="red")
-        table.add_column("Leader", style="blue")
-        table.add_column("Members", style="cyan")
+        columns = [("Index", "yellow"), ("Title", "magenta"), ("ID", "green"), ("Role", "red"),
+                   ("Leader", "blue"), ("Members", "cyan")]
 
-        for index, project in enumerate(user_projects, start=1):
-            members = ", ".join(project.members)
+        def row(index, project):
             role = "Leader" if user.username == project.leader else "Member"
-            table.add_row(str(index), project.title, project.id, role, project.leader, members)
+            return (str(index + 1), project.title, project.id, role, project.leader, ", ".join(project.members))
 
-        console.print(table)
-        return user_projects
+        return page_through("Projects", columns, user_projects, row)
 
-    def add_member(self, username):
+    def insert_member(self, username, actor, index=None):
         if username in self.members:
+            return False
+        data = {'member': username}
+        if index is None:
+            self.members.append(username)
+        else:
+            self.members.insert(index, username)
+            data['index'] = index
+        self.touch()
+        changefeed.append('project.add_member', actor, self.id, data=data)
+        log_message(f"User {username} added to project {self.id} by {actor}")
+        return True
+
+    def drop_member(self, username, actor):
+        if username not in self.members:
+            return False
+        index = self.members.index(username)
+        self.members.remove(username)
+        self.touch()
+        changefeed.append('project.remove_member', actor, self.id, data={'member': username, 'index': index})
+        log_message(f"User {username} removed from project {self.id} by {actor}")
+        return True
+
+    def add_member(self, username):
+        if not self.insert_member(username, self.leader):
             console.print("User already a member of the project!", style="bold red")
             return
-        
-        self.members.append(username)
+
         self._update_project()
-        log_message(f"User {username} added to project {self.id} by {self.leader}")
         console.print(f"User {username} added to project {self.id} successfully!", style="bold green")
 
     def remove_member(self, username):
-        if username not in self.members:
+        if not self.drop_member(username, self.leader):
             console.print("User not a member of the project!", style="bold red")
             return
 
-        self.members.remove(username)
         self._update_project()
-        log_message(f"User {username} removed from project {self.id} by {self.leader}")
         console.print(f"User {username} removed from project {self.id} successfully!", style="bold green")
 
     def delete(self):
-        projects = load_data(PROJECTS_FILE)
-        projects = [proj for proj in projects if proj['id'] != self.id]
-        save_data(projects, PROJECTS_FILE)
+        with projects_locked():
+            projects = load_data(PROJECTS_FILE)
+            projects = [proj for proj in projects if proj['id'] != self.id]
+            save_data(projects, PROJECTS_FILE)
+        remove_undo_files(self.id)
+        self.emit_deleted(self.leader)
         log_message(f"Project {self.id} deleted by user {self.leader}")
         console.print(f"Project {self.id} deleted successfully!", style="bold green")
 
@@ -383,42 +939,178 @@ class Project:
        status = Status.BACKLOG
 
        task = Task(title=title, description=description, priority=priority, status=status)
-       self.tasks.append(task)
+       self.add_task(task, user.username)
        self._update_project()
        log_message(f"Task {task.id} created by user {user.username} in project {self.id}")
        console.print(f"Task {task.id} created successfully!", style="bold green")
        self.edit_task_info(task.id, user.username)
 
+    def get_task(self, task_id):
+        return next((task for task in self.tasks if task.id == task_id), None)
+
+    def emit_created(self, username):
+        changefeed.append('project.create', username, self.id, data={'project': self.to_dict()})
+
+    def emit_deleted(self, username):
+        changefeed.append('project.delete', username, self.id, data={'project': self.to_dict()})
+
+    def add_task(self, task, username, index=None):
+        task.project_id = self.id
+        data = {'task': task.to_dict()}
+        if index is None:
+            self.tasks.append(task)
+        else:
+            self.tasks.insert(index, task)
+            data['index'] = index
+        self.touch()
+        changefeed.append('task.create', username, self.id, task.id, data)
+
+    def remove_task(self, task_id, username):
+        index = next((i for i, t in enumerate(self.tasks) if t.id == task_id), None)
+        if index is None:
+            return None
+        task = self.tasks.pop(index)
+        self.touch()
+        changefeed.append('task.delete', username, self.id, task_id, {'task': task.to_dict(), 'index': index})
+        log_message(f"Task {task_id} deleted by {username} in project {self.id}")
+        return task
+
+    def select_tasks(self, task_ids=None, status=None, priority=None, assignee=None):
+        """Return the tasks matching every given filter; task_ids keeps the caller's selection."""
+        tasks = self.tasks
+        if task_ids is not None:
+            wanted = set(task_ids)
+            tasks = [task for task in tasks if task.id in wanted]
+        if status is not None:
+            tasks = [task for task in tasks if task.status == status]
+        if priority is not None:
+            tasks = [task for task in tasks if task.priority == priority]
+        if assignee is not None:
+            tasks = [task for task in tasks if assignee in task.assignees]
+        return tasks
+
+    def bulk_update(self, tasks, username, status=None, priority=None, assignee=None):
+        """Apply the same changes to many tasks with one project write and one log flush.
+
+        History is still recorded per task through the usual Task methods.
+        """
+        with log_batch(), changefeed.batch():
+            for task in tasks:
+                if status is not None and task.status != status:
+                    task.change_status(username, status)
+                if priority is not None and task.priority != priority:
+                    task.change_priority(username, priority)
+                if assignee is not None:
+                    task.assign_user(username, assignee)
+            log_message(f"Bulk update of {len(tasks)} task(s) in project {self.id} by {username}")
+        self._update_project()
+        return len(tasks)
+
     def list_tasks(self, user):
-        table = Table(title="Tasks", show_lines=True)
-        table.add_column("ID", style="cyan")
-        table.add_column("Title", style="magenta")
-        table.add_column("Description", style="magenta")
-        table.add_column("Priority", style="magenta")
-        table.add_column("Status", style="magenta")
+        columns = [("ID", "cyan"), ("Title", "magenta"), ("Description", "magenta"), ("Priority", "magenta"),
+                   ("Status", "magenta"), ("End Time", "magenta")]
 
-        for task in self.tasks:
-            table.add_row(task.id, task.title, task.description, task.priority.value, task.status.value)
+        def row(index, task):
+            return (task.id, task.title, task.description, task.priority.value, task.status.value,
+                    task.end_time.strftime("%Y-%m-%d %H:%M"))
 
-        console.print(table)
+        if not self.tasks:
+            console.print("No tasks found!", style="bold red")
+            return
+        page_through("Tasks", columns, self.tasks, row, TASK_SORT_KEYS)
+
+    def apply_change(self, event):
+        """Apply a change feed event from another session to this in-memory project.
+
+        Only the task named by the event is touched. Returns False for events
+        that need a full reload instead ('project.reload').
+        """
+        op, data = event['op'], event['data']
+        task = self.get_task(event['task_id']) if event['task_id'] else None
+        if op == 'task.create' and task is None:
+            task = Task.from_dict(data['task'], self.id)
+            self.tasks.insert(data.get('index', len(self.tasks)), task)
+        elif op == 'task.delete':
+            self.tasks = [t for t in self.tasks if t.id != event['task_id']]
+        elif op == 'task.update' and task is not None:
+            setattr(task, data['field'], field_value(data['field'], data['new']))
+            task.history.append(HistoryEntry.from_dict(data['history']))
+        elif op in ('task.assign', 'task.unassign') and task is not None:
+            if op == 'task.assign' and data['assignee'] not in task.assignees:
+                task.assignees.append(data['assignee'])
+            elif op == 'task.unassign' and data['assignee'] in task.assignees:
+                task.assignees.remove(data['assignee'])
+            task.history.append(HistoryEntry.from_dict(data['history']))
+        elif op == 'task.comment' and task is not None:
+            task.comments.append(Comment.from_dict(data['comment']))
+            task.history.append(HistoryEntry.from_dict(data['history']))
+        elif op == 'project.add_member' and data['member'] not in self.members:
+            self.members.insert(data.get('index', len(self.members)), data['member'])
+        elif op == 'project.remove_member' and data['member'] in self.members:
+            self.members.remove(data['member'])
+        elif op == 'project.reload':
+            return False
+        self.touch()
+        return True
+
+    def reload(self):
+        """Replace this project's state with its current record in projects.json."""
+        import bulk_io
+        data = next((p for p in bulk_io.iter_projects(PROJECTS_FILE) if p['id'] == self.id), None)
+        if data is None:
+            return False
+        fresh = Project.from_dict(data)
+        self.title, self.leader, self.members = fresh.title, fresh.leader, fresh.members
+        self._tasks, self._task_records = fresh._tasks, fresh._task_records
+        self.touch()
+        return True
 
     def _update_project(self):
-        projects = load_data(PROJECTS_FILE)
-        for i, project in enumerate(projects):
-            if project['id'] == self.id:
-                projects[i] = self.to_dict()
-                break
-        save_data(projects, PROJECTS_FILE)
-
-    def display_details(self):
-        table = Table(title="Project Details", show_lines=True)
+        import snapshots
+        with projects_locked():
+            # Merge other sessions' changes first so this write doesn't undo
+            # them; under the lock, so none can land in between.
+            if self.watcher is not None:
+                self.watcher.poll()
+                if self.watcher.deleted:
+                    console.print("This project was deleted by another user; the change was not saved.", style="bold red")
+                    return
+            self.touch()
+            projects = load_data(PROJECTS_FILE)
+            for i, project in enumerate(projects):
+                if project['id'] == self.id:
+                    projects[i] = self.to_dict()
+                    break
+            save_data(projects, PROJECTS_FILE)
+            if self.watcher is not None:
+                self.watcher.saved()
+            snapshots.catch_up()
+        if self.undo is not None:
+            self.undo.record()
+
+    def as_of(self, when):
+        """Return this project as it was at `when` (a datetime), or None if it did not exist yet.
+
+        Rebuilt from the nearest snapshot and the change feed; see snapshots.py.
+        """
+        import snapshots
+        return snapshots.project_as_of(self.id, when.timestamp())
+
+    def display_details(self, as_of=None):
+        project, title = self, "Project Details"
+        if as_of is not None:
+            project, title = self.as_of(as_of), f"Project Details as of {as_of:%Y-%m-%d %H:%M}"
+            if project is None:
+                console.print("The project did not exist at that time!", style="bold red")
+                return
+        table = Table(title=title, show_lines=True)
         table.add_column("Property", style="cyan")
         table.add_column("Value", style="magenta")
 
-        table.add_row("ID", self.id)
-        table.add_row("Title", self.title)
-        table.add_row("Leader", self.leader)
-        table.add_row("Members", ", ".join(self.members))
+        table.add_row("ID", project.id)
+        table.add_row("Title", project.title)
+        table.add_row("Leader", project.leader)
+        table.add_row("Members", ", ".join(project.members))
         console.print(table)
 
     def edit_task_info(self, task_id, username):
@@ -433,25 +1125,15 @@ class Project:
     
             try:
                 if choice == '1':
-                    new_name = input("Enter new task name: ")
-                    task.title = new_name
-                    task._log_history(username, f"Task name changed to {new_name}")
-                    log_message(f"Task name of {task_id} changed to {new_name} by {username}")
+                    task.rename(username, input("Enter new task name: "))
                 elif choice == '2':
-                    new_description = input("Enter new task description: ")
-                    task.description = new_description
-                    task._log_history(username, f"Task description changed to {new_description}")
-                    log_message(f"Task description of {task_id} changed to {new_description} by {username}")
+                    task.change_description(username, input("Enter new task description: "))
                 elif choice == '3':
                     new_start_time = input("Enter new start time (YYYY-MM-DD HH:MM:SS): ")
-                    task.start_time = datetime.strptime(new_start_time, "%Y-%m-%d %H:%M:%S")
-                    task._log_history(username, f"Task start time changed to {new_start_time}")
-                    log_message(f"Task start time of {task_id} changed to {new_start_time} by {username}")
+                    task.change_start_time(username, datetime.strptime(new_start_time, "%Y-%m-%d %H:%M:%S"))
                 elif choice == '4':
                     new_end_time = input("Enter new end time (YYYY-MM-DD HH:MM:SS): ")
-                    task.end_time = datetime.strptime(new_end_time, "%Y-%m-%d %H:%M:%S")
-                    task._log_history(username, f"Task end time changed to {new_end_time}")
-                    log_message(f"Task end time of {task_id} changed to {new_end_time} by {username}")
+                    task.change_end_time(username, datetime.strptime(new_end_time, "%Y-%m-%d %H:%M:%S"))
                 elif choice == '5':
                     assignee_action = input("Add or Remove assignee (a/r): ")
                     assignee_username = input("Enter assignee username: ")
@@ -478,9 +1160,8 @@ class Project:
                     comment_content = input("Enter comment: ")
                     task.add_comment(username, comment_content)
                 elif choice == '10':
-                    self.tasks = [t for t in self.tasks if t.id != task_id]
+                    self.remove_task(task_id, username)
                     self._update_project()
-                    log_message(f"Task {task_id} deleted by {username} in project {self.id}")
                     console.print(f"Task {task_id} deleted successfully!", style="bold green")
                     break
                 elif choice == '11':
@@ -496,6 +1177,212 @@ class Project:
                 console.print(f"An error occurred: {e}", style="bold red")
 
 
+class ProjectWatcher:
+    """Keeps an open Project current with changes made by other sessions.
+
+    Polls the change feed for the project's events and applies the ones from
+    other sessions, touching only the tasks they name. If projects.json
+    changes without any feed activity (an older writer), or a
+    'project.reload' event arrives, the project is reloaded from the file.
+    Once another session deletes the project, `deleted` is set and nothing
+    more is applied.
+    """
+
+    def __init__(self, project, cursor=None):
+        self.project = project
+        self.cursor = changefeed.last_seq() if cursor is None else cursor
+        self.stamp = file_stamp(PROJECTS_FILE)
+        self.deleted = False
+        project.watcher = self
+
+    def poll(self):
+        """Merge pending remote changes and return the events applied."""
+        applied = []
+        start = self.cursor
+        reload = False
+        while True:
+            events, self.cursor = changefeed.read(self.cursor, 1000, self.project.id)
+            for event in events:
+                if event['session'] == changefeed.SESSION_ID:
+                    continue
+                if event['op'] == 'project.delete':
+                    self.deleted = True
+                    return applied + [event]
+                if not self.project.apply_change(event):
+                    reload = True
+                applied.append(event)
+            if len(events) < 1000:
+                break
+        stamp = file_stamp(PROJECTS_FILE)
+        if stamp != self.stamp and self.cursor == start:
+            reload = True
+        if reload and not self.project.reload():
+            self.deleted = True
+        self.stamp = stamp
+        return applied
+
+    def saved(self):
+        self.stamp = file_stamp(PROJECTS_FILE)
+
+    def close(self):
+        self.project.watcher = None
+
+# Undo and redo
+#
+# Every edit is already in the change feed as a delta holding the old and new
+# values. An UndoHistory gathers this session's events for the open project
+# into steps, one per save, and undoes a step by performing the inverse of
+# each of its events, newest first, through the usual Project and Task
+# methods. The undo is therefore itself an edit: logged, merged by other
+# sessions and saved like any other. Redo performs the events again.
+#
+# Each user keeps at most UNDO_LIMIT steps per project, saved in a file of
+# their own next to projects.json so they outlive the menu session. A step
+# larger than UNDO_STEP_BYTES (say, a bulk edit of thousands of tasks) can't
+# be undone: recording it clears the user's steps instead. A step whose
+# starting state was changed since (by anyone) is refused and dropped.
+UNDO_LIMIT = 50
+UNDO_STEP_BYTES = 64 * 1024
+INVERSE_OPS = {
+    'task.create': 'task.delete',
+    'task.delete': 'task.create',
+    'task.assign': 'task.unassign',
+    'task.unassign': 'task.assign',
+    'project.add_member': 'project.remove_member',
+    'project.remove_member': 'project.add_member',
+}
+
+def undo_path(project_id, username):
+    digest = hashlib.sha256(username.encode()).hexdigest()[:16]
+    return f"{PROJECTS_FILE}.undo-{project_id}-{digest}.json"
+
+def remove_undo_files(project_id=None):
+    """Delete the saved undo steps of one project, or of every project."""
+    project = glob.escape(project_id) if project_id is not None else '*'
+    for path in glob.glob(f"{glob.escape(PROJECTS_FILE)}.undo-{project}-{'[0-9a-f]' * 16}.json"):
+        os.remove(path)
+
+def inverse_event(event):
+    if event['op'] == 'task.update':
+        data = dict(event['data'], old=event['data']['new'], new=event['data']['old'])
+        return dict(event, data=data)
+    return dict(event, op=INVERSE_OPS[event['op']])
+
+def describe_step(step):
+    event, data = step[0], step[0]['data']
+    if 'history' in data:
+        text = HistoryEntry.from_dict(data['history']).change
+    elif event['op'] in ('task.create', 'task.delete'):
+        text = f"Task {data['task']['title']} {'created' if event['op'] == 'task.create' else 'deleted'}"
+    else:
+        text = f"User {data['member']} {'added to' if event['op'] == 'project.add_member' else 'removed from'} project"
+    return text if len(step) == 1 else f"{text} (and {len(step) - 1} more change(s))"
+
+class UndoHistory:
+    """This user's undo and redo steps for one open project."""
+
+    def __init__(self, project, username, cursor=None):
+        self.project = project
+        self.username = username
+        self.cursor = changefeed.last_seq() if cursor is None else cursor
+        self.replaying = False
+        self.path = undo_path(project.id, username)
+        steps = load_data(self.path) or {}
+        self.undo_steps = steps.get('undo', [])
+        self.redo_steps = steps.get('redo', [])
+        project.undo = self
+
+    def _save(self):
+        save_data({'undo': self.undo_steps, 'redo': self.redo_steps}, self.path)
+
+    def record(self):
+        """Gather this session's events since the last call into one undo step."""
+        step = []
+        while True:
+            events, self.cursor = changefeed.read(self.cursor, 1000, self.project.id)
+            step += [event for event in events if event['session'] == changefeed.SESSION_ID
+                     and (event['op'] == 'task.update' or event['op'] in INVERSE_OPS)]
+            if len(events) < 1000:
+                break
+        if step and not self.replaying:
+            if len(json.dumps(step)) > UNDO_STEP_BYTES:
+                self.undo_steps.clear()
+                console.print("This change is too large to undo; earlier undo steps were cleared.", style="bold yellow")
+            else:
+                self.undo_steps.append(step)
+                del self.undo_steps[:-UNDO_LIMIT]
+            self.redo_steps.clear()
+            self._save()
+
+    def _check(self, event):
+        """Raise ValueError unless the project is in the state `event` starts from."""
+        op, data = event['op'], event['data']
+        task = self.project.get_task(event['task_id']) if event['task_id'] else None
+        if op == 'task.create':
+            if task is not None:
+                raise ValueError(f"Task {data['task']['title']} already exists")
+        elif op.startswith('task.') and task is None:
+            raise ValueError(f"Task {event['task_id']} no longer exists")
+        elif op == 'task.update' and field_text(task, data['field']) != data['old']:
+            raise ValueError(f"The {data['field']} of task {task.title} has changed since")
+
+    def _perform(self, event):
+        op, data, username = event['op'], event['data'], self.username
+        task = self.project.get_task(event['task_id']) if event['task_id'] else None
+        if op == 'task.update':
+            getattr(task, TASK_UPDATES[data['field']])(username, field_value(data['field'], data['new']))
+        elif op == 'task.assign':
+            task.assign_user(username, data['assignee'])
+        elif op == 'task.unassign':
+            task.unassign_user(username, data['assignee'])
+        elif op == 'task.create':
+            self.project.add_task(Task.from_dict(json.loads(json.dumps(data['task']))), username, data.get('index'))
+        elif op == 'task.delete':
+            self.project.remove_task(event['task_id'], username)
+        elif op == 'project.add_member':
+            self.project.insert_member(data['member'], username, data.get('index'))
+        elif op == 'project.remove_member':
+            self.project.drop_member(data['member'], username)
+
+    def _replay(self, events):
+        for event in events:
+            self._check(event)
+        self.replaying = True
+        try:
+            with log_batch(), changefeed.batch():
+                for event in events:
+                    self._perform(event)
+            self.project._update_project()
+        finally:
+            self.replaying = False
+
+    def _move(self, source, target, events):
+        if not source:
+            raise ValueError(f"Nothing to {'undo' if source is self.undo_steps else 'redo'}!")
+        step = source[-1]
+        try:
+            self._replay(events(step))
+        except ValueError:
+            source.pop()
+            self._save()
+            raise
+        target.append(source.pop())
+        del target[:-UNDO_LIMIT]
+        self._save()
+        return describe_step(step)
+
+    def undo(self):
+        """Revert the newest step and return its description."""
+        return self._move(self.undo_steps, self.redo_steps,
+                          lambda step: [inverse_event(event) for event in reversed(step)])
+
+    def redo(self):
+        """Perform the newest undone step again and return its description."""
+        return self._move(self.redo_steps, self.undo_steps, list)
+
+    def close(self):
+        self.project.undo = None
+
 
 def view_task(selected_project):
     while True:
@@ -524,31 +1411,49 @@ def view_task(selected_project):
             console.print(f"An error occurred: {e}", style="bold red")
 
 
-def task_table(user, selected_project):
+def board_table(selected_project):
+    # وضعیت‌های مختلف تسک‌ها
+    allstat = ["BACKLOG", "TODO", "DOING", "DONE", "ARCHIVED"]
+
+    task_list = []
+    for t in allstat:
+     task_list.append(list(map(lambda x: x.title, filter(lambda i: str(i.status).split('.')[-1] == t, selected_project.tasks))))
+    mm = len(max(task_list, key=len))
+    task_list.append(range(1, mm + 1))
+    for i in task_list:
+     while len(i) < mm:
+        i.append('')
+
+    table = Table(title="Tasks", show_lines=True)
+    table.add_column("Index",style="cyan")
+    table.add_column("BACKLOG",style="yellow")
+    table.add_column("TODO", style="green")
+    table.add_column("DOING", style="magenta")
+    table.add_column("DONE", style="blue")
+    table.add_column("ARCHIVED", style="red")
+    for a, b, c, d, e, i in zip(*task_list):
+        table.add_row(str(i), a, b, c, d, e)
+    return table
+
+def print_cached(project, name, build):
+    """Print build(project), reusing the rendered segments while the project is unchanged."""
+    key = (project.version, console.width, console.color_system)
+    cached = project.render_cache.get(name)
+    if cached is None or cached[0] != key:
+        cached = project.render_cache[name] = (key, list(console.render(build(project))))
+    from rich.segment import Segments
+    console.print(Segments(cached[1]))
+
+def task_table(user, selected_project, as_of=None):
+    """Show the task board; with as_of, the board as it was then, read-only."""
+    if as_of is not None:
+        selected_project = selected_project.as_of(as_of)
+        if selected_project is None:
+            console.print("The project did not exist at that time!", style="bold red")
+            return
     while True:
         try:
-            # وضعیت‌های مختلف تسک‌ها
-            allstat = ["BACKLOG", "TODO", "DOING", "DONE", "ARCHIVED"]
-
-            task_list = []
-            for t in allstat:
-             task_list.append(list(map(lambda x: x.title, filter(lambda i: str(i.status).split('.')[-1] == t, selected_project.tasks))))
-            mm = len(max(task_list, key=len))
-            task_list.append(range(1, mm + 1))
-            for i in task_list:
-             while len(i) < mm:
-                i.append('')
-
-            table = Table(title="Tasks", show_lines=True)
-            table.add_column("Index",style="cyan")
-            table.add_column("BACKLOG",style="yellow")
-            table.add_column("TODO", style="green")
-            table.add_column("DOING", style="magenta")
-            table.add_column("DONE", style="blue")
-            table.add_column("ARCHIVED", style="red")
-            for a, b, c, d, e, i in zip(*task_list):
-                table.add_row(str(i), a, b, c, d, e)
-            console.print(table)
+            print_cached(selected_project, 'board', board_table)
 
             task_name = input("\nEnter task name to select (or 0 to go back): ")
             if task_name == '0':
@@ -576,7 +1481,9 @@ def task_table(user, selected_project):
 
                     input("\nPress 'Enter' to go back to task options.")
                 elif choice == '2':
-                    if user.username == selected_project.leader or user.username in task.assignees:
+                    if as_of is not None:
+                        console.print("Past versions of a project can't be edited!", style="bold red")
+                    elif user.username == selected_project.leader or user.username in task.assignees:
                         selected_project.edit_task_info(task.id, user.username)
                         break  # بعد از ویرایش تسک، بازگشت به منوی task_table
                     else:
@@ -594,6 +1501,48 @@ def task_table(user, selected_project):
 
 
 
+def bulk_edit_tasks(user, selected_project):
+    try:
+        console.print("Select tasks by ID (comma separated) or leave blank to filter.", style="bold blue")
+        ids = [task_id.strip() for task_id in input("Task IDs: ").split(',') if task_id.strip()] or None
+        status = input("Filter by status (blank for any): ").strip().upper()
+        priority = input("Filter by priority (blank for any): ").strip().upper()
+        assignee = input("Filter by assignee (blank for any): ").strip()
+        tasks = selected_project.select_tasks(
+            task_ids=ids,
+            status=Status[status] if status else None,
+            priority=Priority[priority] if priority else None,
+            assignee=assignee or None
+        )
+        if not tasks:
+            console.print("No tasks match!", style="bold red")
+            return
+        console.print(f"{len(tasks)} task(s) selected.", style="bold green")
+
+        new_status = input("New status (blank to keep): ").strip().upper()
+        new_priority = input("New priority (blank to keep): ").strip().upper()
+        new_assignee = input("Assign user (blank to skip): ").strip()
+        if input(f"Apply to {len(tasks)} task(s)? (yes/no): ").lower() != 'yes':
+            console.print("Bulk edit cancelled.", style="bold red")
+            return
+        count = selected_project.bulk_update(
+            tasks, user.username,
+            status=Status[new_status] if new_status else None,
+            priority=Priority[new_priority] if new_priority else None,
+            assignee=new_assignee or None
+        )
+        console.print(f"{count} task(s) updated successfully!", style="bold green")
+    except KeyError as e:
+        console.print(f"Invalid value: {e}", style="bold red")
+
+def time_travel(user, selected_project):
+    try:
+        as_of = datetime.fromisoformat(input("Show the project as of (YYYY-MM-DD HH:MM): "))
+        selected_project.display_details(as_of)
+        task_table(user, selected_project, as_of)
+    except (ValueError, LookupError) as e:
+        console.print(f"Error: {e}", style="bold red")
+
 def main_menu(user):
     while True:
         console.print("\n1. Create project\n2. Projects\n3. Logout\n")
@@ -615,17 +1564,42 @@ def main_menu(user):
                     except (ValueError, IndexError):
                         console.print("Invalid selection!", style="bold red")
         elif choice == '3':
+            user.logout()
             break
         else:
             console.print("Invalid choice!", style="bold red")
 
 def project_menu(user, selected_project):
+    watcher = ProjectWatcher(selected_project, selected_project.loaded_at)
+    history = UndoHistory(selected_project, user.username)
+    try:
+        _project_menu(user, selected_project, watcher)
+    finally:
+        history.close()
+        watcher.close()
+
+def undo_redo(selected_project, redo=False):
+    try:
+        if redo:
+            console.print(f"Redone: {selected_project.undo.redo()}", style="bold green")
+        else:
+            console.print(f"Undone: {selected_project.undo.undo()}", style="bold green")
+    except ValueError as e:
+        console.print(f"{e}", style="bold red")
+
+def _project_menu(user, selected_project, watcher):
     while True:
+        changes = watcher.poll()
+        if watcher.deleted:
+            console.print("This project was deleted by another user.", style="bold red")
+            break
+        if changes:
+            console.print(f"{len(changes)} change(s) from other users merged.", style="bold yellow")
         role = "Leader" if user.username == selected_project.leader else "Member"
         console.print(f"\nProject: {selected_project.title} (Role: {role})", style="bold green")
 
         if role == "Leader":
-            console.print("\n1. Add member to project\n2. Remove member from project\n3. Delete project\n4. Create task\n5. Edit task\n6. List tasks\n7. View task\n8. Task table\n9. Project details\n10. Back\n")
+            console.print("\n1. Add member to project\n2. Remove member from project\n3. Delete project\n4. Create task\n5. Edit task\n6. List tasks\n7. View task\n8. Task table\n9. Project details\n10. Bulk edit tasks\n11. Project as of a past time\n12. Undo\n13. Redo\n14. Back\n")
             choice = input("Enter choice: ")
             if choice == '1':
                 selected_project.add_member(input("Enter username to add: "))
@@ -648,11 +1622,19 @@ def project_menu(user, selected_project):
             elif choice == '9':
                 selected_project.display_details()
             elif choice == '10':
+                bulk_edit_tasks(user, selected_project)
+            elif choice == '11':
+                time_travel(user, selected_project)
+            elif choice == '12':
+                undo_redo(selected_project)
+            elif choice == '13':
+                undo_redo(selected_project, redo=True)
+            elif choice == '14':
                 break
             else:
                 console.print("Invalid choice!", style="bold red")
         else:
-            console.print("\n1. List tasks\n2. View task\n3. Edit task\n4. Task table\n5. Project details\n6. Back\n")
+            console.print("\n1. List tasks\n2. View task\n3. Edit task\n4. Task table\n5. Project details\n6. Project as of a past time\n7. Undo\n8. Redo\n9. Back\n")
             choice = input("Enter choice: ")
             if choice == '1':
                 selected_project.list_tasks(user)
@@ -673,6 +1655,12 @@ def project_menu(user, selected_project):
             elif choice == '5':
                 selected_project.display_details()
             elif choice == '6':
+                time_travel(user, selected_project)
+            elif choice == '7':
+                undo_redo(selected_project)
+            elif choice == '8':
+                undo_redo(selected_project, redo=True)
+            elif choice == '9':
                 break
             else:
                 console.print("Invalid choice!", style="bold red")
@@ -681,9 +1669,40 @@ def project_menu(user, selected_project):
 
 
 
+def performance_stats():
+    """Show the per-operation latency histograms and switch instrumentation on or off."""
+    app = sys.modules[__name__]
+    while True:
+        rows = instrument.summary()
+        state = "on" if instrument.enabled() else "off"
+        table = Table(title=f"Performance statistics (instrumentation {state})")
+        for column in ["Operation", "Count", "Mean ms", "p50 ms", "p90 ms", "p99 ms", "Max ms", "Bytes"]:
+            table.add_column(column, style="cyan" if column == "Operation" else None,
+                             justify="left" if column == "Operation" else "right")
+        for operation, count, mean, p50, p90, p99, peak, size in rows:
+            table.add_row(operation, str(count), *(f"{value:.3f}" for value in (mean, p50, p90, p99, peak)),
+                          instrument.format_bytes(size) if size else "")
+        console.print(table)
+        toggle = "Disable" if instrument.enabled() else "Enable"
+        console.print(f"\n1. {toggle} instrumentation\n2. Reset statistics\n3. Back\n")
+        choice = input("Enter choice: ")
+        if choice == '1':
+            if instrument.enabled():
+                instrument.disable()
+            else:
+                instrument.enable(app)
+            log_message(f"Instrumentation {toggle.lower()}d")
+        elif choice == '2':
+            instrument.reset()
+            console.print("Statistics reset.", style="bold green")
+        elif choice == '3':
+            return
+        else:
+            console.print("Invalid choice!", style="bold red")
+
 def admin_menu(user):
     while True:
-        console.print("\n1. Create project\n2. Projects\n3. Deactivate user\n4. Activate user\n5. Register new admin\n6. Purge data\n7. Logout\n")
+        console.print("\n1. Create project\n2. Projects\n3. Deactivate user\n4. Activate user\n5. Register new admin\n6. Purge data\n7. Performance statistics\n8. Logout\n")
         choice = input("Enter choice: ")
 
         if choice == '1':
@@ -710,11 +1729,15 @@ def admin_menu(user):
         elif choice == '6':
             Admin.purge_data()
         elif choice == '7':
+            performance_stats()
+        elif choice == '8':
+            user.logout()
             break
         else:
             console.print("Invalid choice!", style="bold red")
 
 def main():
+    instrument.start_if_enabled(sys.modules[__name__])
     while True:
         console.print("\n1. Register\n2. Login\n3. Exit\n")
         choice = input("Enter choice: ")
@@ -734,4 +1757,7 @@ def main():
             console.print("Invalid choice!", style="bold red")
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        import cli
+        sys.exit(cli.main(sys.argv[1:]))
     main()
@@ -0,0 +1,386 @@
+import hashlib
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import passwords
+import main
+from main import User, Admin, Project, Task, Status, Priority, load_data, save_data, identity_store, log_batch, log_message
+from main import USERS_FILE, ADMIN_FILE, PROJECTS_FILE, LOG_FILE
+
+class MainTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.old_cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        passwords._config = None
+        passwords.save_config('scrypt', {'n': 2 ** 8, 'r': 8, 'p': 1})
+
+    def tearDown(self):
+        passwords._config = None
+        os.chdir(self.old_cwd)
+        self.tmp.cleanup()
+
+class TestLogin(MainTestCase):
+
+    def test_1_from_dict_keeps_hash(self):
+        user = User('testuser', 'testuser@example.com', 'password')
+        restored = User.from_dict(user.to_dict())
+        self.assertEqual(restored.password, user.password, "Test 1: from_dict re-hashed the stored password")
+
+    @patch('main.getpass', return_value='password')
+    @patch('builtins.input', return_value='testuser')
+    def test_2_legacy_hash_upgraded_on_login(self, mock_input, mock_getpass):
+        legacy = hashlib.sha256(b'password').hexdigest()
+        save_data([{'username': 'testuser', 'email': 'testuser@example.com', 'password': legacy,
+                    'role': 'user', 'active': True}], USERS_FILE)
+        user = User.login()
+        self.assertEqual(user.username, 'testuser', "Test 2: Login with legacy hash failed")
+        stored = load_data(USERS_FILE)[0]['password']
+        self.assertTrue(stored.startswith('scrypt$'), "Test 2: Legacy hash not upgraded")
+        self.assertTrue(passwords.verify_password('password', stored), "Test 2: Upgraded hash does not verify")
+
+    @patch('main.getpass', return_value='password')
+    @patch('builtins.input', return_value='testuser')
+    def test_3_login_issues_resumable_session(self, mock_input, mock_getpass):
+        save_data([User('testuser', 'testuser@example.com', 'password').to_dict()], USERS_FILE)
+        User.login()
+        os.remove(USERS_FILE)
+        user = User.resume('testuser')
+        self.assertIsNotNone(user, "Test 3: Session not resumed without user tables")
+        self.assertEqual(user.email, 'testuser@example.com', "Test 3: Resumed user email does not match")
+        user.logout()
+        self.assertIsNone(User.resume('testuser'), "Test 3: Session resumed after logout")
+
+class TestIdentityStore(MainTestCase):
+
+    @patch('main.getpass', return_value='password')
+    @patch('builtins.input', side_effect=['testuser', 'testuser2'])
+    def test_1_admin_and_user_names_do_not_collide(self, mock_input, mock_getpass):
+        save_data([User('testuser', 'testuser@example.com', 'password').to_dict()], USERS_FILE)
+        Admin.register_admin()
+        admins = load_data(ADMIN_FILE)
+        self.assertEqual([a['username'] for a in admins], ['testuser2'], "Test 1: Admin registered over an existing username")
+
+    def test_2_cache_reloads_on_change(self):
+        store = identity_store()
+        self.assertIs(identity_store(), store, "Test 2: Identity store not cached")
+        save_data([User('testuser', 'testuser@example.com', 'password').to_dict()], USERS_FILE)
+        self.assertIsNotNone(identity_store().find('testuser'), "Test 2: Identity store not reloaded after file change")
+        self.assertEqual(identity_store().find_by_email('testuser@example.com')['role'], 'user', "Test 2: Email index missing")
+
+    def test_3_deactivate_and_activate(self):
+        identity_store().add(User('testuser', 'testuser@example.com', 'password').to_dict())
+        Admin.deactivate_user('testuser')
+        self.assertFalse(load_data(USERS_FILE)[0]['active'], "Test 3: User not deactivated")
+        Admin.activate_user('testuser')
+        self.assertTrue(load_data(USERS_FILE)[0]['active'], "Test 3: User not activated")
+
+class TestBulkUpdate(MainTestCase):
+
+    def test_1_bulk_update_writes_once(self):
+        project = Project('p1', 'Project', 'leader', ['leader'], [Task(title=f'T{i}', status=Status.DOING) for i in range(5)])
+        project.tasks[0].status = Status.TODO
+        save_data([project.to_dict()], PROJECTS_FILE)
+        tasks = project.select_tasks(status=Status.DOING)
+        self.assertEqual(len(tasks), 4, "Test 1: Wrong tasks selected")
+
+        with patch('main.save_data', wraps=save_data) as mock_save:
+            project.bulk_update(tasks, 'leader', status=Status.DONE, priority=Priority.HIGH)
+        self.assertEqual(mock_save.call_count, 1, "Test 1: Bulk update should write the project once")
+
+        saved = Project.from_dict(load_data(PROJECTS_FILE)[0])
+        self.assertEqual([t.status for t in saved.tasks].count(Status.DONE), 4, "Test 1: Statuses not updated")
+        self.assertEqual(len(saved.tasks[1].history), 2, "Test 1: History not recorded per task")
+
+    def test_2_log_batch_flushes_once(self):
+        with log_batch():
+            log_message("first")
+            log_message("second")
+            self.assertFalse(os.path.exists(LOG_FILE), "Test 2: Log written before the batch ended")
+        with open(LOG_FILE) as f:
+            self.assertEqual(f.read(), "first\nsecond\n", "Test 2: Batched log lines missing")
+        with self.assertRaises(RuntimeError), log_batch():
+            log_message("third")
+            raise RuntimeError("failed")
+        with open(LOG_FILE) as f:
+            self.assertEqual(f.read(), "first\nsecond\n", "Test 2: Log lines of a failed batch written")
+
+class TestProjectWatcher(MainTestCase):
+
+    def _other_session(self):
+        return patch('changefeed.SESSION_ID', 'other')
+
+    def test_1_remote_changes_merged(self):
+        project = Project('p1', 'Project', 'leader', ['leader', 'member'], [Task(title='T1')])
+        save_data([project.to_dict()], PROJECTS_FILE)
+        mine = Project.from_dict(load_data(PROJECTS_FILE)[0])
+        watcher = main.ProjectWatcher(mine)
+
+        theirs = Project.from_dict(load_data(PROJECTS_FILE)[0])
+        with self._other_session():
+            theirs.tasks[0].change_status('member', Status.DONE)
+            theirs.add_task(Task(title='T2'), 'leader')
+            theirs._update_project()
+        mine.tasks[0].add_comment('leader', 'local comment')
+
+        self.assertEqual(len(watcher.poll()), 2, "Test 1: Remote events not applied")
+        self.assertEqual(mine.tasks[0].status, Status.DONE, "Test 1: Remote status change missing")
+        self.assertEqual([t.title for t in mine.tasks], ['T1', 'T2'], "Test 1: Remote task missing")
+        self.assertEqual(len(mine.tasks[0].comments), 1, "Test 1: Local change lost")
+        self.assertEqual(watcher.poll(), [], "Test 1: Own or old events applied twice")
+
+    def test_2_save_keeps_remote_changes(self):
+        save_data([Project('p1', 'Project', 'leader', ['leader'], [Task(title='T1')]).to_dict()], PROJECTS_FILE)
+        mine = Project.from_dict(load_data(PROJECTS_FILE)[0])
+        main.ProjectWatcher(mine)
+        theirs = Project.from_dict(load_data(PROJECTS_FILE)[0])
+        with self._other_session():
+            theirs.tasks[0].change_priority('leader', Priority.HIGH)
+            theirs._update_project()
+
+        mine.tasks[0].rename('leader', 'Renamed')
+        mine._update_project()
+        saved = load_data(PROJECTS_FILE)[0]['tasks'][0]
+        self.assertEqual(saved['title'], 'Renamed', "Test 2: Local change not saved")
+        self.assertEqual(saved['priority'], Priority.HIGH.value, "Test 2: Remote change overwritten")
+
+    def test_3_reload_without_feed_events(self):
+        save_data([Project('p1', 'Project', 'leader', ['leader'], [Task(title='T1')]).to_dict()], PROJECTS_FILE)
+        mine = Project.from_dict(load_data(PROJECTS_FILE)[0])
+        watcher = main.ProjectWatcher(mine)
+        data = load_data(PROJECTS_FILE)
+        data[0]['tasks'].append(Task(title='Imported').to_dict())
+        save_data(data, PROJECTS_FILE)
+        os.utime(PROJECTS_FILE, ns=(0, 0))
+
+        watcher.poll()
+        self.assertEqual(len(mine.tasks), 2, "Test 3: Project not reloaded after an external write")
+
+    def test_4_project_keeps_its_menu_methods(self):
+        project = Project('p1', 'Project', 'leader', ['leader'])
+        self.assertTrue(callable(getattr(project, 'display_details', None)), "Test 4: Project details unavailable")
+        self.assertTrue(callable(getattr(project, 'edit_task_info', None)), "Test 4: Task editing unavailable")
+
+    @patch('builtins.input', side_effect=AssertionError("menu shown for a deleted project"))
+    def test_5_menu_left_when_project_deleted(self, mock_input):
+        save_data([Project('p1', 'Project', 'leader', ['leader'], [Task(title='T1')]).to_dict()], PROJECTS_FILE)
+        mine = Project.from_dict(load_data(PROJECTS_FILE)[0])
+        watcher = main.ProjectWatcher(mine)
+        theirs = Project.from_dict(load_data(PROJECTS_FILE)[0])
+        with self._other_session(), patch.object(main.console, 'print'):
+            theirs.delete()
+
+        mine.tasks[0].rename('leader', 'Renamed')
+        with patch.object(main.console, 'print'):
+            mine._update_project()
+            main._project_menu(User('leader', 'leader@example.com', 'password'), mine, watcher)
+        self.assertTrue(watcher.deleted, "Test 5: Deletion not noticed")
+        self.assertEqual(load_data(PROJECTS_FILE), [], "Test 5: Deleted project written back")
+
+    def test_6_poll_and_save_under_one_lock(self):
+        save_data([Project('p1', 'Project', 'leader', ['leader'], [Task(title='T1')]).to_dict()], PROJECTS_FILE)
+        mine = Project.from_dict(load_data(PROJECTS_FILE)[0])
+        watcher = main.ProjectWatcher(mine)
+        lock = os.path.abspath(f"{PROJECTS_FILE}.lock")
+        locked = []
+        poll = watcher.poll
+        with patch.object(watcher, 'poll', side_effect=lambda: locked.append(lock in main._held_locks.paths) or poll()):
+            mine._update_project()
+        self.assertEqual(locked, [True], "Test 6: Polled outside the projects.json lock")
+
+    @patch('builtins.input', return_value='Created')
+    def test_7_create_and_delete_under_lock(self, mock_input):
+        lock = os.path.abspath(f"{PROJECTS_FILE}.lock")
+        locked = []
+
+        def save(data, file):
+            locked.append(lock in main._held_locks.paths)
+            save_data(data, file)
+
+        with patch('main.save_data', side_effect=save), patch.object(main.console, 'print'):
+            Project.create_project(User('leader', 'leader@example.com', 'password'))
+            Project.from_dict(load_data(PROJECTS_FILE)[0]).delete()
+        self.assertEqual(locked, [True, True], "Test 7: projects.json written outside its lock")
+        self.assertEqual(load_data(PROJECTS_FILE), [], "Test 7: Project not deleted")
+
+class TestPaging(MainTestCase):
+
+    def test_1_only_visible_page_built(self):
+        project = Project('p1', 'Project', 'leader', ['leader'], [Task(title=f'T{i}') for i in range(1000)])
+        seen = []
+        row = lambda index, task: seen.append(index) or (task.title,)
+        widths = main.sample_widths([("Title", "magenta")], project.tasks, row, sample=10)
+        seen.clear()
+        table = main.page_table("Tasks", [("Title", "magenta")], project.tasks, row, page=3, page_size=25, widths=widths)
+        self.assertEqual(table.row_count, 25, "Test 1: Wrong number of rows on the page")
+        self.assertEqual(seen, list(range(75, 100)), "Test 1: Rows outside the page were built")
+
+    @patch('builtins.input', side_effect=['sort priority', 'n', 'n', ''])
+    def test_2_navigate_and_sort(self, mock_input):
+        tasks = [Task(title=f'T{i}', priority=[Priority.LOW, Priority.CRITICAL][i % 2]) for i in range(30)]
+        shown = main.page_through("Tasks", [("Title", "magenta")], tasks, lambda i, t: (t.title,),
+                                  main.TASK_SORT_KEYS, page_size=10)
+        self.assertEqual(mock_input.call_count, 4, "Test 2: Pager stopped early")
+        self.assertEqual([t.priority for t in shown[:15]], [Priority.CRITICAL] * 15, "Test 2: Not sorted by priority")
+        self.assertIn("Page 3/3", mock_input.call_args_list[-1][0][0], "Test 2: Did not reach the last page")
+
+class TestRenderCache(MainTestCase):
+
+    def test_1_board_rendered_once_per_version(self):
+        project = Project('p1', 'Project', 'leader', ['leader'], [Task(title='T1'), Task(title='T2')])
+        save_data([project.to_dict()], PROJECTS_FILE)
+        build = MagicMock(wraps=main.board_table)
+        with patch.object(main.console, 'print'):
+            main.print_cached(project, 'board', build)
+            main.print_cached(project, 'board', build)
+            self.assertEqual(build.call_count, 1, "Test 1: Unchanged board rendered again")
+            project.tasks[0].change_status('leader', Status.DONE)
+            project._update_project()
+            main.print_cached(project, 'board', build)
+            self.assertEqual(build.call_count, 2, "Test 1: Board not re-rendered after a change")
+
+class TestCompactModel(MainTestCase):
+
+    def test_1_entries_are_records_that_read_like_dicts(self):
+        task = Task(title='T1')
+        task.add_comment('alice', 'hello')
+        data = task.to_dict()
+        self.assertEqual(data['comments'], [{'username': 'alice', 'content': 'hello', 'timestamp': task.comments[0]['timestamp']}],
+                         "Test 1: Comment not serialized as a dict")
+        restored = Task.from_dict(json.loads(json.dumps(data)))
+        self.assertIsInstance(restored.history[0], main.HistoryEntry, "Test 1: History not loaded as records")
+        self.assertEqual(restored.history[0], data['history'][0], "Test 1: Record does not equal its dict")
+        self.assertIs(restored.comments[0]['username'], restored.history[0].username, "Test 1: Usernames not interned")
+        self.assertFalse(hasattr(restored, '__dict__'), "Test 1: Task instances have a __dict__")
+
+    def test_2_loading_skips_new_task_defaults(self):
+        data = Project('p1', 'Project', 'leader', ['leader'], [Task(title='T1'), Task(title='T2')]).to_dict()
+        with patch('main.uuid.uuid4') as mock_uuid, patch('main.datetime', wraps=main.datetime) as mock_datetime:
+            project = Project.from_dict(data)
+        mock_uuid.assert_not_called()
+        mock_datetime.now.assert_not_called()
+        self.assertEqual(project.to_dict(), data, "Test 2: Loaded project differs from its record")
+        self.assertEqual({task.project_id for task in project.tasks}, {'p1'}, "Test 2: Tasks not attached to the project")
+
+class TestLazyLoading(MainTestCase):
+
+    def test_1_fields_decoded_on_first_access(self):
+        tasks = [Task(title=f'T{i}', status=Status.TODO) for i in range(3)]
+        tasks[0].add_comment('leader', 'note')
+        data = json.loads(json.dumps(Project('p1', 'Project', 'leader', ['leader'], tasks).to_dict()))
+        project = Project.from_dict(data)
+        self.assertIsNone(project._tasks, "Test 1: Tasks built before they were needed")
+        self.assertEqual(project.to_dict(), data, "Test 1: Undecoded project does not round-trip")
+
+        main.board_table(project)
+        self.assertTrue(all(task._history is main.UNDECODED and task._end_time is main.UNDECODED for task in project.tasks),
+                        "Test 1: Board decoded fields it does not show")
+
+        task = project.tasks[0]
+        self.assertEqual(task.comments[0]['content'], 'note', "Test 1: Comments not decoded")
+        task.change_status('leader', Status.DONE)
+        self.assertEqual(len(task.to_dict()['history']), 2, "Test 1: Change not added to the decoded history")
+        self.assertEqual(task.to_dict()['start_time'], data['tasks'][0]['start_time'], "Test 1: Raw start time changed")
+        task.start_time
+        task.end_time
+        self.assertIsNone(task._raw, "Test 1: Raw record kept after every field was decoded")
+
+class TestTypedHistory(MainTestCase):
+
+    def test_1_legacy_entries_parse_to_events(self):
+        legacy = [
+            {'username': 'bob', 'change': 'Status changed from Status.TODO to Status.DOING', 'timestamp': '2024-01-01T09:00:00'},
+            {'username': 'bob', 'change': 'Task end time changed to 2024-02-01 12:00:00', 'timestamp': '2024-01-01T10:00:00'},
+            {'username': 'bob', 'change': 'User carol unassigned from task', 'timestamp': '2024-01-01T11:00:00'},
+            {'username': 'bob', 'change': 'Something else happened', 'timestamp': '2024-01-01T12:00:00'},
+        ]
+        entries = [main.HistoryEntry.from_dict(entry) for entry in legacy]
+        self.assertEqual([(e.kind, e.field, e.old, e.new) for e in entries[:3]],
+                         [('update', 'status', 'TODO', 'DOING'), ('update', 'end_time', None, '2024-02-01T12:00:00'),
+                          ('unassign', 'assignees', 'carol', None)], "Test 1: Legacy text parsed wrongly")
+        self.assertEqual(entries[3].kind, 'note', "Test 1: Unknown text not kept as a note")
+        for entry, original in zip(entries, legacy):
+            self.assertEqual((entry.username, entry.change, entry.timestamp), (original['username'], original['change'], original['timestamp']),
+                             "Test 1: Rendered entry differs from the legacy text")
+
+    def test_2_changes_are_logged_as_events(self):
+        task = Task(title='T1', status=Status.TODO)
+        task.change_status('alice', Status.DONE)
+        task.assign_user('alice', 'bob')
+        data = json.loads(json.dumps(task.to_dict()))
+        self.assertEqual({key: data['history'][-2][key] for key in ('kind', 'field', 'old', 'new', 'actor')},
+                         {'kind': 'update', 'field': 'status', 'old': 'TODO', 'new': 'DONE', 'actor': 'alice'},
+                         "Test 2: Status change not stored as a typed event")
+        self.assertEqual(Task.from_dict(data).history[-1].change, 'User bob assigned to task', "Test 2: Assignment rendered wrongly")
+
+class TestUndo(MainTestCase):
+
+    def setUp(self):
+        super().setUp()
+        tasks = [Task(title='T1', status=Status.TODO), Task(title='T2')]
+        save_data([Project('p1', 'Project', 'leader', ['leader', 'member', 'other'], tasks).to_dict()], PROJECTS_FILE)
+        self.project = Project.from_dict(load_data(PROJECTS_FILE)[0])
+        main.ProjectWatcher(self.project)
+        self.history = main.UndoHistory(self.project, 'leader')
+
+    def test_1_undo_and_redo_edits(self):
+        original = self.project.to_dict()
+        self.project.tasks[0].change_status('leader', Status.DONE)
+        self.project._update_project()
+        self.project.remove_task(self.project.tasks[0].id, 'leader')
+        self.project._update_project()
+        self.project.drop_member('member', 'leader')
+        self.project._update_project()
+
+        for _ in range(3):
+            self.history.undo()
+        restored = load_data(PROJECTS_FILE)[0]
+        self.assertEqual(restored['members'], original['members'], "Test 1: Removed member not restored in place")
+        self.assertEqual([(t['id'], t['status']) for t in restored['tasks']],
+                         [(t['id'], t['status']) for t in original['tasks']], "Test 1: Task or status not restored")
+        with self.assertRaises(ValueError):
+            self.history.undo()
+
+        self.history.close()
+        reopened = main.UndoHistory(self.project, 'leader')
+        self.assertEqual(reopened.redo(), 'Status changed from Status.TODO to Status.DONE', "Test 1: Wrong step redone")
+        self.assertEqual(self.project.tasks[0].status, Status.DONE, "Test 1: Redo not applied")
+        self.assertEqual(len(reopened.redo_steps), 2, "Test 1: Redo steps not persisted")
+
+    def test_2_changed_since_is_refused(self):
+        self.project.tasks[0].change_priority('leader', Priority.HIGH)
+        self.project._update_project()
+        theirs = Project.from_dict(load_data(PROJECTS_FILE)[0])
+        with patch('changefeed.SESSION_ID', 'other'):
+            theirs.tasks[0].change_priority('member', Priority.CRITICAL)
+            theirs._update_project()
+        self.project.watcher.poll()
+        with self.assertRaises(ValueError):
+            self.history.undo()
+        self.assertEqual(self.project.tasks[0].priority, Priority.CRITICAL, "Test 2: Newer change undone")
+        self.assertEqual(self.history.undo_steps, [], "Test 2: Refused step kept")
+
+    @patch('main.UNDO_STEP_BYTES', 1000)
+    def test_3_bounded_steps_per_user_file(self):
+        member = main.UndoHistory(Project.from_dict(load_data(PROJECTS_FILE)[0]), 'member')
+        self.project.tasks[0].rename('leader', 'Renamed')
+        self.project._update_project()
+        member.project.tasks[1].rename('member', 'Theirs')
+        member.project._update_project()
+        self.assertEqual(len(load_data(main.undo_path('p1', 'leader'))['undo']), 1, "Test 3: Stack of another user overwritten")
+
+        with patch.object(main.console, 'print'):
+            self.project.bulk_update(self.project.tasks, 'leader', priority=Priority.HIGH, assignee='member')
+        self.assertEqual(self.history.undo_steps, [], "Test 3: Oversized step kept")
+        self.assertLessEqual(os.path.getsize(main.undo_path('p1', 'leader')), 1000, "Test 3: Undo file unbounded")
+
+        with patch('builtins.input', return_value='yes'), patch.object(main.console, 'print'):
+            Admin.purge_data()
+        self.assertFalse([f for f in os.listdir('.') if '.undo-' in f], "Test 3: Undo files survived a purge")
+
+if __name__ == '__main__':
+    unittest.main()
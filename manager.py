@@ -0,0 +1,367 @@
+import argparse
+import json
+import os
+from getpass import getpass
+import passwords
+import sessions
+import changefeed
+from datetime import datetime
+from main import Status, identity_store, remove_undo_files
+
+ADMIN_FILE = 'admin.json'
+USERS_FILE = 'users.json'
+PROJECTS_FILE = 'projects.json'
+LOG_FILE = 'log.txt'
+
+
+
+############ class file managing 
+
+
+class FileManager:
+    @staticmethod
+    def load_data(file):
+        if os.path.exists(file):
+            with open(file, 'r') as f:
+                return json.load(f)
+        return []
+######### saving data 
+
+    @staticmethod
+    def save_data(data, file):
+        with open(file, 'w') as f:
+            json.dump(data, f, indent=4)
+############### class haye admin taghriban moshabehe main 
+
+class Logger:
+    @staticmethod
+    def log_message(message):
+        with open(LOG_FILE, 'a') as f:
+            f.write(f"{message}\n")
+############### class  user taghriban moshabehe main 
+
+class User:
+    def __init__(self, username, password, email, role, active=True):
+        self.username = username
+        self.password = User.hash_password(password)
+        self.email = email
+        self.role = role
+        self.active = active
+
+    def deactivate(self):
+        self.active = False
+
+    def activate(self):
+        self.active = True
+
+    @staticmethod
+    def find_user(users, username):
+        for user in users:
+            if user['username'] == username:
+                return user
+        return None
+
+    @staticmethod
+    def hash_password(password):
+        return passwords.hash_password(password)
+############### class haye admin taghriban moshabehe main 
+
+class Admin(User):
+    def __init__(self, username, password, email=''):
+        super().__init__(username, password, email, 'admin')
+
+    def create_admin(self):
+        store = identity_store()
+
+        if store.find(self.username):
+            print("Username already exists!")
+            Logger.log_message(f"Attempt to create an existing admin: {self.username}")
+            return
+
+        admin_data = {
+            'username': self.username,
+            'password': self.password,
+            'email': self.email,
+            'role': self.role,
+            'active': self.active
+        }
+        store.add(admin_data)
+        Logger.log_message(f"Admin created with username: {self.username}")
+        print(f"Admin created with username: {self.username}")
+############### deactive and active baraye user 
+
+    @staticmethod
+    def deactivate_user(username):
+        store = identity_store()
+        user = store.find(username)
+        if user and user['role'] != 'admin':
+            store.update(username, active=False)
+            sessions.revoke(username)
+            Logger.log_message(f"User {username} deactivated by admin")
+            print(f"User {username} deactivated successfully!")
+        else:
+            print("User not found!")
+
+    @staticmethod
+    def activate_user(username):
+        store = identity_store()
+        user = store.find(username)
+        if user and user['role'] != 'admin':
+            store.update(username, active=True)
+            Logger.log_message(f"User {username} activated by admin")
+            print(f"User {username} activated successfully!")
+        else:
+            print("User not found!")
+
+            ############### purge data  bara admin 
+
+    @staticmethod
+    def purge_data():
+        confirm = input("Are you sure you want to delete all data? (yes/no): ")
+        if confirm.lower() == 'yes':
+            for file in [ADMIN_FILE, USERS_FILE, PROJECTS_FILE, LOG_FILE]:
+                if os.path.exists(file):
+                    os.remove(file)
+            remove_undo_files()
+            sessions.revoke_all()
+            changefeed.purge()
+            import snapshots
+            snapshots.purge()
+            print("All data purged!")
+        else:
+            print("Purge cancelled.")
+############### session tokens for scripted commands
+
+def login(username, ttl):
+    user_data = identity_store().find(username)
+    if user_data is None or not passwords.verify_password(getpass("Password: "), user_data['password']):
+        print("Invalid username or password!")
+        Logger.log_message(f"Failed session login for username: {username}")
+        return
+    if not user_data['active']:
+        print("Account is inactive. Contact admin.")
+        return
+    sessions.issue_token(user_data['username'], user_data['email'], user_data['role'], ttl)
+    Logger.log_message(f"Session issued for {username}")
+    print(f"Session started for {username} (valid for {ttl // 60} minutes)")
+
+def logout(username, admin):
+    admin_data = identity_store().find(admin)
+    valid = admin_data is not None and passwords.verify_password(getpass("Admin password: "), admin_data['password'])
+    if not valid or admin_data['role'] != 'admin' or not admin_data['active']:
+        print("Invalid admin username or password!")
+        Logger.log_message(f"Failed session revoke for {username} by {admin}")
+        return
+    sessions.revoke(username)
+    Logger.log_message(f"Session revoked for {username} by admin {admin}")
+    print(f"Session ended for {username}")
+############### bulk import
+
+def import_tasks(args):
+    import bulk_io
+    def progress(imported, rejected):
+        print(f"\r{imported} task(s) imported, {rejected} rejected", end='', flush=True)
+    try:
+        imported, errors = bulk_io.import_tasks(
+            args.file, args.project, 'manager', fmt=args.format, chunk_size=args.chunk_size,
+            workers=args.workers, resume=args.resume, on_chunk=progress)
+    except (OSError, ValueError) as e:
+        print(f"Import failed: {e}")
+        return
+    print(f"\rImported {imported} task(s) into project {args.project}, {len(errors)} row(s) rejected")
+    for line_number, message in errors[:20]:
+        print(f"  line {line_number}: {message}")
+############### export
+
+def export_data(args):
+    import sys
+    import bulk_io
+    statuses = set(args.status) if args.status else None
+    out = open(args.output, 'w', newline='') if args.output else sys.stdout
+    try:
+        count = bulk_io.export(out, args.format, PROJECTS_FILE, set(args.project or ()), statuses, args.since, args.until)
+    finally:
+        if args.output:
+            out.close()
+    Logger.log_message(f"Exported {count} record(s) as {args.format}")
+    if args.output:
+        print(f"Exported {count} record(s) to {args.output}")
+############### history migration
+
+def migrate_history():
+    import bulk_io
+    count = bulk_io.migrate_history('manager', PROJECTS_FILE)
+    print(f"Migrated the history of {count} task(s)")
+############### change feed
+
+def read_changes(args):
+    import sys
+    cursor = args.cursor
+    remaining = args.limit
+    while remaining > 0:
+        events, cursor = changefeed.read(cursor, min(remaining, 1000), args.project)
+        for event in events:
+            print(json.dumps(event))
+        remaining -= len(events)
+        if len(events) < 1000:
+            break
+    print(f"cursor: {cursor}", file=sys.stderr)
+############### reports
+
+def status_report(by):
+    from columnar import TaskColumns, STATUSES
+    columns = TaskColumns().build()
+    counts = columns.count_by_status_per_leader() if by == 'leader' else columns.count_by_status_per_assignee()
+    print(f"{by:<20}" + ''.join(f"{status.value:>10}" for status in STATUSES) + f"{'total':>10}")
+    for name in sorted(counts):
+        row = counts[name]
+        print(f"{name:<20}" + ''.join(f"{row.get(status, 0):>10}" for status in STATUSES) + f"{sum(row.values()):>10}")
+
+def flow_metrics(args):
+    import analytics
+    try:
+        data = analytics.extract(project_ids=set(args.project or ()))
+    except RuntimeError as e:
+        print(e)
+        return
+    if args.csv:
+        with open(args.csv, 'w', newline='') as out:
+            analytics.write_csv(data, out, args.by, args.weeks)
+        print(f"Metrics for {len(data)} task(s) written to {args.csv}")
+    else:
+        analytics.report(data, args.by, args.weeks)
+############### password hashing cost
+
+def calibrate_hasher(target_ms, scheme):
+    params = passwords.calibrate(target_ms, scheme)
+    passwords.save_config(scheme, params)
+    seconds = passwords.time_hash(scheme, params)
+    Logger.log_message(f"Password hasher calibrated to {scheme} {params}")
+    print(f"Using {scheme} {params}: {seconds * 1000:.1f} ms per hash (target {target_ms} ms)")
+
+def bench_hasher(rounds):
+    print(f"{'scheme':<15}{'params':<28}{'hashes/sec':>12}{'ms/hash':>10}")
+    for scheme, params, rate in passwords.benchmark(rounds=rounds):
+        print(f"{scheme:<15}{passwords.format_params(params):<28}{rate:>12.1f}{1000 / rate:>10.1f}")
+############### hot-path statistics
+
+def show_stats(args):
+    import instrument
+    if args.reset:
+        instrument.reset()
+    if args.enable or args.disable:
+        instrument.set_enabled(args.enable)
+    stats = instrument.load()
+    print(f"Instrumentation: {'on' if stats['enabled'] else 'off'} (since {stats.get('since') or 'never'})")
+    print(f"{'operation':<26}{'count':>8}{'mean ms':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}{'bytes':>12}")
+    for operation, count, mean, p50, p90, p99, peak, size in instrument.summary():
+        print(f"{operation:<26}{count:>8}{mean:>10.3f}{p50:>10.3f}{p90:>10.3f}{p99:>10.3f}{peak:>10.3f}"
+              f"{instrument.format_bytes(size) if size else '':>12}")
+############### main  
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage system admin and data.")
+    subparsers = parser.add_subparsers(dest='command')
+
+    create_admin_parser = subparsers.add_parser('create-admin')
+    create_admin_parser.add_argument('--username', required=True, help='Admin username')
+    create_admin_parser.add_argument('--password', required=True, help='Admin password')
+
+    deactivate_user_parser = subparsers.add_parser('deactivate-user')
+    deactivate_user_parser.add_argument('--username', required=True, help='Username to deactivate')
+
+    activate_user_parser = subparsers.add_parser('activate-user')
+    activate_user_parser.add_argument('--username', required=True, help='Username to activate')
+
+    purge_data_parser = subparsers.add_parser('purge-data')
+
+    login_parser = subparsers.add_parser('login')
+    login_parser.add_argument('--username', required=True, help='Username to start a session for')
+    login_parser.add_argument('--ttl', type=int, default=sessions.SESSION_TTL, help='Session lifetime in seconds')
+
+    logout_parser = subparsers.add_parser('logout')
+    logout_parser.add_argument('--username', required=True, help='Username to end the session of')
+    logout_parser.add_argument('--admin', required=True, help='Admin username (password is prompted)')
+
+    import_parser = subparsers.add_parser('import-tasks')
+    import_parser.add_argument('--project', required=True, help='Target project ID')
+    import_parser.add_argument('--file', required=True, help='CSV or JSONL file of tasks')
+    import_parser.add_argument('--format', choices=['csv', 'jsonl'], help='Input format (default: from file extension)')
+    import_parser.add_argument('--chunk-size', type=int, default=5000, help='Rows validated and committed per chunk')
+    import_parser.add_argument('--workers', type=int, help='Parser processes (default: CPU count)')
+    import_parser.add_argument('--resume', action='store_true', help='Commit an interrupted import without re-reading the file')
+
+    export_parser = subparsers.add_parser('export')
+    export_parser.add_argument('--format', choices=['jsonl', 'csv'], default='jsonl', help='Output format')
+    export_parser.add_argument('--output', help='Output file (default: stdout)')
+    export_parser.add_argument('--project', action='append', help='Only export this project ID (repeatable)')
+    export_parser.add_argument('--status', action='append', choices=[status.name for status in Status], help='Only export tasks with this status (repeatable)')
+    export_parser.add_argument('--since', type=datetime.fromisoformat, help='Only records at or after this ISO date/time')
+    export_parser.add_argument('--until', type=datetime.fromisoformat, help='Only records before this ISO date/time')
+
+    subparsers.add_parser('migrate-history')
+
+    changes_parser = subparsers.add_parser('changes')
+    changes_parser.add_argument('--cursor', type=int, default=0, help='Last sequence number already consumed')
+    changes_parser.add_argument('--limit', type=int, default=1000, help='Maximum number of events to print')
+    changes_parser.add_argument('--project', help='Only events of this project ID')
+
+    status_report_parser = subparsers.add_parser('status-report')
+    status_report_parser.add_argument('--by', choices=['leader', 'assignee'], default='leader', help='Group task counts by')
+
+    metrics_parser = subparsers.add_parser('metrics')
+    metrics_parser.add_argument('--by', choices=['project', 'assignee'], default='project', help='Group cycle and lead times by')
+    metrics_parser.add_argument('--project', action='append', help='Only this project ID (repeatable)')
+    metrics_parser.add_argument('--weeks', type=int, default=12, help='Weeks of throughput and burndown to show')
+    metrics_parser.add_argument('--csv', help='Write the metrics to this CSV file instead of printing them')
+
+    calibrate_parser = subparsers.add_parser('calibrate-hasher')
+    calibrate_parser.add_argument('--target-ms', type=float, default=250, help='Target login hashing latency in milliseconds')
+    calibrate_parser.add_argument('--scheme', choices=sorted(passwords.HASHERS), default=passwords.DEFAULT_SCHEME, help='Hashing scheme')
+
+    bench_hasher_parser = subparsers.add_parser('bench-hasher')
+    bench_hasher_parser.add_argument('--rounds', type=int, default=5, help='Hashes per setting')
+
+    stats_parser = subparsers.add_parser('stats')
+    toggle = stats_parser.add_mutually_exclusive_group()
+    toggle.add_argument('--enable', action='store_true', help='Record timings from the next start of the app')
+    toggle.add_argument('--disable', action='store_true', help='Stop recording timings from the next start of the app')
+    stats_parser.add_argument('--reset', action='store_true', help='Clear the recorded statistics first')
+
+    args = parser.parse_args()
+    if args.command == 'create-admin':
+        admin = Admin(args.username, args.password)
+        admin.create_admin()
+    elif args.command == 'deactivate-user':
+        Admin.deactivate_user(args.username)
+    elif args.command == 'activate-user':
+        Admin.activate_user(args.username)
+    elif args.command == 'purge-data':
+        Admin.purge_data()
+    elif args.command == 'login':
+        login(args.username, args.ttl)
+    elif args.command == 'logout':
+        logout(args.username, args.admin)
+    elif args.command == 'import-tasks':
+        import_tasks(args)
+    elif args.command == 'export':
+        export_data(args)
+    elif args.command == 'migrate-history':
+        migrate_history()
+    elif args.command == 'changes':
+        read_changes(args)
+    elif args.command == 'status-report':
+        status_report(args.by)
+    elif args.command == 'metrics':
+        flow_metrics(args)
+    elif args.command == 'calibrate-hasher':
+        calibrate_hasher(args.target_ms, args.scheme)
+    elif args.command == 'bench-hasher':
+        bench_hasher(args.rounds)
+    elif args.command == 'stats':
+        show_stats(args)
+    else:
+        parser.print_help()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+import json
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+from enum import Enum
+
+# Listing output
+#
+# Listings from the scripted commands are written either as a rich table
+# (the default, for people) or in a machine-readable format:
+#
+#   plain   header line, then one line per row, columns separated by two spaces
+#   tsv     header line, then tab-separated rows (tabs/newlines in values become spaces)
+#   json    one JSON array of objects, written incrementally
+#
+# The machine formats skip rich entirely: rows are formatted into strings and
+# written to stdout in chunks, so large listings cost what writing them costs.
+
+FORMATS = ['table', 'plain', 'tsv', 'json']
+CHUNK_ROWS = 1000
+
+
+def _json_value(value):
+    if isinstance(value, list):
+        return [item.to_dict() if hasattr(item, 'to_dict') else item for item in value]
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _text_value(value):
+    if type(value) is str:
+        return value
+    value = _json_value(value)
+    if value is None:
+        return ''
+    if isinstance(value, list):
+        return ', '.join(' '.join(str(v) for v in item.values()) if isinstance(item, dict) else str(item)
+                         for item in value)
+    return str(value)
+
+
+def _tsv_value(value):
+    value = _text_value(value)
+    if '\t' in value or '\n' in value or '\r' in value:
+        value = value.replace('\t', ' ').replace('\r', ' ').replace('\n', ' ')
+    return value
+
+
+def _format_lines(fmt, columns):
+    """Return (header, format_row) for a text format."""
+    if fmt == 'tsv':
+        return '\t'.join(columns) + '\n', lambda record: '\t'.join(_tsv_value(record.get(c)) for c in columns) + '\n'
+    if fmt == 'plain':
+        return '  '.join(columns) + '\n', lambda record: '  '.join(_text_value(record.get(c)) for c in columns) + '\n'
+    first = [True]
+
+    def format_row(record):
+        prefix = '[\n' if first[0] else ',\n'
+        first[0] = False
+        return prefix + json.dumps({c: _json_value(record.get(c)) for c in columns})
+    return None, format_row
+
+
+@contextmanager
+def rows(fmt, columns, title=None, out=None):
+    """Yield a function that writes one record (a dict keyed by column) in the given format."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt}")
+    if fmt == 'table':
+        from main import Table, console
+        table = Table(title=title, show_lines=True)
+        for column in columns:
+            table.add_column(column)
+        yield lambda record: table.add_row(*(_text_value(record.get(c)) for c in columns))
+        console.print(table)
+        return
+
+    out = out or sys.stdout
+    header, format_row = _format_lines(fmt, columns)
+    pending = [header] if header else []
+    count = 0
+
+    def write(record):
+        nonlocal count
+        pending.append(format_row(record))
+        count += 1
+        if len(pending) >= CHUNK_ROWS:
+            out.write(''.join(pending))
+            pending.clear()
+
+    yield write
+    if fmt == 'json':
+        pending.append('\n]\n' if count else '[]\n')
+    out.write(''.join(pending))
+    out.flush()
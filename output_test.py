@@ -0,0 +1,39 @@
+import io
+import json
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+import output
+from main import Status
+
+class TestOutput(unittest.TestCase):
+
+    def test_1_text_formats(self):
+        record = {'title': 'Tab\there', 'status': Status.DONE, 'assignees': ['a', 'b'], 'end_time': datetime(2024, 1, 2)}
+        columns = ['title', 'status', 'assignees', 'end_time']
+        out = io.StringIO()
+        with output.rows('tsv', columns, out=out) as write:
+            write(record)
+        self.assertEqual(out.getvalue(), "title\tstatus\tassignees\tend_time\nTab here\tDONE\ta, b\t2024-01-02T00:00:00\n",
+                         "Test 1: TSV output wrong")
+        out = io.StringIO()
+        with output.rows('plain', ['title', 'status'], out=out) as write:
+            write({'title': 'T', 'status': Status.TODO})
+        self.assertEqual(out.getvalue(), "title  status\nT  TODO\n", "Test 1: Plain output wrong")
+
+    def test_2_json_written_in_chunks(self):
+        out = io.StringIO()
+        with patch('output.CHUNK_ROWS', 10), patch.object(out, 'write', wraps=out.write) as mock_write:
+            with output.rows('json', ['n'], out=out) as write:
+                for n in range(25):
+                    write({'n': n})
+        self.assertEqual(json.loads(out.getvalue()), [{'n': n} for n in range(25)], "Test 2: JSON output wrong")
+        self.assertEqual(mock_write.call_count, 3, "Test 2: Rows not written in chunks")
+        out = io.StringIO()
+        with output.rows('json', ['n'], out=out):
+            pass
+        self.assertEqual(json.loads(out.getvalue()), [], "Test 2: Empty listing is not an empty array")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import hashlib
+import hmac
+import json
+import os
+import time
+
+# Password hashing
+#
+# Hashes are stored as versioned strings so the cost can be raised later
+# without breaking existing accounts:
+#
+#   scrypt$n=16384,r=8,p=1$<salt hex>$<hash hex>
+#   pbkdf2_sha256$iterations=600000$<salt hex>$<hash hex>
+#
+# A bare 64 character hex digest is a legacy unsalted SHA-256 hash. It still
+# verifies, but needs_rehash() reports it so login can upgrade it.
+
+HASHER_FILE = 'hasher.json'
+SALT_BYTES = 16
+DEFAULT_SCHEME = 'scrypt'
+DEFAULT_PARAMS = {
+    'scrypt': {'n': 2 ** 14, 'r': 8, 'p': 1},
+    'pbkdf2_sha256': {'iterations': 600000},
+}
+
+_config = None
+
+
+def _scrypt(password, salt, params):
+    n, r, p = params['n'], params['r'], params['p']
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * n * r * p, dklen=32)
+
+
+def _pbkdf2_sha256(password, salt, params):
+    return hashlib.pbkdf2_hmac('sha256', password.encode(), salt, params['iterations'])
+
+
+HASHERS = {
+    'scrypt': _scrypt,
+    'pbkdf2_sha256': _pbkdf2_sha256,
+}
+
+
+def load_config():
+    global _config
+    if _config is None:
+        config = {'scheme': DEFAULT_SCHEME, 'params': dict(DEFAULT_PARAMS[DEFAULT_SCHEME])}
+        if os.path.exists(HASHER_FILE):
+            with open(HASHER_FILE, 'r') as f:
+                config = json.load(f)
+        _config = config
+    return _config
+
+
+def save_config(scheme, params):
+    global _config
+    if scheme not in HASHERS:
+        raise ValueError(f"Unknown password hashing scheme: {scheme}")
+    _config = {'scheme': scheme, 'params': dict(params)}
+    with open(HASHER_FILE, 'w') as f:
+        json.dump(_config, f, indent=4)
+    return _config
+
+
+def format_params(params):
+    return ",".join(f"{key}={value}" for key, value in sorted(params.items()))
+
+
+def _parse_params(text):
+    return {key: int(value) for key, value in (item.split('=') for item in text.split(','))}
+
+
+def hash_password(password, scheme=None, params=None):
+    if scheme is None:
+        config = load_config()
+        scheme = config['scheme']
+        params = params or config['params']
+    params = params or DEFAULT_PARAMS[scheme]
+    salt = os.urandom(SALT_BYTES)
+    digest = HASHERS[scheme](password, salt, params)
+    return f"{scheme}${format_params(params)}${salt.hex()}${digest.hex()}"
+
+
+def parse_hash(encoded):
+    """Split a stored hash into (scheme, params, salt, digest)."""
+    if '$' not in encoded:
+        return 'sha256', {}, b'', encoded
+    scheme, params, salt, digest = encoded.split('$')
+    return scheme, _parse_params(params), bytes.fromhex(salt), digest
+
+
+def verify_password(password, encoded):
+    scheme, params, salt, digest = parse_hash(encoded)
+    if scheme == 'sha256':
+        candidate = hashlib.sha256(password.encode()).hexdigest()
+    elif scheme in HASHERS:
+        candidate = HASHERS[scheme](password, salt, params).hex()
+    else:
+        return False
+    return hmac.compare_digest(candidate, digest)
+
+
+def needs_rehash(encoded):
+    scheme, params, _, _ = parse_hash(encoded)
+    config = load_config()
+    return scheme != config['scheme'] or params != config['params']
+
+
+def time_hash(scheme, params, rounds=3):
+    """Return the median wall-clock seconds for one hash at the given cost."""
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        HASHERS[scheme]('calibration-password', b'\x00' * SALT_BYTES, params)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def calibrate(target_ms, scheme=DEFAULT_SCHEME):
+    """Pick the highest cost whose hash time stays within target_ms on this machine."""
+    target = target_ms / 1000.0
+    if scheme == 'scrypt':
+        params = {'n': 2 ** 10, 'r': 8, 'p': 1}
+        while True:
+            candidate = dict(params, n=params['n'] * 2)
+            if candidate['n'] > 2 ** 20 or time_hash(scheme, candidate) > target:
+                return params
+            params = candidate
+    if scheme == 'pbkdf2_sha256':
+        probe = {'iterations': 100000}
+        per_iteration = time_hash(scheme, probe) / probe['iterations']
+        iterations = int(target / per_iteration) // 10000 * 10000
+        return {'iterations': max(iterations, 10000)}
+    raise ValueError(f"Unknown password hashing scheme: {scheme}")
+
+
+def benchmark_settings():
+    settings = [('scrypt', {'n': 2 ** exp, 'r': 8, 'p': 1}) for exp in range(12, 18)]
+    settings += [('pbkdf2_sha256', {'iterations': it}) for it in (100000, 300000, 600000, 1000000)]
+    return settings
+
+
+def benchmark(settings=None, rounds=5):
+    """Yield (scheme, params, hashes_per_second) for each cost setting."""
+    for scheme, params in settings or benchmark_settings():
+        start = time.perf_counter()
+        for _ in range(rounds):
+            HASHERS[scheme]('benchmark-password', b'\x00' * SALT_BYTES, params)
+        elapsed = time.perf_counter() - start
+        yield scheme, params, rounds / elapsed
@@ -0,0 +1,51 @@
+import hashlib
+import os
+import tempfile
+import unittest
+
+import passwords
+
+FAST_SCRYPT = {'n': 2 ** 8, 'r': 8, 'p': 1}
+
+class TestPasswords(unittest.TestCase):
+
+    def setUp(self):
+        self.old_cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        passwords._config = None
+        passwords.save_config('scrypt', FAST_SCRYPT)
+
+    def tearDown(self):
+        passwords._config = None
+        os.chdir(self.old_cwd)
+        self.tmp.cleanup()
+
+    def test_1_hash_is_salted_and_versioned(self):
+        first = passwords.hash_password('secret')
+        second = passwords.hash_password('secret')
+        self.assertNotEqual(first, second, "Test 1: Hashes of the same password should differ by salt")
+        self.assertTrue(first.startswith('scrypt$n=256,p=1,r=8$'), "Test 1: Hash string is not versioned")
+
+    def test_2_verify(self):
+        encoded = passwords.hash_password('secret')
+        self.assertTrue(passwords.verify_password('secret', encoded), "Test 2: Correct password rejected")
+        self.assertFalse(passwords.verify_password('wrong', encoded), "Test 2: Wrong password accepted")
+
+    def test_3_pbkdf2(self):
+        encoded = passwords.hash_password('secret', 'pbkdf2_sha256', {'iterations': 1000})
+        self.assertTrue(passwords.verify_password('secret', encoded), "Test 3: PBKDF2 hash failed to verify")
+        self.assertTrue(passwords.needs_rehash(encoded), "Test 3: Hash with another scheme should need rehash")
+
+    def test_4_legacy_sha256(self):
+        legacy = hashlib.sha256(b'secret').hexdigest()
+        self.assertTrue(passwords.verify_password('secret', legacy), "Test 4: Legacy hash failed to verify")
+        self.assertTrue(passwords.needs_rehash(legacy), "Test 4: Legacy hash should need rehash")
+        self.assertFalse(passwords.needs_rehash(passwords.hash_password('secret')), "Test 4: Current hash should not need rehash")
+
+    def test_5_config_persisted(self):
+        passwords._config = None
+        self.assertEqual(passwords.load_config()['params'], FAST_SCRYPT, "Test 5: Hasher config not reloaded from file")
+
+if __name__ == '__main__':
+    unittest.main()
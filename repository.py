@@ -0,0 +1,253 @@
+import threading
+from contextlib import contextmanager, ExitStack
+
+import main
+from main import Project, identity_store, load_data, save_data, log_message, projects_locked, file_stamp
+
+# Locking
+#
+# The repository can be shared by several threads (API server workers,
+# background jobs). Instead of one global lock it uses:
+#
+#   - one RLock per project, so edits to independent projects run in parallel;
+#   - a fixed set of striped locks for the user table, picked by username hash;
+#   - a registry lock guarding the project dict and the lock table itself;
+#   - a file lock serializing writes of projects.json.
+#
+# Lock ordering, to stay deadlock free:
+#
+#   1. user stripes, in ascending stripe index
+#   2. project locks, in ascending project id (use locked(*ids), never nest
+#      two locked() calls by hand)
+#   3. the identity store lock, then the projects.json file lock (the
+#      thread lock, then the cross-process projects_locked())
+#
+# The registry lock is a leaf: it is only held for dict lookups and nothing
+# else is acquired while holding it. refresh() takes project locks after the
+# file lock, but only with a non-blocking acquire, skipping busy projects.
+#
+# Other processes
+#
+# projects.json is also written by menu sessions, the CLI and bulk jobs, so
+# the file is never simply overwritten from the cache. Every change to a
+# project bumps its version; write() re-reads the file under the lock and
+# replaces only the records of projects changed here since they were last
+# written, keeping everyone else's. refresh() reloads the unchanged projects
+# from the file once another process has written it.
+
+
+class StripedLock:
+    """A fixed pool of locks shared by key hash, for tables with many rows."""
+
+    def __init__(self, stripes=16):
+        self.locks = [threading.Lock() for _ in range(stripes)]
+
+    def index(self, key):
+        return hash(key) % len(self.locks)
+
+    @contextmanager
+    def locked(self, *keys):
+        with ExitStack() as stack:
+            for index in sorted({self.index(key) for key in keys}):
+                stack.enter_context(self.locks[index])
+            yield
+
+
+class Snapshot(list):
+    """Serialized projects, numbered in the order the snapshots were taken."""
+
+    def __init__(self, records, generation, versions):
+        super().__init__(records)
+        self.generation = generation
+        self.versions = versions
+
+
+class ProjectRepository:
+    """Projects loaded once from projects.json and shared across requests.
+
+    Long-running processes (the API server, batch jobs) keep this warm cache
+    instead of re-reading the whole file for every operation. Mutations are
+    made on the cached Project objects inside locked() and persisted with
+    save(), which only re-serializes the projects changed since the last save
+    and only writes those over the file's current records.
+    """
+
+    def __init__(self, file=None):
+        self.file = file or main.PROJECTS_FILE
+        self.projects = {}
+        self.user_locks = StripedLock()
+        self._locks = {}
+        self._serialized = {}
+        self._registry_lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._generation = 0
+        self._written = 0
+        self._versions = {}
+        self._synced = {}
+        self._stamp = None
+
+    def load(self):
+        with self._file_lock, projects_locked(self.file):
+            records = load_data(self.file)
+            self._stamp = file_stamp(self.file)
+        with self._registry_lock:
+            self.projects = {data['id']: Project.from_dict(data) for data in records}
+            self._serialized = {data['id']: data for data in records}
+            self._versions, self._synced = {}, {}
+        return self
+
+    def refresh(self):
+        """Reload the projects another process changed since this one last read or wrote the file.
+
+        Projects changed here and not yet written, or locked right now, are
+        left alone; write() puts them over the file's records.
+        """
+        with self._file_lock, projects_locked(self.file):
+            stamp = file_stamp(self.file)
+            if stamp == self._stamp:
+                return self
+            on_disk = {data['id']: data for data in load_data(self.file)}
+            self._stamp = stamp
+            with self._registry_lock:
+                project_ids = set(on_disk) | set(self.projects)
+            for project_id in project_ids:
+                lock = self.lock_for(project_id)
+                if not lock.acquire(blocking=False):
+                    continue
+                try:
+                    with self._registry_lock:
+                        if self._versions.get(project_id, 0) != self._synced.get(project_id, 0):
+                            continue
+                        data = on_disk.get(project_id)
+                        if data is None:
+                            self.projects.pop(project_id, None)
+                            self._serialized.pop(project_id, None)
+                        else:
+                            self.projects[project_id] = Project.from_dict(data)
+                            self._serialized[project_id] = data
+                finally:
+                    lock.release()
+        return self
+
+    def lock_for(self, project_id):
+        with self._registry_lock:
+            lock = self._locks.get(project_id)
+            if lock is None:
+                lock = self._locks[project_id] = threading.RLock()
+            return lock
+
+    @contextmanager
+    def locked(self, *project_ids):
+        """Hold the locks of the given projects, in id order, and yield the projects.
+
+        Projects touched inside the block are re-serialized on the next save().
+        """
+        ids = sorted(set(project_ids))
+        with ExitStack() as stack:
+            for project_id in ids:
+                stack.enter_context(self.lock_for(project_id))
+            try:
+                yield [self.get(project_id) for project_id in project_ids]
+            finally:
+                self.mark_dirty(*ids)
+
+    def mark_dirty(self, *project_ids):
+        with self._registry_lock:
+            for project_id in project_ids:
+                self._changed(project_id)
+
+    def _changed(self, project_id):
+        # Caller holds the registry lock.
+        self._serialized.pop(project_id, None)
+        self._versions[project_id] = self._versions.get(project_id, 0) + 1
+
+    def get(self, project_id):
+        with self._registry_lock:
+            return self.projects.get(project_id)
+
+    def for_member(self, username):
+        with self._registry_lock:
+            projects = list(self.projects.values())
+        return [project for project in projects if username in project.members]
+
+    def add(self, project):
+        with self._registry_lock:
+            self.projects[project.id] = project
+            self._changed(project.id)
+
+    def remove(self, project_id):
+        with self.lock_for(project_id), self._registry_lock:
+            self._changed(project_id)
+            return self.projects.pop(project_id, None)
+
+    def move_task(self, task_id, source_id, target_id, username):
+        """Move a task between projects, an example of a multi-project operation."""
+        with self.locked(source_id, target_id) as (source, target):
+            task = source.remove_task(task_id, username)
+            if task is None:
+                return None
+            target.add_task(task, username)
+        log_message(f"Task {task_id} moved from project {source_id} to {target_id} by {username}")
+        return task
+
+    def update_user(self, username, **fields):
+        with self.user_locks.locked(username):
+            return identity_store().update(username, **fields)
+
+    def snapshot(self):
+        with self._registry_lock:
+            self._generation += 1
+            generation = self._generation
+            versions = dict(self._versions)
+            projects = list(self.projects.items())
+        snapshot = []
+        for project_id, project in projects:
+            data = self._serialized.get(project_id)
+            if data is None:
+                with self.lock_for(project_id):
+                    data = project.to_dict()
+                    with self._registry_lock:
+                        self._serialized[project_id] = data
+            snapshot.append(data)
+        return Snapshot(snapshot, generation, versions)
+
+    def write(self, snapshot):
+        """Write the projects a snapshot changed to projects.json, unless a newer one was already written.
+
+        Snapshots are taken outside the file lock, so two saves can reach it
+        in either order; the older one must not overwrite the newer. Records
+        of projects not changed here are kept as the file has them.
+        """
+        import snapshots
+        with self._file_lock, projects_locked(self.file):
+            if snapshot.generation <= self._written:
+                return
+            self._written = snapshot.generation
+            changed = {project_id for project_id, version in snapshot.versions.items()
+                       if version > self._synced.get(project_id, 0)}
+            if not changed:
+                return
+            current = file_stamp(self.file) == self._stamp
+            if current:
+                records = list(snapshot)
+            else:
+                ours = {data['id']: data for data in snapshot}
+                records = []
+                for data in load_data(self.file):
+                    if data['id'] not in changed:
+                        records.append(data)
+                    elif data['id'] in ours:
+                        records.append(ours.pop(data['id']))
+                records += [data for project_id, data in ours.items() if project_id in changed]
+            save_data(records, self.file)
+            for project_id in changed:
+                self._synced[project_id] = snapshot.versions[project_id]
+            if current:
+                # Otherwise the cache misses the other writers' changes: keep
+                # the old stamp so the next refresh() reloads them.
+                self._stamp = file_stamp(self.file)
+            # Under the lock: the first catch_up reads the file it just wrote.
+            snapshots.catch_up(self.file)
+
+    def save(self):
+        self.write(self.snapshot())
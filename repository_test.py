@@ -0,0 +1,101 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from main import Project, Task, Status, load_data, save_data, PROJECTS_FILE
+from repository import ProjectRepository, StripedLock
+
+class TestProjectRepository(unittest.TestCase):
+
+    def setUp(self):
+        self.old_cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        projects = [Project(f'p{i}', f'Project {i}', 'leader', ['leader'], [Task(title=f'T{i}')]) for i in range(4)]
+        save_data([project.to_dict() for project in projects], PROJECTS_FILE)
+        self.repository = ProjectRepository().load()
+
+    def tearDown(self):
+        os.chdir(self.old_cwd)
+        self.tmp.cleanup()
+
+    def test_1_parallel_edits_to_independent_projects(self):
+        def edit(project_id):
+            for _ in range(50):
+                with self.repository.locked(project_id) as (project,):
+                    project.tasks.append(Task(title='extra'))
+                self.repository.save()
+
+        threads = [threading.Thread(target=edit, args=(f'p{i}',)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        reloaded = ProjectRepository().load()
+        for i in range(4):
+            self.assertEqual(len(reloaded.get(f'p{i}').tasks), 51, f"Test 1: Edits to p{i} lost")
+
+    def test_2_move_task_between_projects(self):
+        task_id = self.repository.get('p1').tasks[0].id
+        self.repository.move_task(task_id, 'p1', 'p0', 'leader')
+        self.repository.save()
+        reloaded = ProjectRepository().load()
+        self.assertEqual(len(reloaded.get('p1').tasks), 0, "Test 2: Task not removed from source project")
+        self.assertIn(task_id, [t.id for t in reloaded.get('p0').tasks], "Test 2: Task not added to target project")
+
+    def test_3_save_without_mark_dirty_keeps_cached_record(self):
+        self.repository.get('p2').tasks[0].status = Status.DONE
+        self.repository.save()
+        self.assertEqual(ProjectRepository().load().get('p2').tasks[0].status, Status.BACKLOG,
+                         "Test 3: Untracked edit should not be re-serialized")
+        self.repository.mark_dirty('p2')
+        self.repository.save()
+        self.assertEqual(ProjectRepository().load().get('p2').tasks[0].status, Status.DONE,
+                         "Test 3: Dirty project not re-serialized")
+
+    def test_4_striped_lock_orders_stripes(self):
+        locks = StripedLock(stripes=4)
+        with locks.locked('a', 'b', 'c'):
+            held = [lock.locked() for lock in locks.locks]
+        self.assertTrue(any(held), "Test 4: No stripe held")
+        self.assertFalse(any(lock.locked() for lock in locks.locks), "Test 4: Stripes not released")
+
+    def test_5_snapshot_independent_of_live_objects(self):
+        project = self.repository.get('p0')
+        snapshot = self.repository.snapshot()
+        project.members.append('member')
+        project.tasks[0].assignees.append('member')
+        project.tasks.append(Task(title='extra'))
+        record = snapshot[0]
+        self.assertEqual(record['members'], ['leader'], "Test 5: Snapshot shares the members list")
+        self.assertEqual(record['tasks'][0]['assignees'], [], "Test 5: Snapshot shares an assignees list")
+        self.assertEqual(len(record['tasks']), 1, "Test 5: Snapshot shares the task list")
+
+    def test_6_stale_save_does_not_overwrite_newer(self):
+        stale = self.repository.snapshot()
+        self.repository.get('p0').tasks[0].status = Status.DONE
+        self.repository.mark_dirty('p0')
+        self.repository.save()
+        self.repository.write(stale)
+        self.assertEqual(ProjectRepository().load().get('p0').tasks[0].status, Status.DONE,
+                         "Test 6: Older snapshot overwrote a newer save")
+
+    def test_7_save_keeps_changes_written_by_another_session(self):
+        other = Project.from_dict(load_data(PROJECTS_FILE)[2])
+        other.tasks[0].status = Status.DONE
+        other._update_project()
+        with self.repository.locked('p1') as (project,):
+            project.tasks.append(Task(title='extra'))
+        self.repository.save()
+        reloaded = ProjectRepository().load()
+        self.assertEqual(reloaded.get('p2').tasks[0].status, Status.DONE, "Test 7: Other session's change lost")
+        self.assertEqual(len(reloaded.get('p1').tasks), 2, "Test 7: Own change not saved")
+        self.assertEqual(self.repository.get('p2').tasks[0].status, Status.BACKLOG, "Test 7: Cache reloaded early")
+        self.repository.refresh()
+        self.assertEqual(self.repository.get('p2').tasks[0].status, Status.DONE, "Test 7: Cache not refreshed")
+        self.assertEqual(len(self.repository.get('p1').tasks), 2, "Test 7: Refresh replaced a saved project")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+
+# Local session tokens
+#
+# A token is "<payload>.<signature>": the payload is the user's identity and an
+# expiry encoded as urlsafe base64 JSON, the signature an HMAC-SHA256 of it with
+# a per-installation secret. Tokens are cached one file per user so scripted
+# commands can resume a session without reading the user tables or running the
+# password hash again.
+#
+# Each user also has a token generation, stored next to the cached token and
+# carried in every token issued. revoke() bumps it, which invalidates all of
+# the user's outstanding tokens (copies included) before they expire.
+
+SESSION_DIR = '.sessions'
+SESSION_KEY_FILE = '.session_key'
+SESSION_TTL = 8 * 60 * 60
+
+
+def _write_private(path, data):
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+
+
+def _secret_key():
+    if not os.path.exists(SESSION_KEY_FILE):
+        _write_private(SESSION_KEY_FILE, os.urandom(32))
+    with open(SESSION_KEY_FILE, 'rb') as f:
+        return f.read()
+
+
+def _sign(body):
+    return hmac.new(_secret_key(), body.encode(), hashlib.sha256).hexdigest()
+
+
+def _token_path(username):
+    return os.path.join(SESSION_DIR, hashlib.sha256(username.encode()).hexdigest()[:32] + '.token')
+
+
+def _generation_path(username):
+    return os.path.join(SESSION_DIR, hashlib.sha256(username.encode()).hexdigest()[:32] + '.gen')
+
+
+def _generation(username):
+    try:
+        with open(_generation_path(username), 'r') as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return 0
+
+
+def issue_token(username, email, role, ttl=SESSION_TTL):
+    payload = {
+        'username': username,
+        'email': email,
+        'role': role,
+        'exp': int(time.time() + ttl),
+        'gen': _generation(username)
+    }
+    body = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+    token = f"{body}.{_sign(body)}"
+    os.makedirs(SESSION_DIR, exist_ok=True)
+    _write_private(_token_path(username), token.encode())
+    return token
+
+
+def verify_token(token):
+    """Return the token payload, or None if it is forged, malformed, expired or revoked."""
+    body, _, signature = token.partition('.')
+    if not hmac.compare_digest(_sign(body), signature):
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(body.encode()))
+    except ValueError:
+        return None
+    if payload['exp'] < time.time():
+        return None
+    if payload.get('gen', 0) != _generation(payload['username']):
+        return None
+    return payload
+
+
+def load_token(username):
+    path = _token_path(username)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return f.read().strip()
+
+
+def resume(username=None, token=None):
+    if token is None:
+        if username is None:
+            return None
+        token = load_token(username)
+        if token is None:
+            return None
+    payload = verify_token(token)
+    if payload is None or (username is not None and payload['username'] != username):
+        return None
+    return payload
+
+
+def revoke(username):
+    """End every session of a user: drop the cached token and invalidate all issued ones."""
+    path = _token_path(username)
+    if os.path.exists(path):
+        os.remove(path)
+    os.makedirs(SESSION_DIR, exist_ok=True)
+    _write_private(_generation_path(username), str(_generation(username) + 1).encode())
+
+
+def revoke_all():
+    """Invalidate every outstanding token by rotating the secret key."""
+    if os.path.exists(SESSION_KEY_FILE):
+        os.remove(SESSION_KEY_FILE)
+    if os.path.isdir(SESSION_DIR):
+        for name in os.listdir(SESSION_DIR):
+            os.remove(os.path.join(SESSION_DIR, name))
@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+
+import sessions
+
+class TestSessions(unittest.TestCase):
+
+    def setUp(self):
+        self.old_cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+
+    def tearDown(self):
+        os.chdir(self.old_cwd)
+        self.tmp.cleanup()
+
+    def test_1_issue_and_resume(self):
+        sessions.issue_token('testuser', 'testuser@example.com', 'user')
+        payload = sessions.resume('testuser')
+        self.assertIsNotNone(payload, "Test 1: Cached session not resumed")
+        self.assertEqual(payload['role'], 'user', "Test 1: Session role does not match")
+
+    def test_2_forged_token_rejected(self):
+        token = sessions.issue_token('testuser', 'testuser@example.com', 'user')
+        body, _, signature = token.partition('.')
+        self.assertIsNone(sessions.verify_token(body + '.' + '0' * len(signature)), "Test 2: Forged token accepted")
+        self.assertIsNone(sessions.resume('otheruser', token), "Test 2: Token accepted for another user")
+
+    def test_3_expired_token_rejected(self):
+        sessions.issue_token('testuser', 'testuser@example.com', 'user', ttl=-1)
+        self.assertIsNone(sessions.resume('testuser'), "Test 3: Expired token accepted")
+
+    def test_4_revoke(self):
+        copied = sessions.issue_token('testuser', 'testuser@example.com', 'user')
+        other = sessions.issue_token('otheruser', 'otheruser@example.com', 'user')
+        sessions.revoke('testuser')
+        self.assertIsNone(sessions.resume('testuser'), "Test 4: Revoked session resumed")
+        self.assertIsNone(sessions.verify_token(copied), "Test 4: Copy of a revoked token accepted")
+        self.assertIsNotNone(sessions.verify_token(other), "Test 4: Another user's token revoked")
+        self.assertIsNotNone(sessions.resume('testuser', sessions.issue_token('testuser', 'testuser@example.com', 'user')),
+                             "Test 4: New token after a revoke rejected")
+        token = sessions.issue_token('testuser', 'testuser@example.com', 'user')
+        sessions.revoke_all()
+        self.assertIsNone(sessions.resume(token=token), "Test 4: Token survived key rotation")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,208 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import bulk_io
+import changefeed
+import main
+from main import Project
+
+# Snapshots for time travel
+#
+# A project as it was at any past moment is rebuilt from the change feed:
+# start from the project's newest snapshot taken at or before that moment and
+# replay the project's events after it, up to the moment.
+#
+# Snapshots are cut by catch_up(), a change feed consumer. It walks the feed
+# in windows of SNAPSHOT_INTERVAL events and, at the end of each window,
+# writes a snapshot of every project the window touched. All of a project's
+# events after its newest snapshot therefore fall within one window, so
+# rebuilding any moment replays (and reads) at most SNAPSHOT_INTERVAL events.
+# Writers that replace a project outside the feed (a 'project.reload' event)
+# snapshot it right after the event with take().
+#
+#   snapshots.jsonl   one {"seq", "ts", "project_id", "project"} per line;
+#                     "project" is null once the project is deleted
+#   snapshots.idx     "seq ts offset project_id" per snapshot and
+#                     "window seq ts" per window end reached
+#
+# History starts when snapshots are first cut: catch_up() then snapshots
+# every project as it is at that moment.
+
+SNAPSHOTS_FILE = 'snapshots.jsonl'
+INDEX_FILE = 'snapshots.idx'
+SNAPSHOT_INTERVAL = 500
+
+_lock = threading.Lock()
+_index = {'key': None, 'value': None}
+
+
+class Index:
+    """The parsed snapshots.idx: snapshot positions per project and window ends."""
+
+    def __init__(self):
+        self.snapshots = {}
+        self.windows = []
+
+    def add(self, seq, ts, offset, project_id):
+        self.snapshots.setdefault(project_id, []).append((seq, ts, offset))
+
+    def cursor(self):
+        return self.windows[-1][0] if self.windows else None
+
+    def latest(self, project_id, seq=None, ts=None):
+        """Return the project's newest (seq, ts, offset) at or before seq/ts, or None."""
+        candidates = [snapshot for snapshot in self.snapshots.get(project_id, ())
+                      if (seq is None or snapshot[0] <= seq) and (ts is None or snapshot[1] <= ts)]
+        return max(candidates, default=None)
+
+    def window_before(self, ts):
+        """Return the seq of the last window end at or before ts (0 if none)."""
+        return max((seq for seq, window_ts in self.windows if window_ts <= ts), default=0)
+
+
+def _read_index():
+    """Parse snapshots.idx, cached by path and size since it only ever grows."""
+    if not os.path.exists(INDEX_FILE):
+        return Index()
+    key = (os.path.abspath(INDEX_FILE), os.path.getsize(INDEX_FILE))
+    if _index['key'] == key:
+        return _index['value']
+    index = Index()
+    with open(INDEX_FILE, 'r') as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] == 'window':
+                index.windows.append((int(parts[1]), float(parts[2])))
+            else:
+                index.add(int(parts[0]), float(parts[1]), int(parts[2]), parts[3])
+    _index['key'], _index['value'] = key, index
+    return index
+
+
+def _append(index, snapshots, window=None):
+    """Write snapshots [(seq, ts, project_id, record)] and an optional window end (seq, ts)."""
+    lines = []
+    with open(SNAPSHOTS_FILE, 'ab') as f:
+        offset = f.seek(0, os.SEEK_END)
+        for seq, ts, project_id, record in snapshots:
+            line = (json.dumps({'seq': seq, 'ts': ts, 'project_id': project_id, 'project': record}) + '\n').encode()
+            f.write(line)
+            lines.append(f"{seq} {ts!r} {offset} {project_id}\n")
+            index.add(seq, ts, offset, project_id)
+            offset += len(line)
+        f.flush()
+        os.fsync(f.fileno())
+    if window is not None:
+        lines.append(f"window {window[0]} {window[1]!r}\n")
+        index.windows.append(window)
+    with open(INDEX_FILE, 'a') as f:
+        f.write(''.join(lines))
+
+
+def _load(offset):
+    with open(SNAPSHOTS_FILE, 'rb') as f:
+        f.seek(offset)
+        record = json.loads(f.readline())['project']
+    return Project.from_dict(record) if record is not None else None
+
+
+@contextmanager
+def _locked():
+    """Serialize snapshot writers across threads and processes; yields the current index."""
+    with _lock, open(INDEX_FILE, 'a') as f, changefeed.file_lock(f):
+        yield _read_index()
+
+
+def take(event, record):
+    """Snapshot a project record as of a feed event that replaced it (project.reload)."""
+    with _locked() as index:
+        _append(index, [(event['seq'], event['ts'], event['project_id'], record)])
+
+
+def _replay(project, event, index, file):
+    """Apply one feed event to a rebuilt project and return the result (None once deleted)."""
+    op = event['op']
+    if op == 'project.create':
+        return Project.from_dict(event['data']['project'])
+    if op == 'project.delete':
+        return None
+    if op == 'project.reload':
+        snapshot = index.latest(event['project_id'], seq=event['seq'])
+        if snapshot is not None and snapshot[0] == event['seq']:
+            return _load(snapshot[2])
+        # Written before reloads were snapshotted: the file is the best we have.
+        record = next((p for p in bulk_io.iter_projects(file) if p['id'] == event['project_id']), None)
+        return Project.from_dict(record) if record is not None else None
+    if project is not None:
+        project.apply_change(event)
+    return project
+
+
+def catch_up(file=None):
+    """Cut the snapshots due for the feed events since the last window; return how many were written."""
+    file = file or main.PROJECTS_FILE
+    last = changefeed.last_seq()
+    index = _read_index()
+    cursor = index.cursor()
+    if cursor is not None and last - cursor < SNAPSHOT_INTERVAL:
+        return 0
+    written = 0
+    # The projects file lock comes first, as writers take it around their
+    # save before calling catch_up(); the first cut reads the whole file.
+    with main.projects_locked(file), _locked() as index:
+        cursor = index.cursor()
+        if cursor is None:
+            now = time.time()
+            snapshots = [(last, now, project['id'], project) for project in bulk_io.iter_projects(file)]
+            _append(index, snapshots, (last, now))
+            return len(snapshots)
+        while last - cursor >= SNAPSHOT_INTERVAL:
+            events, end = changefeed.read(cursor, SNAPSHOT_INTERVAL)
+            projects = {}
+            for event in events:
+                project_id = event['project_id']
+                if project_id not in projects:
+                    snapshot = index.latest(project_id, seq=cursor)
+                    projects[project_id] = _load(snapshot[2]) if snapshot else None
+                projects[project_id] = _replay(projects[project_id], event, index, file)
+            ts = events[-1]['ts']
+            _append(index, [(end, ts, project_id, project.to_dict() if project is not None else None)
+                            for project_id, project in projects.items()], (end, ts))
+            written += len(projects)
+            cursor = end
+    return written
+
+
+def project_as_of(project_id, when, file=None):
+    """Rebuild a project as it was at `when` (epoch seconds); None if it did not exist then.
+
+    Raises LookupError when `when` is before snapshots were first cut.
+    """
+    catch_up(file)
+    index = _read_index()
+    if not index.windows or when < index.windows[0][1]:
+        raise LookupError("No project history that far back")
+    snapshot = index.latest(project_id, ts=when)
+    project = _load(snapshot[2]) if snapshot is not None else None
+    # Windows after the snapshot that left no snapshot of the project did not
+    # touch it, so reading can start at the last window end before `when`.
+    cursor = max(snapshot[0] if snapshot is not None else 0, index.window_before(when))
+    while True:
+        events, cursor = changefeed.read(cursor, SNAPSHOT_INTERVAL)
+        for event in events:
+            if event['ts'] > when:
+                return project
+            if event['project_id'] == project_id:
+                project = _replay(project, event, index, file)
+        if len(events) < SNAPSHOT_INTERVAL:
+            return project
+
+
+def purge():
+    for file in [SNAPSHOTS_FILE, INDEX_FILE]:
+        if os.path.exists(file):
+            os.remove(file)
+    _index['key'], _index['value'] = None, None
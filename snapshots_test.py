@@ -0,0 +1,89 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+import bulk_io
+import changefeed
+import snapshots
+from main import Project, Task, Status, load_data, save_data, projects_locked, PROJECTS_FILE
+
+class TestSnapshots(unittest.TestCase):
+
+    def setUp(self):
+        self.old_cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        save_data([Project('p1', 'Project', 'leader', ['leader'], [Task(title='T1', status=Status.TODO)]).to_dict()],
+                  PROJECTS_FILE)
+        self.project = Project.from_dict(load_data(PROJECTS_FILE)[0])
+        snapshots.catch_up()
+
+    def tearDown(self):
+        changefeed.purge()
+        snapshots.purge()
+        os.chdir(self.old_cwd)
+        self.tmp.cleanup()
+
+    def _moment(self):
+        moment = time.time()
+        time.sleep(0.001)
+        return moment
+
+    @patch('snapshots.SNAPSHOT_INTERVAL', 3)
+    def test_1_any_moment_rebuilt_with_bounded_replay(self):
+        moments = [(self._moment(), Status.TODO, ['leader'])]
+        for i, status in enumerate([Status.DOING, Status.DONE, Status.TODO, Status.DOING, Status.DONE, Status.ARCHIVED]):
+            self.project.tasks[0].change_status('leader', status)
+            if i == 2:
+                self.project.insert_member('member', 'leader')
+            self.project._update_project()
+            moments.append((self._moment(), status, list(self.project.members)))
+
+        self.assertGreater(len(snapshots._read_index().windows), 2, "Test 1: No snapshot windows cut")
+        with patch.object(Project, 'apply_change', autospec=True, side_effect=Project.apply_change) as mock_apply:
+            for moment, status, members in moments:
+                mock_apply.reset_mock()
+                past = snapshots.project_as_of('p1', moment)
+                self.assertEqual(past.tasks[0].status, status, "Test 1: Wrong status rebuilt")
+                self.assertEqual(past.members, members, "Test 1: Wrong members rebuilt")
+                self.assertLessEqual(mock_apply.call_count, 3, "Test 1: Replayed more than one window of events")
+        self.assertEqual(self.project.as_of(datetime.now()).to_dict(), self.project.to_dict(), "Test 1: Present not rebuilt")
+
+    def test_2_created_deleted_and_reloaded_projects(self):
+        before = self._moment()
+        created = Project('p2', 'New', 'leader', ['leader'])
+        created.emit_created('leader')
+        after_create = self._moment()
+        created.emit_deleted('leader')
+        self.assertIsNone(snapshots.project_as_of('p2', before), "Test 2: Project existed before it was created")
+        self.assertEqual(snapshots.project_as_of('p2', after_create).title, 'New', "Test 2: Created project not rebuilt")
+        self.assertIsNone(snapshots.project_as_of('p2', time.time()), "Test 2: Deleted project still rebuilt")
+        with self.assertRaises(LookupError):
+            snapshots.project_as_of('p1', 0)
+
+        projects = load_data(PROJECTS_FILE)
+        projects[0]['tasks'][0]['history'] = [{'username': 'leader', 'change': 'Task name changed to T1',
+                                               'timestamp': '2024-01-01T09:00:00'}]
+        save_data(projects, PROJECTS_FILE)
+        bulk_io.migrate_history('tester')
+        self.project.tasks[0].rename('leader', 'Renamed')
+        past = snapshots.project_as_of('p1', time.time())
+        self.assertEqual(past.tasks[0].history[0].kind, 'update', "Test 2: Reload snapshot not used")
+        self.assertEqual(past.tasks[0].title, 'Renamed', "Test 2: Events after the reload not replayed")
+
+    def test_3_first_cut_waits_for_projects_writers(self):
+        snapshots.purge()
+        cut = threading.Thread(target=snapshots.catch_up)
+        with projects_locked():
+            cut.start()
+            cut.join(0.2)
+            self.assertTrue(cut.is_alive(), "Test 3: First cut read projects.json during a write")
+        cut.join()
+        self.assertEqual(len(snapshots._read_index().windows), 1, "Test 3: First cut not taken after the write")
+
+if __name__ == '__main__':
+    unittest.main()